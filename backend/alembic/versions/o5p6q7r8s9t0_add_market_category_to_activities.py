@@ -0,0 +1,45 @@
+"""Add denormalized market_category to activities
+
+Revision ID: o5p6q7r8s9t0
+Revises: n4o5p6q7r8s9
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'o5p6q7r8s9t0'
+down_revision = 'n4o5p6q7r8s9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Add market_category column (copied from markets.category on write)
+    op.add_column('activities', sa.Column('market_category', sa.String(), nullable=True))
+    
+    # Backfill existing activities from their market
+    op.execute(
+        """
+        UPDATE activities
+        SET market_category = markets.category
+        FROM markets
+        WHERE activities.market_id = markets.id
+        """
+    )
+    
+    # Category-filtered global feed (replaces the market_id IN (...) lookup)
+    op.create_index(
+        'idx_activities_category_created',
+        'activities',
+        ['market_category', sa.text('created_at DESC')],
+        postgresql_where=sa.text('market_category IS NOT NULL'),
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_activities_category_created', table_name='activities')
+    op.drop_column('activities', 'market_category')
@@ -0,0 +1,182 @@
+"""Partition activities and notifications by month
+
+Converts activities and notifications into native range-partitioned tables
+(PARTITION BY RANGE (created_at), one partition per month). Existing rows are
+copied into partitions covering their months; partitions for the next few
+months are created ahead of time and then kept ahead by the
+maintain_partitions Celery beat task (app/services/partition_service.py).
+
+Revision ID: p6q7r8s9t0u1
+Revises: o5p6q7r8s9t0
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'p6q7r8s9t0u1'
+down_revision = 'o5p6q7r8s9t0'
+branch_labels = None
+depends_on = None
+
+PRECREATE_MONTHS = 3
+
+ACTIVITY_COLUMNS = "id, user_id, activity_type, market_id, market_category, meta_data, created_at"
+NOTIFICATION_COLUMNS = "id, user_id, type, message, read, meta_data, created_at"
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_monthly_partitions(table: str, first_month: date, last_month: date) -> None:
+    month = first_month
+    while month <= last_month:
+        next_month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_y{month.year:04d}m{month.month:02d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+        )
+        month = next_month
+
+
+def _partition_range(legacy_table: str) -> tuple[date, date]:
+    """Months to cover: oldest existing row through PRECREATE_MONTHS ahead"""
+    today = datetime.now(timezone.utc).date()
+    current = date(today.year, today.month, 1)
+    oldest = op.get_bind().execute(sa.text(f"SELECT min(created_at) FROM {legacy_table}")).scalar()
+    first = date(oldest.year, oldest.month, 1) if oldest else current
+    return min(first, current), _add_months(current, PRECREATE_MONTHS)
+
+
+def _create_activity_indexes() -> None:
+    op.create_index(op.f('ix_activities_id'), 'activities', ['id'], unique=False)
+    op.create_index(op.f('ix_activities_activity_type'), 'activities', ['activity_type'], unique=False)
+    op.create_index(op.f('ix_activities_created_at'), 'activities', ['created_at'], unique=False)
+    op.create_index(op.f('ix_activities_market_id'), 'activities', ['market_id'], unique=False)
+    op.create_index(op.f('ix_activities_user_id'), 'activities', ['user_id'], unique=False)
+    op.create_index('idx_activities_user_created', 'activities', ['user_id', sa.text('created_at DESC')], postgresql_where=sa.text('user_id IS NOT NULL'))
+    op.create_index('idx_activities_global_created', 'activities', [sa.text('created_at DESC')], postgresql_where=sa.text('user_id IS NULL'))
+    op.create_index('idx_activities_market_created', 'activities', ['market_id', sa.text('created_at DESC')], postgresql_where=sa.text('market_id IS NOT NULL'))
+    op.create_index('idx_activities_type_created', 'activities', ['activity_type', sa.text('created_at DESC')])
+    op.create_index('idx_activities_market_type_created', 'activities', ['market_id', 'activity_type', sa.text('created_at DESC')], postgresql_where=sa.text('market_id IS NOT NULL'))
+    op.create_index('idx_activities_category_created', 'activities', ['market_category', sa.text('created_at DESC')], postgresql_where=sa.text('market_category IS NOT NULL'))
+
+
+def _create_notification_indexes() -> None:
+    op.create_index(op.f('ix_notifications_id'), 'notifications', ['id'], unique=False)
+    op.create_index(op.f('ix_notifications_type'), 'notifications', ['type'], unique=False)
+    op.create_index(op.f('ix_notifications_created_at'), 'notifications', ['created_at'], unique=False)
+    op.create_index(op.f('ix_notifications_user_id'), 'notifications', ['user_id'], unique=False)
+    op.create_index('idx_notifications_user_unread', 'notifications', ['user_id', 'read', sa.text('created_at DESC')], postgresql_where=sa.text('read = false'))
+    op.create_index('idx_notifications_user_all', 'notifications', ['user_id', sa.text('created_at DESC')])
+
+
+def upgrade() -> None:
+    # Move the existing tables out of the way (the PK index name must be freed too)
+    op.execute("ALTER TABLE activities RENAME TO activities_unpartitioned")
+    op.execute("ALTER INDEX activities_pkey RENAME TO activities_unpartitioned_pkey")
+    op.execute("ALTER TABLE notifications RENAME TO notifications_unpartitioned")
+    op.execute("ALTER INDEX notifications_pkey RENAME TO notifications_unpartitioned_pkey")
+    
+    # Partitioned activities table (primary key must include the partition key)
+    op.create_table('activities',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('activity_type', sa.String(), nullable=False),
+    sa.Column('market_id', sa.String(), nullable=True),
+    sa.Column('market_category', sa.String(), nullable=True),
+    sa.Column('meta_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['market_id'], ['markets.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+    
+    # Partitioned notifications table
+    op.create_table('notifications',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('read', sa.Boolean(), nullable=False, server_default='false'),
+    sa.Column('meta_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+    
+    # Monthly partitions covering existing data plus upcoming months
+    _create_monthly_partitions('activities', *_partition_range('activities_unpartitioned'))
+    _create_monthly_partitions('notifications', *_partition_range('notifications_unpartitioned'))
+    
+    # Copy data, then drop the old tables (and their indexes)
+    op.execute(f"INSERT INTO activities ({ACTIVITY_COLUMNS}) SELECT {ACTIVITY_COLUMNS} FROM activities_unpartitioned")
+    op.execute(f"INSERT INTO notifications ({NOTIFICATION_COLUMNS}) SELECT {NOTIFICATION_COLUMNS} FROM notifications_unpartitioned")
+    op.drop_table('activities_unpartitioned')
+    op.drop_table('notifications_unpartitioned')
+    
+    # Indexes on the parent cascade to every partition (existing and future)
+    _create_activity_indexes()
+    _create_notification_indexes()
+
+
+def downgrade() -> None:
+    # Rebuild plain tables from the partitioned ones (attached partitions only)
+    op.execute("ALTER TABLE activities RENAME TO activities_partitioned")
+    op.execute("ALTER INDEX activities_pkey RENAME TO activities_partitioned_pkey")
+    op.execute("ALTER TABLE notifications RENAME TO notifications_partitioned")
+    op.execute("ALTER INDEX notifications_pkey RENAME TO notifications_partitioned_pkey")
+    for index_name in (
+        'ix_activities_id', 'ix_activities_activity_type', 'ix_activities_created_at',
+        'ix_activities_market_id', 'ix_activities_user_id', 'idx_activities_user_created',
+        'idx_activities_global_created', 'idx_activities_market_created', 'idx_activities_type_created',
+        'idx_activities_market_type_created', 'idx_activities_category_created',
+    ):
+        op.drop_index(index_name, table_name='activities_partitioned')
+    for index_name in (
+        'ix_notifications_id', 'ix_notifications_type', 'ix_notifications_created_at',
+        'ix_notifications_user_id', 'idx_notifications_user_unread', 'idx_notifications_user_all',
+    ):
+        op.drop_index(index_name, table_name='notifications_partitioned')
+    
+    op.create_table('activities',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('activity_type', sa.String(), nullable=False),
+    sa.Column('market_id', sa.String(), nullable=True),
+    sa.Column('market_category', sa.String(), nullable=True),
+    sa.Column('meta_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['market_id'], ['markets.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('notifications',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('read', sa.Boolean(), nullable=False, server_default='false'),
+    sa.Column('meta_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    
+    op.execute(f"INSERT INTO activities ({ACTIVITY_COLUMNS}) SELECT {ACTIVITY_COLUMNS} FROM activities_partitioned")
+    op.execute(f"INSERT INTO notifications ({NOTIFICATION_COLUMNS}) SELECT {NOTIFICATION_COLUMNS} FROM notifications_partitioned")
+    
+    # Dropping the parent drops all attached partitions
+    op.drop_table('activities_partitioned')
+    op.drop_table('notifications_partitioned')
+    
+    _create_activity_indexes()
+    _create_notification_indexes()
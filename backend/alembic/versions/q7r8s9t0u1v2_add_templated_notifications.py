@@ -0,0 +1,74 @@
+"""Add templated notifications
+
+Resolution notifications no longer store a formatted message and a JSONB copy
+of the market data per user. Rows reference a shared notification_payloads
+row and keep only per-user numbers; the message is rendered at read time.
+
+Revision ID: q7r8s9t0u1v2
+Revises: p6q7r8s9t0u1
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'q7r8s9t0u1v2'
+down_revision = 'p6q7r8s9t0u1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Shared per-resolution payloads
+    op.create_table('notification_payloads',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('market_id', sa.String(), nullable=True),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['market_id'], ['markets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_notification_payloads_id'), 'notification_payloads', ['id'], unique=False)
+    op.create_index(op.f('ix_notification_payloads_market_id'), 'notification_payloads', ['market_id'], unique=False)
+    
+    # Compact per-user columns (added to the partitioned parent and all partitions)
+    op.alter_column('notifications', 'message', existing_type=sa.Text(), nullable=True)
+    op.add_column('notifications', sa.Column('payload_id', sa.String(), nullable=True))
+    op.add_column('notifications', sa.Column('forecast_points', sa.Integer(), nullable=True))
+    op.add_column('notifications', sa.Column('chips_amount', sa.Integer(), nullable=True))
+    op.add_column('notifications', sa.Column('reward_amount', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'notifications_payload_id_fkey', 'notifications', 'notification_payloads',
+        ['payload_id'], ['id'], ondelete='CASCADE'
+    )
+
+
+def downgrade() -> None:
+    # Materialize templated rows back into message text before dropping the columns
+    op.execute(
+        """
+        UPDATE notifications n
+        SET message = CASE n.type
+                WHEN 'forecast_won' THEN 'Market ''' || (p.data->>'market_title') || ''' resolved in your favor. You gained ' || n.chips_amount || ' chips (total reward: ' || n.reward_amount || ').'
+                ELSE 'Market ''' || (p.data->>'market_title') || ''' resolved. Your forecast didn''t win. You lost ' || n.chips_amount || ' chips.'
+            END,
+            meta_data = p.data || jsonb_build_object('forecast_points', n.forecast_points)
+        FROM notification_payloads p
+        WHERE n.payload_id = p.id
+        """
+    )
+    op.execute("UPDATE notifications SET message = '' WHERE message IS NULL")
+    
+    op.drop_constraint('notifications_payload_id_fkey', 'notifications', type_='foreignkey')
+    op.drop_column('notifications', 'reward_amount')
+    op.drop_column('notifications', 'chips_amount')
+    op.drop_column('notifications', 'forecast_points')
+    op.drop_column('notifications', 'payload_id')
+    op.alter_column('notifications', 'message', existing_type=sa.Text(), nullable=False)
+    
+    op.drop_index(op.f('ix_notification_payloads_market_id'), table_name='notification_payloads')
+    op.drop_index(op.f('ix_notification_payloads_id'), table_name='notification_payloads')
+    op.drop_table('notification_payloads')
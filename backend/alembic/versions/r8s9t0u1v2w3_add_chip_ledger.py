@@ -0,0 +1,67 @@
+"""Add chip ledger and balance snapshots
+
+Every chip balance change is journaled to the append-only chip_ledger table;
+chip_balance_snapshots checkpoint balances periodically. Existing balances are
+carried over as opening_balance entries.
+
+Revision ID: r8s9t0u1v2w3
+Revises: q7r8s9t0u1v2
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'r8s9t0u1v2w3'
+down_revision = 'q7r8s9t0u1v2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('chip_ledger',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('entry_type', sa.String(), nullable=False),
+    sa.Column('amount', sa.Integer(), nullable=False),
+    sa.Column('balance_after', sa.Integer(), nullable=False),
+    sa.Column('reference_id', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_chip_ledger_user_id', 'chip_ledger', ['user_id', 'id'], unique=False)
+    op.create_index('idx_chip_ledger_type_created', 'chip_ledger', ['entry_type', 'created_at'], unique=False)
+    
+    op.create_table('chip_balance_snapshots',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('balance', sa.Integer(), nullable=False),
+    sa.Column('ledger_entry_id', sa.BigInteger(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_chip_balance_snapshots_user_entry', 'chip_balance_snapshots', ['user_id', 'ledger_entry_id'], unique=False)
+    op.create_index('idx_chip_balance_snapshots_user_taken', 'chip_balance_snapshots', ['user_id', 'taken_at'], unique=False)
+    
+    # Carry existing balances over so the ledger matches users.chips from day one
+    op.execute(
+        """
+        INSERT INTO chip_ledger (user_id, entry_type, amount, balance_after)
+        SELECT id, 'opening_balance', chips, chips
+        FROM users
+        WHERE chips <> 0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_chip_balance_snapshots_user_taken', table_name='chip_balance_snapshots')
+    op.drop_index('idx_chip_balance_snapshots_user_entry', table_name='chip_balance_snapshots')
+    op.drop_table('chip_balance_snapshots')
+    op.drop_index('idx_chip_ledger_type_created', table_name='chip_ledger')
+    op.drop_index('idx_chip_ledger_user_id', table_name='chip_ledger')
+    op.drop_table('chip_ledger')
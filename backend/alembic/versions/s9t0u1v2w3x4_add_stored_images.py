@@ -0,0 +1,48 @@
+"""Add content-addressed image storage
+
+Uploaded images are stored once per content hash (stored_images);
+image_references records which market or user shows each image, so
+unreferenced images can be garbage collected.
+
+Revision ID: s9t0u1v2w3x4
+Revises: r8s9t0u1v2w3
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 's9t0u1v2w3x4'
+down_revision = 'r8s9t0u1v2w3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('stored_images',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('byte_size', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_uploaded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+    op.create_index('idx_stored_images_last_uploaded_at', 'stored_images', ['last_uploaded_at'], unique=False)
+    
+    op.create_table('image_references',
+    sa.Column('owner_type', sa.String(), nullable=False),
+    sa.Column('owner_id', sa.String(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['content_hash'], ['stored_images.content_hash']),
+    sa.PrimaryKeyConstraint('owner_type', 'owner_id')
+    )
+    op.create_index('idx_image_references_content_hash', 'image_references', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_image_references_content_hash', table_name='image_references')
+    op.drop_table('image_references')
+    op.drop_index('idx_stored_images_last_uploaded_at', table_name='stored_images')
+    op.drop_table('stored_images')
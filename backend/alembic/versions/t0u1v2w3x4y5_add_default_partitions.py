@@ -0,0 +1,43 @@
+"""Add default partitions to activities and notifications
+
+Rows outside every monthly partition (e.g. if maintain_partitions stops
+running past the pre-created months) land in a DEFAULT partition instead of
+failing the insert. partition_service moves them into their monthly
+partitions once those are created.
+
+Revision ID: t0u1v2w3x4y5
+Revises: s9t0u1v2w3x4
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 't0u1v2w3x4y5'
+down_revision = 's9t0u1v2w3x4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE TABLE activities_default PARTITION OF activities DEFAULT")
+    op.execute("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT")
+
+
+def downgrade() -> None:
+    # Refuse rather than drop rows: run maintain_partitions first, which moves
+    # them into their monthly partitions
+    for table in ("notifications_default", "activities_default"):
+        op.execute(
+            f"""
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM {table}) THEN
+                    RAISE EXCEPTION '{table} still holds rows; run maintain_partitions before downgrading';
+                END IF;
+            END $$
+            """
+        )
+    op.execute("DROP TABLE notifications_default")
+    op.execute("DROP TABLE activities_default")
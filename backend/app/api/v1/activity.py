@@ -5,15 +5,16 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.dependencies import get_current_user_optional
+from app.dependencies import get_current_user_optional, get_read_db
 from app.models.user import User
 from app.models.activity import Activity
 from app.models.market import Market
-from app.schemas.activity import ActivityResponse, ActivityDetailResponse, ActivityListResponse
+from app.schemas.activity import ActivityDetailResponse, ActivityListResponse
 from app.services.activity_service import (
     get_user_activity_feed,
     get_global_activity_feed,
+    get_retention_window_start,
+    serialize_activity,
 )
 
 router = APIRouter()
@@ -25,7 +26,7 @@ async def get_activity_feed(
     limit: int = Query(20, ge=1, le=100, description="Results per page"),
     type: Optional[str] = Query(None, description="Filter by activity type"),
     market_id: Optional[str] = Query(None, description="Filter by market ID"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
     """
@@ -52,19 +53,7 @@ async def get_activity_feed(
     )
     
     # Enrich with user and market names (already loaded via eager loading)
-    enriched_activities = []
-    for activity in activities:
-        activity_dict = ActivityResponse.model_validate(activity).model_dump()
-        
-        # Add user display name if available (already loaded)
-        if activity.user:
-            activity_dict["user_display_name"] = activity.user.display_name
-        
-        # Add market title if available (already loaded)
-        if activity.market:
-            activity_dict["market_title"] = activity.market.title
-        
-        enriched_activities.append(activity_dict)
+    enriched_activities = [serialize_activity(activity) for activity in activities]
     
     # Calculate pagination
     pages = (total + limit - 1) // limit if total > 0 else 1
@@ -90,8 +79,7 @@ async def get_global_activity(
     limit: int = Query(50, ge=1, le=100, description="Results per page"),
     type: Optional[str] = Query(None, description="Filter by activity type"),
     category: Optional[str] = Query(None, description="Filter by market category"),
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_read_db),
 ):
     """
     Get global activity feed (public endpoint)
@@ -106,22 +94,8 @@ async def get_global_activity(
     - activities: List of activities
     - pagination: Pagination metadata
     """
-    activities, total = get_global_activity_feed(db, page, limit, type, category)
-    
-    # Enrich with user and market names (already loaded via eager loading)
-    enriched_activities = []
-    for activity in activities:
-        activity_dict = ActivityResponse.model_validate(activity).model_dump()
-        
-        # Add user display name if available (already loaded)
-        if activity.user:
-            activity_dict["user_display_name"] = activity.user.display_name
-        
-        # Add market title if available (already loaded)
-        if activity.market:
-            activity_dict["market_title"] = activity.market.title
-        
-        enriched_activities.append(activity_dict)
+    # Activities come back already serialized (and usually straight from cache)
+    enriched_activities, total = get_global_activity_feed(db, page, limit, type, category)
     
     # Calculate pagination
     pages = (total + limit - 1) // limit if total > 0 else 1
@@ -147,7 +121,7 @@ async def get_market_activity(
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Results per page"),
     type: Optional[str] = Query(None, description="Filter by activity type"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
     """
@@ -178,7 +152,10 @@ async def get_market_activity(
     query = db.query(Activity).options(
         joinedload(Activity.user),
         joinedload(Activity.market)
-    ).filter(Activity.market_id == market_id)
+    ).filter(
+        Activity.market_id == market_id,
+        Activity.created_at >= get_retention_window_start(),
+    )
     
     if type:
         query = query.filter(Activity.activity_type == type)
@@ -191,19 +168,7 @@ async def get_market_activity(
     activities = query.order_by(desc(Activity.created_at)).offset(offset).limit(limit).all()
     
     # Enrich with user and market names (already loaded via eager loading)
-    enriched_activities = []
-    for activity in activities:
-        activity_dict = ActivityResponse.model_validate(activity).model_dump()
-        
-        # Add user display name if available (already loaded)
-        if activity.user:
-            activity_dict["user_display_name"] = activity.user.display_name
-        
-        # Add market title if available (already loaded)
-        if activity.market:
-            activity_dict["market_title"] = activity.market.title
-        
-        enriched_activities.append(activity_dict)
+    enriched_activities = [serialize_activity(activity) for activity in activities]
     
     # Calculate pagination
     pages = (total + limit - 1) // limit if total > 0 else 1
@@ -229,7 +194,7 @@ async def get_user_activity(
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Results per page"),
     type: Optional[str] = Query(None, description="Filter by activity type"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
     """
@@ -259,19 +224,7 @@ async def get_user_activity(
     )
     
     # Enrich with user and market names (already loaded via eager loading)
-    enriched_activities = []
-    for activity in activities:
-        activity_dict = ActivityResponse.model_validate(activity).model_dump()
-        
-        # Add user display name if available (already loaded)
-        if activity.user:
-            activity_dict["user_display_name"] = activity.user.display_name
-        
-        # Add market title if available (already loaded)
-        if activity.market:
-            activity_dict["market_title"] = activity.market.title
-        
-        enriched_activities.append(activity_dict)
+    enriched_activities = [serialize_activity(activity) for activity in activities]
     
     # Calculate pagination
     pages = (total + limit - 1) // limit if total > 0 else 1
@@ -3,15 +3,19 @@ Admin endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc
+from sqlalchemy import func, and_, or_, desc, exists
 from typing import Optional, List
 from datetime import datetime, timedelta
 
-from app.dependencies import get_db, require_admin, require_market_moderator
+from app.dependencies import get_db, get_read_db, require_admin, require_market_moderator
 from app.models.user import User
 from app.models.market import Market
 from app.models.forecast import Forecast
 from app.models.purchase import Purchase
+from app.models.chip_ledger import ChipLedgerEntry
+from app.config import CHIP_TO_PESO_RATIO
+from app.services.user_cache_service import invalidate_cached_user
+from app.utils.security import revoke_user_tokens
 from app.schemas.admin import (
     AdminStatsResponse,
     FlaggedItemsListResponse,
@@ -34,7 +38,7 @@ router = APIRouter()
 
 @router.get("/stats", response_model=dict)
 async def get_admin_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin: User = Depends(require_admin),
 ):
     """Get admin dashboard statistics"""
@@ -44,12 +48,26 @@ async def get_admin_stats(
     total_forecasts = db.query(func.count(Forecast.id)).scalar() or 0
     total_purchases = db.query(func.count(Purchase.id)).scalar() or 0
     
-    # Total revenue (sum of all completed purchases)
-    total_revenue_cents = (
-        db.query(func.sum(Purchase.amount_cents))
-        .filter(Purchase.status == "completed")
+    # Total revenue (purchase credits in the chip ledger; 1 chip = ₱1.00 = 100 centavos)
+    purchased_chips = (
+        db.query(func.sum(ChipLedgerEntry.amount))
+        .filter(ChipLedgerEntry.entry_type == "purchase")
+        .scalar() or 0
+    )
+    # Purchases completed before the ledger existed are only in its opening
+    # balances, so count them from the purchases themselves
+    purchased_chips += (
+        db.query(func.sum(Purchase.chips_added))
+        .filter(
+            Purchase.status == "completed",
+            ~exists().where(
+                ChipLedgerEntry.entry_type == "purchase",
+                ChipLedgerEntry.reference_id == Purchase.id,
+            ),
+        )
         .scalar() or 0
     )
+    total_revenue_cents = int(purchased_chips * 100 * CHIP_TO_PESO_RATIO)
     
     # Active users in last 30 days
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
@@ -262,7 +280,9 @@ async def ban_user(
     
     user.is_banned = True
     user.is_active = False  # Also deactivate the account
+    invalidate_cached_user(db, user_id)
     db.commit()
+    revoke_user_tokens(user_id)
     
     return {"success": True, "message": f"User {user_id} banned successfully"}
 
@@ -283,6 +303,7 @@ async def unban_user(
     
     user.is_banned = False
     user.is_active = True  # Reactivate the account
+    invalidate_cached_user(db, user_id)
     db.commit()
     
     return {"success": True, "message": f"User {user_id} unbanned successfully"}
@@ -301,19 +322,71 @@ async def freeze_chips(
         raise HTTPException(status_code=404, detail="User not found")
     
     user.chips_frozen = request.freeze
+    invalidate_cached_user(db, user_id)
     db.commit()
     
     action = "frozen" if request.freeze else "unfrozen"
     return {"success": True, "message": f"User {user_id} chips {action} successfully"}
 
 
+@router.get("/db-pool", response_model=dict)
+async def get_db_pool_status(
+    admin: User = Depends(require_admin),
+):
+    """
+    Database connection pool usage for this API process
+    
+    Returns:
+    - in_use / peak_in_use: Connections checked out now and at most
+    - saturated_checkouts: Checkouts that took the last free connection
+    - avg_hold_ms / max_hold_ms: How long requests keep a connection
+    """
+    from app.database import get_pool_status
+    return {"success": True, "data": get_pool_status(), "errors": None}
+
+
+@router.get("/chips/reconciliation", response_model=dict)
+async def get_chip_reconciliation(
+    limit: int = Query(100, ge=1, le=1000, description="Maximum mismatched users to return"),
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_admin),
+):
+    """
+    Reconcile chip balances against the chip ledger
+    
+    Returns:
+    - ledger_totals: Net chips per entry type (purchase, forecast, payout, ...)
+    - ledger_net / chips_in_circulation: Should be equal
+    - mismatches: Users whose balance differs from their latest ledger entry
+    """
+    from app.services.chip_service import find_balance_mismatches
+    
+    ledger_totals = {
+        entry_type: int(total or 0)
+        for entry_type, total in db.query(
+            ChipLedgerEntry.entry_type, func.sum(ChipLedgerEntry.amount)
+        ).group_by(ChipLedgerEntry.entry_type).all()
+    }
+    chips_in_circulation = db.query(func.sum(User.chips)).scalar() or 0
+    
+    return {
+        "success": True,
+        "data": {
+            "ledger_totals": ledger_totals,
+            "ledger_net": sum(ledger_totals.values()),
+            "chips_in_circulation": int(chips_in_circulation),
+            "mismatches": find_balance_mismatches(db, limit=limit),
+        },
+    }
+
+
 @router.get("/users", response_model=UserManagementListResponse)
 async def get_users(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     search: Optional[str] = Query(None, description="Search by email or display name"),
     status_filter: Optional[str] = Query(None, description="Filter by status: active, banned, frozen"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin: User = Depends(require_admin),
 ):
     """Get user management list"""
@@ -390,7 +463,7 @@ async def get_markets(
     search: Optional[str] = Query(None, description="Search by title"),
     status_filter: Optional[str] = Query(None, description="Filter by status: open, suspended, resolved, cancelled"),
     category_filter: Optional[str] = Query(None, description="Filter by category"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     moderator: User = Depends(require_market_moderator),
 ):
     """Get market management list (market moderator or admin only)"""
@@ -466,7 +539,7 @@ async def get_purchases(
     status_filter: Optional[str] = Query(None, description="Filter by status: pending, completed, failed, refunded"),
     start_date: Optional[str] = Query(None, description="Start date (ISO format)"),
     end_date: Optional[str] = Query(None, description="End date (ISO format)"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin: User = Depends(require_admin),
 ):
     """Get purchase monitoring list"""
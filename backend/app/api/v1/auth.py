@@ -3,10 +3,13 @@ Authentication endpoints
 """
 import uuid
 from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.database import get_db
+from app.dependencies import security_optional
 from app.models.user import User
 from app.schemas.auth import (
     RegisterRequest,
@@ -18,12 +21,14 @@ from app.schemas.auth import (
 )
 from app.schemas.user import UserResponse
 from app.utils.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     create_refresh_token,
     decode_token,
     generate_reset_token,
+    revoke_token,
+    revoke_user_tokens,
 )
 
 router = APIRouter()
@@ -62,7 +67,7 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
     
     # Create new user
     user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(request.password)
+    hashed_password = await get_password_hash_async(request.password)
     
     new_user = User(
         id=user_id,
@@ -108,7 +113,15 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     # Find user by contact_number
     user = db.query(User).filter(User.contact_number == request.contact_number).first()
     
-    if not user or not verify_password(request.password, user.hashed_password):
+    if not user:
+        return {
+            "success": False,
+            "data": None,
+            "errors": [{"message": "Invalid contact number or password"}],
+        }
+    
+    password_valid, new_hash = await verify_password_async(request.password, user.hashed_password)
+    if not password_valid:
         return {
             "success": False,
             "data": None,
@@ -122,8 +135,10 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
             "errors": [{"message": "User account is inactive"}],
         }
     
-    # Update last login
+    # Update last login (and upgrade the hash if the Argon2 parameters changed)
     user.last_login = datetime.utcnow()
+    if new_hash:
+        user.hashed_password = new_hash
     db.commit()
     
     # Generate tokens (email may be None)
@@ -187,6 +202,23 @@ async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_
     }
 
 
+@router.post("/logout", response_model=dict)
+async def logout(
+    request: RefreshTokenRequest,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security_optional),
+):
+    """Logout endpoint - revokes the refresh token (and the access token, if sent)"""
+    revoke_token(request.refresh_token)
+    if credentials:
+        revoke_token(credentials.credentials)
+    
+    return {
+        "success": True,
+        "data": {"message": "Logged out"},
+        "errors": None,
+    }
+
+
 @router.post("/forgot-password", response_model=dict)
 async def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db)):
     """Forgot password endpoint - uses contact_number instead of email"""
@@ -238,11 +270,14 @@ async def reset_password(request: ResetPasswordRequest, db: Session = Depends(ge
         }
     
     # Update password
-    user.hashed_password = get_password_hash(request.new_password)
+    user.hashed_password = await get_password_hash_async(request.new_password)
     user.reset_token = None
     user.reset_token_expires = None
     db.commit()
     
+    # Sign out every existing session
+    revoke_user_tokens(user.id)
+    
     return {
         "success": True,
         "data": {"message": "Password reset successfully"},
@@ -3,13 +3,12 @@ Forecast endpoints
 """
 import uuid as uuid_module
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, and_
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy import desc, and_, exists, func, select
 
 from app.database import get_db
-from app.dependencies import get_current_user_optional
 from app.models.forecast import Forecast
 from app.models.market import Market, Outcome
 from app.models.user import User
@@ -17,15 +16,36 @@ from app.schemas.forecast import (
     ForecastCreate,
     ForecastUpdate,
     ForecastResponse,
-    ForecastDetailResponse,
 )
 from app.dependencies import get_current_user, get_current_user_optional
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter()
 
-# Forecast limits
-MAX_FORECASTS_PER_DAY = 50
-MAX_FORECASTS_PER_MINUTE = 10
+# Badges earned by forecast count alone (checked when a forecast is placed)
+FORECAST_COUNT_BADGES = ("newbie", "veteran")
+
+
+def forecast_to_dict(forecast: Forecast, **related) -> dict:
+    """
+    Serialize a forecast (ForecastResponse fields plus `related` details)
+    
+    Built directly rather than through ForecastDetailResponse, so list
+    endpoints do not validate every forecast again before serializing it.
+    """
+    return {
+        "id": forecast.id,
+        "user_id": forecast.user_id,
+        "market_id": forecast.market_id,
+        "outcome_id": forecast.outcome_id,
+        "points": forecast.points,
+        "reward_amount": forecast.reward_amount,
+        "status": forecast.status,
+        "is_flagged": forecast.is_flagged,
+        "created_at": forecast.created_at,
+        "updated_at": forecast.updated_at,
+        **related,
+    }
 
 
 @router.post("/markets/{market_id}/forecast", response_model=dict, status_code=status.HTTP_201_CREATED)
@@ -39,33 +59,45 @@ async def place_forecast(
     Place a forecast on a market
     
     This endpoint:
-    1. Validates the market is open
+    1. Validates market, outcome and existing forecast in one query
     2. Validates the user has enough chips
-    3. Validates per-market and daily limits
-    4. Atomically: debits chips, creates forecast, updates outcome totals
+    3. Consumes the per-minute and daily quotas (Redis counters)
+    4. Atomically: debits chips, creates forecast and activity, updates outcome totals
     """
-    # Get market
-    market = db.query(Market).filter(Market.id == market_id).first()
-    if not market:
+    # Pre-flight: market, outcome, "already forecasted" and the user's balance in a single query
+    # (current_user carries only cached auth flags; reading chips from it would load the row)
+    has_forecast = exists().where(
+        Forecast.user_id == current_user.id,
+        Forecast.market_id == Market.id,
+    )
+    preflight = db.query(
+        Market.status,
+        Market.category,
+        Market.max_points_per_user,
+        Outcome.name.label("outcome_name"),
+        has_forecast.label("has_forecast"),
+        select(User.chips).where(User.id == current_user.id).scalar_subquery().label("user_chips"),
+        select(User.badges).where(User.id == current_user.id).scalar_subquery().label("user_badges"),
+    ).outerjoin(
+        Outcome,
+        and_(Outcome.id == forecast_data.outcome_id, Outcome.market_id == Market.id),
+    ).filter(Market.id == market_id).first()
+    
+    if not preflight:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Market not found",
         )
     
     # Validate market is open
-    if market.status != "open":
+    if preflight.status != "open":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Market is {market.status}. Only open markets can be forecasted.",
+            detail=f"Market is {preflight.status}. Only open markets can be forecasted.",
         )
     
     # Validate outcome exists and belongs to market
-    outcome = db.query(Outcome).filter(
-        Outcome.id == forecast_data.outcome_id,
-        Outcome.market_id == market_id,
-    ).first()
-    
-    if not outcome:
+    if preflight.outcome_name is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Outcome not found or does not belong to this market",
@@ -79,72 +111,59 @@ async def place_forecast(
         )
     
     # Validate user has enough chips
-    if current_user.chips < forecast_data.points:
+    if preflight.user_chips < forecast_data.points:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Insufficient chips. You have ₱{current_user.chips}, but need ₱{forecast_data.points}",
+            detail=f"Insufficient chips. You have ₱{preflight.user_chips}, but need ₱{forecast_data.points}",
         )
     
     # Check if user already has a forecast on this market
-    existing_forecast = db.query(Forecast).filter(
-        Forecast.user_id == current_user.id,
-        Forecast.market_id == market_id,
-    ).first()
-    
-    if existing_forecast:
+    if preflight.has_forecast:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You already have a forecast on this market. Use the update endpoint to modify it.",
         )
     
-    # Validate per-market limit
-    user_forecasts_on_market = db.query(Forecast).filter(
-        Forecast.user_id == current_user.id,
-        Forecast.market_id == market_id,
-    ).all()
-    
-    total_points_on_market = sum(f.points for f in user_forecasts_on_market)
-    if total_points_on_market + forecast_data.points > market.max_points_per_user:
-        remaining = market.max_points_per_user - total_points_on_market
+    # Validate per-market limit (one forecast per market, so this is the only allocation)
+    if forecast_data.points > preflight.max_points_per_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Per-market limit exceeded. You can allocate up to ₱{remaining} more on this market (max: ₱{market.max_points_per_user})",
+            detail=f"Per-market limit exceeded. You can allocate up to ₱{preflight.max_points_per_user} more on this market (max: ₱{preflight.max_points_per_user})",
         )
     
-    # Validate daily forecast limit
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_forecasts = db.query(Forecast).filter(
-        Forecast.user_id == current_user.id,
-        Forecast.created_at >= today_start,
-    ).count()
-    
-    if today_forecasts >= MAX_FORECASTS_PER_DAY:
+    # Rate limiting and daily limit (Redis counters; the database is counted only if Redis is down)
+    from app.services.quota_service import (
+        consume_forecast_quota,
+        release_forecast_quota,
+        FORECASTS_PER_MINUTE,
+    )
+    exceeded = consume_forecast_quota(db, current_user.id)
+    if exceeded and exceeded.quota is FORECASTS_PER_MINUTE:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Daily forecast limit reached. Maximum {MAX_FORECASTS_PER_DAY} forecasts per day.",
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded. Maximum {exceeded.quota.limit} forecasts per minute.",
         )
-    
-    # Rate limiting: Check forecasts in last minute
-    one_minute_ago = datetime.utcnow() - timedelta(minutes=1)
-    recent_forecasts = db.query(Forecast).filter(
-        Forecast.user_id == current_user.id,
-        Forecast.created_at >= one_minute_ago,
-    ).count()
-    
-    if recent_forecasts >= MAX_FORECASTS_PER_MINUTE:
+    if exceeded:
         raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Rate limit exceeded. Maximum {MAX_FORECASTS_PER_MINUTE} forecasts per minute.",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Daily forecast limit reached. Maximum {exceeded.quota.limit} forecasts per day.",
         )
     
-    # Atomic transaction: Debit chips + Create forecast + Update outcome totals
+    # Atomic transaction: Debit chips + Create forecast and activity + Update outcome totals
     forecast_id = str(uuid_module.uuid4())
     
     try:
-        # Debit chips from user
-        current_user.chips -= forecast_data.points
+        # Debit chips from user (conditional UPDATE: concurrent requests cannot overdraw)
+        from app.services.chip_service import debit_chips
+        new_balance = debit_chips(db, current_user.id, forecast_data.points, "forecast", forecast_id)
+        if new_balance is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient chips. You need ₱{forecast_data.points} to place this forecast",
+            )
         
-        # Create forecast
+        # Create forecast (timestamps set here so the response needs no refresh)
+        now = datetime.now(timezone.utc)
         forecast = Forecast(
             id=forecast_id,
             user_id=current_user.id,
@@ -153,26 +172,12 @@ async def place_forecast(
             points=forecast_data.points,
             status="pending",
             is_flagged=False,
+            created_at=now,
+            updated_at=now,
         )
         db.add(forecast)
         
-        # Update outcome total_points
-        outcome.total_points += forecast_data.points
-        
-        # Flush to ensure forecast is in database before badge check
-        db.flush()
-        
-        # Check and award badges (for badges like Newbie, Veteran that depend on forecast count)
-        # Must happen after flush so the new forecast is counted
-        from app.services.badge_service import check_and_award_badges
-        check_and_award_badges(db, current_user.id)
-        
-        db.commit()
-        db.refresh(forecast)
-        db.refresh(current_user)
-        db.refresh(outcome)
-        
-        # Create activity for forecast placement
+        # Create activity for forecast placement (same transaction)
         from app.services.activity_service import create_activity
         create_activity(
             db,
@@ -182,31 +187,57 @@ async def place_forecast(
             metadata={
                 "forecast_id": forecast_id,
                 "outcome_id": forecast_data.outcome_id,
-                "outcome_name": outcome.name,
+                "outcome_name": preflight.outcome_name,
                 "points": forecast_data.points,
-            }  # Will be stored as meta_data
+            },  # Will be stored as meta_data
+            market_category=preflight.category,
         )
-        db.commit()  # Commit activity
         
-        return {
-            "success": True,
-            "data": {
-                "forecast": ForecastResponse.model_validate(forecast),
-                "new_balance": current_user.chips,
-                "updated_outcome": {
-                    "id": outcome.id,
-                    "name": outcome.name,
-                    "total_points": outcome.total_points,
-                },
-            },
-            "message": f"Forecast placed successfully. {forecast_data.points} chips allocated to '{outcome.name}'",
-        }
+        db.flush()
+        
+        # Update outcome total_points atomically, last so the hot row lock is held only until commit
+        from app.services.market_odds_service import add_outcome_points, queue_odds_update
+        outcome_total_points = add_outcome_points(db, forecast_data.outcome_id, forecast_data.points)
+        
+        # Push new odds to live market streams once committed
+        queue_odds_update(db, market_id)
+        
+        # Read before commit expires the instance (no reload query afterwards)
+        forecast_response = ForecastResponse.model_validate(forecast)
+        
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        release_forecast_quota(current_user.id)
+        raise
     except Exception as e:
         db.rollback()
+        release_forecast_quota(current_user.id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to place forecast. Transaction rolled back.",
         )
+    
+    # Forecast-count badges (Newbie, Veteran), after the forecast is committed;
+    # skipped once the user holds both. Other badges depend on resolutions.
+    held_badges = preflight.user_badges or []
+    if not all(badge_id in held_badges for badge_id in FORECAST_COUNT_BADGES):
+        from app.services.badge_service import check_and_award_badges
+        check_and_award_badges(db, current_user.id, badge_ids=FORECAST_COUNT_BADGES)
+    
+    return {
+        "success": True,
+        "data": {
+            "forecast": forecast_response,
+            "new_balance": new_balance,
+            "updated_outcome": {
+                "id": forecast_data.outcome_id,
+                "name": preflight.outcome_name,
+                "total_points": outcome_total_points,
+            },
+        },
+        "message": f"Forecast placed successfully. {forecast_data.points} chips allocated to '{preflight.outcome_name}'",
+    }
 
 
 @router.patch("/forecasts/{forecast_id}", response_model=dict)
@@ -221,28 +252,44 @@ async def update_forecast(
     
     Allows changing the outcome or points (within limits)
     """
-    forecast = db.query(Forecast).filter(
+    # Pre-flight: forecast, market, new outcome, the user's other points on the
+    # market and their balance in a single query
+    other_forecast = aliased(Forecast)
+    other_points = select(func.coalesce(func.sum(other_forecast.points), 0)).where(
+        other_forecast.user_id == current_user.id,
+        other_forecast.market_id == Forecast.market_id,
+        other_forecast.id != Forecast.id,
+    ).scalar_subquery()
+    preflight = db.query(
+        Forecast,
+        Market.status.label("market_status"),
+        Market.max_points_per_user,
+        Outcome.id.label("new_outcome_id"),
+        other_points.label("other_points"),
+        select(User.chips).where(User.id == current_user.id).scalar_subquery().label("user_chips"),
+    ).join(
+        Market, Market.id == Forecast.market_id,
+    ).outerjoin(
+        Outcome,
+        and_(Outcome.id == forecast_data.outcome_id, Outcome.market_id == Forecast.market_id),
+    ).filter(
         Forecast.id == forecast_id,
         Forecast.user_id == current_user.id,
     ).first()
     
-    if not forecast:
+    if not preflight:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Forecast not found",
         )
+    forecast = preflight.Forecast
     
-    # Get market
-    market = db.query(Market).filter(Market.id == forecast.market_id).first()
-    if not market or market.status != "open":
+    if preflight.market_status != "open":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot update forecast on a closed market",
         )
     
-    # Get old outcome
-    old_outcome = db.query(Outcome).filter(Outcome.id == forecast.outcome_id).first()
-    
     # Calculate points change
     points_change = 0
     if forecast_data.points is not None:
@@ -256,37 +303,16 @@ async def update_forecast(
             )
     
     # Validate new outcome if provided
-    new_outcome = None
-    if forecast_data.outcome_id:
-        new_outcome = db.query(Outcome).filter(
-            Outcome.id == forecast_data.outcome_id,
-            Outcome.market_id == forecast.market_id,
-        ).first()
-        
-        if not new_outcome:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="New outcome not found or does not belong to this market",
-            )
-    
-    # Validate user has enough chips if increasing points
-    if points_change > 0 and current_user.chips < points_change:
+    if forecast_data.outcome_id and preflight.new_outcome_id is None:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Insufficient chips. You have ₱{current_user.chips}, but need ₱{points_change} more",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="New outcome not found or does not belong to this market",
         )
     
     # Validate per-market limit
     if forecast_data.points:
-        user_forecasts_on_market = db.query(Forecast).filter(
-            Forecast.user_id == current_user.id,
-            Forecast.market_id == forecast.market_id,
-            Forecast.id != forecast_id,  # Exclude current forecast
-        ).all()
-        
-        total_points_on_market = sum(f.points for f in user_forecasts_on_market)
-        if total_points_on_market + forecast_data.points > market.max_points_per_user:
-            remaining = market.max_points_per_user - total_points_on_market
+        if preflight.other_points + forecast_data.points > preflight.max_points_per_user:
+            remaining = preflight.max_points_per_user - preflight.other_points
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Per-market limit exceeded. You can allocate up to ₱{remaining} more on this market",
@@ -300,43 +326,56 @@ async def update_forecast(
         new_points = forecast_data.points if forecast_data.points is not None else old_points
         new_outcome_id = forecast_data.outcome_id if forecast_data.outcome_id else old_outcome_id
         
-        # Update user chips
+        # Update user chips (conditional UPDATE: the balance is checked there,
+        # and concurrent requests cannot overdraw)
+        from app.services.chip_service import debit_chips
+        new_balance = preflight.user_chips
         if points_change != 0:
-            current_user.chips -= points_change
+            new_balance = debit_chips(db, current_user.id, points_change, "forecast_update", forecast_id)
+            if new_balance is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Insufficient chips. You have ₱{preflight.user_chips}, but need ₱{points_change} more",
+                )
         
-        # Update forecast
+        # Update forecast (updated_at set here so the response needs no refresh)
         if forecast_data.outcome_id:
             forecast.outcome_id = forecast_data.outcome_id
         if forecast_data.points is not None:
             forecast.points = forecast_data.points
+        forecast.updated_at = datetime.now(timezone.utc)
+        
+        # Update outcome totals atomically (last, so hot row locks are held only until commit)
+        from app.services.market_odds_service import add_outcome_points, queue_odds_update
+        outcome_deltas = {old_outcome_id: -old_points}
+        outcome_deltas[new_outcome_id] = outcome_deltas.get(new_outcome_id, 0) + new_points
+        
+        db.flush()  # Write the forecast row before taking the outcome locks
         
-        # Update outcome totals
-        # Remove old points from old outcome
-        if old_outcome:
-            old_outcome.total_points -= old_points
+        # Consistent lock order across concurrent updates avoids deadlocks
+        for outcome_id in sorted(outcome_deltas):
+            if outcome_deltas[outcome_id]:
+                add_outcome_points(db, outcome_id, outcome_deltas[outcome_id])
         
-        # Add new points to new outcome
-        if new_outcome_id != old_outcome_id:
-            # Different outcome - add to new outcome
-            if new_outcome:
-                new_outcome.total_points += new_points
-        else:
-            # Same outcome - just adjust points difference
-            if old_outcome:
-                old_outcome.total_points += new_points
+        # Push new odds to live market streams once committed
+        queue_odds_update(db, forecast.market_id)
+        
+        # Read before commit expires the instance (no reload query afterwards)
+        forecast_response = ForecastResponse.model_validate(forecast)
         
         db.commit()
-        db.refresh(forecast)
-        db.refresh(current_user)
         
         return {
             "success": True,
             "data": {
-                "forecast": ForecastResponse.model_validate(forecast),
-                "new_balance": current_user.chips,
+                "forecast": forecast_response,
+                "new_balance": new_balance,
             },
             "message": "Forecast updated successfully",
         }
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -398,16 +437,17 @@ async def get_user_forecasts(
     forecasts = query.order_by(desc(Forecast.created_at)).offset(offset).limit(limit).all()
     
     # Enrich with outcome and market names (already loaded)
-    forecast_details = []
-    for forecast in forecasts:
-        forecast_dict = ForecastResponse.model_validate(forecast).model_dump()
-        forecast_dict["outcome_name"] = forecast.outcome.name if forecast.outcome else None
-        forecast_dict["market_title"] = forecast.market.title if forecast.market else None
-        forecast_dict["market_status"] = forecast.market.status if forecast.market else None
-        
-        forecast_details.append(ForecastDetailResponse(**forecast_dict))
+    forecast_details = [
+        forecast_to_dict(
+            forecast,
+            outcome_name=forecast.outcome.name if forecast.outcome else None,
+            market_title=forecast.market.title if forecast.market else None,
+            market_status=forecast.market.status if forecast.market else None,
+        )
+        for forecast in forecasts
+    ]
     
-    return {
+    return FastJSONResponse({
         "success": True,
         "data": {
             "forecasts": forecast_details,
@@ -418,7 +458,7 @@ async def get_user_forecasts(
                 "pages": (total_count + limit - 1) // limit,
             },
         },
-    }
+    })
 
 
 @router.get("/markets/{market_id}/forecasts", response_model=dict)
@@ -445,39 +485,51 @@ async def get_market_forecasts(
     query = db.query(Forecast).filter(Forecast.market_id == market_id)
     total_count = query.count()
     
-    # Apply pagination
+    # Apply pagination (outcomes eager loaded for their names)
     offset = (page - 1) * limit
-    forecasts = query.order_by(desc(Forecast.created_at)).offset(offset).limit(limit).all()
+    forecasts = (
+        query.options(joinedload(Forecast.outcome))
+        .order_by(desc(Forecast.created_at))
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
     
     # Get current user's forecast if authenticated
     user_forecast = None
     if current_user:
-        user_forecast_obj = db.query(Forecast).filter(
-            Forecast.user_id == current_user.id,
-            Forecast.market_id == market_id,
-        ).first()
+        user_forecast_obj = (
+            db.query(Forecast)
+            .options(joinedload(Forecast.outcome))
+            .filter(
+                Forecast.user_id == current_user.id,
+                Forecast.market_id == market_id,
+            )
+            .first()
+        )
         
         if user_forecast_obj:
-            outcome = db.query(Outcome).filter(Outcome.id == user_forecast_obj.outcome_id).first()
-            forecast_dict = ForecastResponse.model_validate(user_forecast_obj).model_dump()
-            forecast_dict["outcome_name"] = outcome.name if outcome else None
-            forecast_dict["market_title"] = market.title
-            user_forecast = ForecastDetailResponse(**forecast_dict)
+            user_forecast = forecast_to_dict(
+                user_forecast_obj,
+                outcome_name=user_forecast_obj.outcome.name if user_forecast_obj.outcome else None,
+                market_title=market.title,
+            )
     
     # Enrich forecasts with outcome names
-    forecast_details = []
-    for forecast in forecasts:
-        outcome = db.query(Outcome).filter(Outcome.id == forecast.outcome_id).first()
-        forecast_dict = ForecastResponse.model_validate(forecast).model_dump()
-        forecast_dict["outcome_name"] = outcome.name if outcome else None
-        forecast_dict["market_title"] = market.title
-        forecast_details.append(ForecastDetailResponse(**forecast_dict))
+    forecast_details = [
+        forecast_to_dict(
+            forecast,
+            outcome_name=forecast.outcome.name if forecast.outcome else None,
+            market_title=market.title,
+        )
+        for forecast in forecasts
+    ]
     
-    return {
+    return FastJSONResponse({
         "success": True,
         "data": {
             "forecasts": forecast_details,
-            "user_forecast": user_forecast.model_dump() if user_forecast else None,
+            "user_forecast": user_forecast,
             "pagination": {
                 "page": page,
                 "limit": limit,
@@ -485,7 +537,7 @@ async def get_market_forecasts(
                 "pages": (total_count + limit - 1) // limit,
             },
         },
-    }
+    })
 
 
 # Cancel forecast functionality removed
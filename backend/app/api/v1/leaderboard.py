@@ -6,16 +6,17 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.dependencies import get_current_user_optional
+from app.dependencies import get_current_user_optional, get_read_db
 from app.models.user import User
 from app.models.forecast import Forecast
 from app.models.market import Market
+from app.services.image_service import image_variant_url
 from app.services.leaderboard_service import (
     get_cached_leaderboard,
     get_user_rank,
     invalidate_leaderboard_cache,
 )
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter()
 
@@ -26,7 +27,7 @@ async def get_leaderboard(
     category: Optional[str] = Query("all", description="Market category filter (all for all categories)"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(50, ge=1, le=100, description="Results per page"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
     """
@@ -69,7 +70,7 @@ async def get_leaderboard(
     # Calculate pagination metadata
     pages = (total + limit - 1) // limit if total > 0 else 1
     
-    return {
+    return FastJSONResponse({
         "success": True,
         "data": {
             "leaderboard": paginated_leaderboard,
@@ -82,13 +83,13 @@ async def get_leaderboard(
             },
         },
         "errors": None,
-    }
+    })
 
 
 @router.get("/biggest-wins", response_model=dict)
 async def get_biggest_wins(
     limit: int = Query(8, ge=1, le=50, description="Number of wins to return"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Get biggest wins from resolved markets in the current month
@@ -144,7 +145,7 @@ async def get_biggest_wins(
             wins_by_user_market[key] = {
                 'user_id': user.id,
                 'display_name': user.display_name,
-                'avatar_url': user.avatar_url,
+                'avatar_url': image_variant_url(user.avatar_url, "thumb"),
                 'market_id': market.id,
                 'market_title': market.title,
                 'initial_amount': initial_amount,
@@ -180,13 +181,13 @@ async def get_biggest_wins(
     for i, win in enumerate(biggest_wins, start=1):
         win['rank'] = i
     
-    return {
+    return FastJSONResponse({
         "success": True,
         "data": {
             "wins": biggest_wins,
         },
         "errors": None,
-    }
+    })
 
 
 @router.post("/invalidate", response_model=dict)
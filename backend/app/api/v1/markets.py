@@ -1,15 +1,20 @@
 """
 Market endpoints
 """
+import asyncio
+import csv
+import json
 import uuid as uuid_module
 import os
 import shutil
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from fastapi.responses import JSONResponse
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi.responses import JSONResponse, StreamingResponse
 from starlette.requests import Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, or_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import desc, inspect, or_, update
 from slugify import slugify
 
 from app.database import get_db
@@ -18,46 +23,149 @@ from app.models.user import User
 from app.schemas.market import (
     MarketCreate,
     MarketUpdate,
-    MarketResponse,
-    MarketDetailResponse,
     MarketListResponse,
     OutcomeCreate,
 )
-from app.dependencies import get_current_user, get_current_user_id, require_market_moderator
+from app.dependencies import get_current_user, get_current_user_id, get_read_db, require_market_moderator
 from app.config import settings
+from app.services.image_service import ImageNotStoredError, image_variant_url, update_image_reference
+from app.services.market_import_service import (
+    SLUG_CLAIM_ATTEMPTS,
+    MarketImportError,
+    bulk_create_markets,
+    is_slug_conflict,
+    next_free_slug,
+    parse_csv_rows,
+    parse_json_rows,
+    parse_ndjson_rows,
+    taken_slugs,
+    validate_rows,
+)
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter()
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = "uploads/markets"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 # Allowed image MIME types
-ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"]
+# HEIC/HEIF (iPhone) uploads are converted like the rest
+ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp", "image/heic", "image/heif"]
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_IMPORT_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
 
 
 
 def generate_unique_slug(db: Session, title: str, existing_slug: Optional[str] = None) -> str:
-    """Generate a unique slug from title"""
+    """
+    Generate a unique slug from title
+    
+    Existing slugs for the title are fetched in one query and the next free
+    one is picked. When updating, a market keeps its slug if it already
+    belongs to the title (the title's slug or a numbered variant of it).
+    """
     base_slug = slugify(title)
-    slug = base_slug
+    if existing_slug and (
+        existing_slug == base_slug
+        or (existing_slug.rpartition("-")[0] == base_slug and existing_slug.rpartition("-")[2].isdigit())
+    ):
+        return existing_slug
+    return next_free_slug(base_slug, taken_slugs(db, [base_slug]))
+
+
+def assign_unique_slug(db: Session, market: Market, title: str) -> None:
+    """
+    Set a market's slug from title and flush it
     
-    # If updating, exclude current market from slug check
-    query = db.query(Market).filter(Market.slug == slug)
-    if existing_slug:
-        query = query.filter(Market.slug != existing_slug)
+    Another request can claim the same slug between the lookup and the
+    write; the unique constraint then fails inside a savepoint and the next
+    free slug is tried. For an existing market, its other pending changes
+    are flushed first and only the slug UPDATE runs in the savepoint, so a
+    conflict rolls back nothing else.
     
-    counter = 1
-    while query.first():
-        slug = f"{base_slug}-{counter}"
-        query = db.query(Market).filter(Market.slug == slug)
-        if existing_slug:
-            query = query.filter(Market.slug != existing_slug)
-        counter += 1
+    Raises:
+        HTTPException: 409 if no slug could be claimed
+    """
+    persistent = inspect(market).persistent
+    if persistent:
+        db.flush()
+    existing_slug = market.slug
+    for _ in range(SLUG_CLAIM_ATTEMPTS):
+        slug = generate_unique_slug(db, title, existing_slug=existing_slug)
+        try:
+            with db.begin_nested():
+                if persistent:
+                    db.execute(
+                        update(Market)
+                        .where(Market.id == market.id)
+                        .values(slug=slug)
+                        .execution_options(synchronize_session=False)
+                    )
+                else:
+                    market.slug = slug
+                    db.add(market)
+                    db.flush()
+        except IntegrityError as e:
+            if not is_slug_conflict(e):
+                raise
+            # The rolled-back slug may have been our own existing one
+            existing_slug = None
+            continue
+        if persistent:
+            set_committed_value(market, "slug", slug)
+        return
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Could not allocate a unique slug for this title. Please try again.",
+    )
+
+
+def reference_market_image(db: Session, market: Market) -> None:
+    """Record the stored image a market shows (400 if it no longer exists)"""
+    try:
+        update_image_reference(db, "market", market.id, market.image_url)
+    except ImageNotStoredError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Image no longer exists. Please upload it again.",
+        )
+
+
+def market_to_dict(market: Market, image_variant: str = "full") -> dict:
+    """
+    Serialize a market and its outcomes for responses
     
-    return slug
+    Built directly rather than through MarketResponse, so hot endpoints do not
+    validate every market again before serializing it. `image_variant` picks
+    the size of uploaded images that image_url points to.
+    """
+    return {
+        "id": market.id,
+        "title": market.title,
+        "slug": market.slug,
+        "description": market.description,
+        "rules": market.rules,
+        "image_url": image_variant_url(market.image_url, image_variant),
+        "category": market.category,
+        "meta_data": market.meta_data or {},
+        "max_points_per_user": market.max_points_per_user,
+        # Safely get end_date (in case migration hasn't been run yet)
+        "end_date": getattr(market, 'end_date', None),
+        "status": market.status,
+        "resolution_outcome": market.resolution_outcome,
+        "resolution_time": market.resolution_time,
+        "created_by": market.created_by,
+        "created_at": market.created_at,
+        "updated_at": market.updated_at,
+        "outcomes": [
+            {
+                "id": outcome.id,
+                "market_id": outcome.market_id,
+                "name": outcome.name,
+                "total_points": outcome.total_points,
+                "created_at": outcome.created_at,
+            }
+            for outcome in market.outcomes
+        ],
+    }
 
 
 @router.get("", response_model=MarketListResponse)
@@ -67,7 +175,7 @@ async def list_markets(
     search: Optional[str] = Query(None, description="Search in title and description"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """List markets with filters and pagination"""
     query = db.query(Market)
@@ -105,42 +213,9 @@ async def list_markets(
     )
     
     # Include outcomes for each market (already loaded via eager loading)
-    market_responses = []
-    for market in markets:
-        # Safely get end_date (in case migration hasn't been run yet)
-        end_date = getattr(market, 'end_date', None)
-        
-        market_dict = {
-            "id": market.id,
-            "title": market.title,
-            "slug": market.slug,
-            "description": market.description,
-            "rules": market.rules,
-            "image_url": market.image_url,
-            "category": market.category,
-            "meta_data": market.meta_data or {},
-            "max_points_per_user": market.max_points_per_user,
-            "end_date": end_date,
-            "status": market.status,
-            "resolution_outcome": market.resolution_outcome,
-            "resolution_time": market.resolution_time,
-            "created_by": market.created_by,
-            "created_at": market.created_at,
-            "updated_at": market.updated_at,
-            "outcomes": [
-                {
-                    "id": outcome.id,
-                    "market_id": outcome.market_id,
-                    "name": outcome.name,
-                    "total_points": outcome.total_points,
-                    "created_at": outcome.created_at,
-                }
-                for outcome in market.outcomes
-            ],
-        }
-        market_responses.append(MarketResponse(**market_dict))
+    market_responses = [market_to_dict(market, image_variant="card") for market in markets]
     
-    return {
+    return FastJSONResponse({
         "success": True,
         "data": {
             "markets": market_responses,
@@ -151,14 +226,15 @@ async def list_markets(
                 "pages": (total + limit - 1) // limit,
             },
         },
-    }
+        "message": None,
+    })
 
 
 @router.get("/{market_id}/top-holders", response_model=dict)
 async def get_market_top_holders(
     market_id: str,
     limit: int = Query(10, ge=1, le=50, description="Number of top holders to return"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Get top holders for a market (users with largest forecast amounts)
@@ -246,7 +322,7 @@ async def get_market_top_holders(
             'rank': i,
             'user_id': row.id,
             'display_name': row.display_name,
-            'avatar_url': row.avatar_url,
+            'avatar_url': image_variant_url(row.avatar_url, "thumb"),
             'reputation': row.reputation,
             'total_points': row.total_points,
             'outcomes': outcomes
@@ -261,7 +337,7 @@ async def get_market_top_holders(
 
 
 @router.get("/{market_id}", response_model=dict)
-async def get_market(market_id: str, db: Session = Depends(get_db)):
+async def get_market(market_id: str, db: Session = Depends(get_read_db)):
     """Get market detail with consensus"""
     market = db.query(Market).filter(Market.id == market_id).first()
     
@@ -272,54 +348,61 @@ async def get_market(market_id: str, db: Session = Depends(get_db)):
         )
     
     # Calculate consensus
-    total_points = sum(outcome.total_points for outcome in market.outcomes)
-    consensus = {}
-    
-    if total_points > 0:
-        for outcome in market.outcomes:
-            percentage = (outcome.total_points / total_points) * 100
-            consensus[outcome.name] = round(percentage, 2)
+    from app.services.market_odds_service import compute_consensus
+    consensus, total_points = compute_consensus(market.outcomes)
     
-    # Safely get end_date (in case migration hasn't been run yet)
-    end_date = getattr(market, 'end_date', None)
+    market_dict = market_to_dict(market)
+    market_dict["consensus"] = consensus
+    market_dict["total_volume"] = total_points
     
-    market_dict = {
-        "id": market.id,
-        "title": market.title,
-        "slug": market.slug,
-        "description": market.description,
-        "rules": market.rules,
-        "image_url": market.image_url,
-        "category": market.category,
-        "meta_data": market.meta_data or {},
-        "max_points_per_user": market.max_points_per_user,
-        "end_date": end_date,
-        "status": market.status,
-        "resolution_outcome": market.resolution_outcome,
-        "resolution_time": market.resolution_time,
-        "created_by": market.created_by,
-        "created_at": market.created_at,
-        "updated_at": market.updated_at,
-        "outcomes": [
-            {
-                "id": outcome.id,
-                "market_id": outcome.market_id,
-                "name": outcome.name,
-                "total_points": outcome.total_points,
-                "created_at": outcome.created_at,
-            }
-            for outcome in market.outcomes
-        ],
-        "consensus": consensus,
-        "total_volume": total_points,
-    }
-    
-    return {
+    return FastJSONResponse({
         "success": True,
         "data": {
-            "market": MarketDetailResponse(**market_dict),
+            "market": market_dict,
         },
-    }
+    })
+
+
+@router.get("/{market_id}/stream")
+async def stream_market_odds(market_id: str, request: Request):
+    """
+    Server-Sent Events stream of live odds for a market
+    
+    Sends an `odds` event with outcome totals, consensus and total volume on
+    connect and whenever forecasts change, at most once per tick
+    (MARKET_ODDS_TICK_SECONDS). Viewers in a process share a single feed, so
+    the number of viewers does not affect database load.
+    """
+    from app.services.market_odds_service import hub
+    from app.services.realtime_service import SSE_HEADERS, STREAM_CLOSED
+    
+    snapshot = await hub.snapshot(market_id)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Market not found",
+        )
+    
+    async def event_stream():
+        # Joined once streaming starts: a response that is never streamed
+        # (client gone first) must not leave a viewer registered
+        queue = await hub.join(market_id, snapshot)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is STREAM_CLOSED:
+                    break
+                yield message
+        finally:
+            await hub.leave(market_id, queue)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 
 @router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
@@ -329,14 +412,10 @@ async def create_market(
     current_user: User = Depends(require_market_moderator),
 ):
     """Create a new market (market moderator or admin only)"""
-    # Generate slug
-    slug = generate_unique_slug(db, market_data.title)
-    
     # Create market
     market = Market(
         id=str(uuid_module.uuid4()),
         title=market_data.title,
-        slug=slug,
         description=market_data.description,
         rules=market_data.rules,
         image_url=market_data.image_url,
@@ -348,8 +427,8 @@ async def create_market(
         status="open",
     )
     
-    db.add(market)
-    db.flush()  # Get market ID
+    # Claim a unique slug (adds and flushes the market)
+    assign_unique_slug(db, market, market_data.title)
     
     # Create outcomes
     for outcome_data in market_data.outcomes:
@@ -361,6 +440,9 @@ async def create_market(
         )
         db.add(outcome)
     
+    if market.image_url:
+        reference_market_image(db, market)
+    
     db.commit()
     db.refresh(market)
     
@@ -374,52 +456,131 @@ async def create_market(
         metadata={
             "market_title": market.title,
             "category": market.category,
-        }  # Will be stored as meta_data
+        },  # Will be stored as meta_data
+        market_category=market.category,
     )
     db.commit()  # Commit activity
     
     # Return created market
-    # Safely get end_date (in case migration hasn't been run yet)
-    end_date = getattr(market, 'end_date', None)
+    market_dict = market_to_dict(market)
     
-    market_dict = {
-        "id": market.id,
-        "title": market.title,
-        "slug": market.slug,
-        "description": market.description,
-        "rules": market.rules,
-        "image_url": market.image_url,
-        "category": market.category,
-        "meta_data": market.meta_data or {},
-        "max_points_per_user": market.max_points_per_user,
-        "end_date": end_date,
-        "status": market.status,
-        "resolution_outcome": market.resolution_outcome,
-        "resolution_time": market.resolution_time,
-        "created_by": market.created_by,
-        "created_at": market.created_at,
-        "updated_at": market.updated_at,
-        "outcomes": [
-            {
-                "id": outcome.id,
-                "market_id": outcome.market_id,
-                "name": outcome.name,
-                "total_points": outcome.total_points,
-                "created_at": outcome.created_at,
-            }
-            for outcome in market.outcomes
-        ],
+    return {
+        "success": True,
+        "data": {
+            "market": market_dict,
+        },
+        "message": "Market created successfully",
     }
+
+
+def _create_market_batch(db: Session, rows: list, current_user: User):
+    """Validate rows and create them all, or report every invalid row"""
+    valid, errors = validate_rows(rows)
+    if errors:
+        return JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            content={
+                "success": False,
+                "data": None,
+                "errors": errors,
+            },
+        )
+    
+    try:
+        created = bulk_create_markets(db, [market for _, market in valid], current_user.id)
+    except ImageNotStoredError as e:
+        db.rollback()
+        return JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            content={
+                "success": False,
+                "data": None,
+                "errors": [
+                    {"row": row, "field": "image_url", "message": "Image no longer exists. Please upload it again."}
+                    for row, market in valid
+                    if market.image_url == e.url
+                ],
+            },
+        )
+    except IntegrityError as e:
+        if not is_slug_conflict(e):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Could not allocate unique slugs for these titles. Please try again.",
+        )
+    db.commit()
     
     return {
         "success": True,
         "data": {
-            "market": MarketResponse(**market_dict),
+            "created": len(created),
+            "markets": [{"row": row, **market} for (row, _), market in zip(valid, created)],
         },
-        "message": "Market created successfully",
+        "message": f"{len(created)} markets created successfully",
     }
 
 
+@router.post("/bulk", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def create_markets_bulk(
+    markets: List[Dict[str, Any]] = Body(..., description="Market objects, as for POST /markets"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_market_moderator),
+):
+    """
+    Create many markets at once (market moderator or admin only)
+    
+    All rows are validated first; if any is invalid nothing is created and
+    a 422 lists the errors by row (1-based).
+    """
+    try:
+        rows = parse_json_rows(markets)
+    except MarketImportError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _create_market_batch(db, rows, current_user)
+
+
+@router.post("/import", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def import_markets(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_market_moderator),
+):
+    """
+    Create markets from an NDJSON, JSON or CSV file (market moderator or admin only)
+    
+    CSV files have a header row with CSV_COLUMNS; outcomes are separated by
+    "|". Errors are reported by line number.
+    """
+    content = await file.read(MAX_IMPORT_FILE_SIZE + 1)
+    if len(content) > MAX_IMPORT_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File size exceeds 5MB limit",
+        )
+    try:
+        text = content.decode("utf-8-sig")  # Spreadsheet exports often start with a BOM
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be UTF-8 encoded")
+    
+    filename = (file.filename or "").lower()
+    try:
+        if filename.endswith(".csv") or file.content_type in ("text/csv", "application/vnd.ms-excel"):
+            rows = parse_csv_rows(text)
+        elif filename.endswith(".json") or file.content_type == "application/json":
+            items = json.loads(text)
+            if not isinstance(items, list):
+                raise MarketImportError("JSON file must contain an array of markets")
+            rows = parse_json_rows(items)
+        else:
+            rows = parse_ndjson_rows(text)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON: {e.msg}")
+    except (MarketImportError, csv.Error) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _create_market_batch(db, rows, current_user)
+
+
 @router.patch("/{market_id}", response_model=dict)
 async def update_market(
     market_id: str,
@@ -440,7 +601,7 @@ async def update_market(
     if market_data.title is not None:
         market.title = market_data.title
         # Regenerate slug if title changed
-        market.slug = generate_unique_slug(db, market_data.title, existing_slug=market.slug)
+        assign_unique_slug(db, market, market_data.title)
     
     if market_data.description is not None:
         market.description = market_data.description
@@ -450,9 +611,15 @@ async def update_market(
     
     if market_data.image_url is not None:
         market.image_url = market_data.image_url
+        reference_market_image(db, market)
     
-    if market_data.category is not None:
+    if market_data.category is not None and market_data.category != market.category:
         market.category = market_data.category
+        # Keep denormalized activity categories in sync
+        from app.models.activity import Activity
+        db.query(Activity).filter(Activity.market_id == market.id).update(
+            {"market_category": market_data.category}, synchronize_session=False
+        )
     
     if market_data.status is not None:
         market.status = market_data.status
@@ -471,43 +638,18 @@ async def update_market(
     db.commit()
     db.refresh(market)
     
-    # Return updated market
-    # Safely get end_date (in case migration hasn't been run yet)
-    end_date = getattr(market, 'end_date', None)
+    # Cached feed pages embed market titles and categories
+    if market_data.title is not None or market_data.category is not None:
+        from app.services.activity_service import invalidate_global_activity_cache
+        invalidate_global_activity_cache()
     
-    market_dict = {
-        "id": market.id,
-        "title": market.title,
-        "slug": market.slug,
-        "description": market.description,
-        "rules": market.rules,
-        "image_url": market.image_url,
-        "category": market.category,
-        "meta_data": market.meta_data or {},
-        "max_points_per_user": market.max_points_per_user,
-        "end_date": end_date,
-        "status": market.status,
-        "resolution_outcome": market.resolution_outcome,
-        "resolution_time": market.resolution_time,
-        "created_by": market.created_by,
-        "created_at": market.created_at,
-        "updated_at": market.updated_at,
-        "outcomes": [
-            {
-                "id": outcome.id,
-                "market_id": outcome.market_id,
-                "name": outcome.name,
-                "total_points": outcome.total_points,
-                "created_at": outcome.created_at,
-            }
-            for outcome in market.outcomes
-        ],
-    }
+    # Return updated market
+    market_dict = market_to_dict(market)
     
     return {
         "success": True,
         "data": {
-            "market": MarketResponse(**market_dict),
+            "market": market_dict,
         },
         "message": "Market updated successfully",
     }
@@ -520,42 +662,33 @@ async def upload_market_image(
     current_user: User = Depends(require_market_moderator),
 ):
     """Upload market image (market moderator or admin only)"""
-    # Validate file type
-    if file.content_type not in ALLOWED_IMAGE_TYPES:
+    # Stream to disk (type sniffed from the content, size capped), then decode,
+    # strip metadata and write the resized variants (once per distinct image)
+    from app.services.image_service import InvalidImageError, UploadTooLargeError, store_image_upload
+    try:
+        paths = await store_image_upload(file, MAX_FILE_SIZE, ALLOWED_IMAGE_TYPES)
+    except UploadTooLargeError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_IMAGE_TYPES)}",
+            detail="File size exceeds 10MB limit",
         )
-    
-    # Read file content to check size
-    file_content = await file.read()
-    file_size = len(file_content)
-    
-    if file_size > MAX_FILE_SIZE:
+    except InvalidImageError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File size exceeds 10MB limit. Current size: {file_size / 1024 / 1024:.2f}MB",
+            detail=f"Invalid or unsupported image. Allowed types: {', '.join(ALLOWED_IMAGE_TYPES)}",
         )
     
-    # Generate unique filename
-    file_ext = os.path.splitext(file.filename)[1] or ".jpg"
-    unique_filename = f"{uuid_module.uuid4()}{file_ext}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        buffer.write(file_content)
-    
-    # Return full URL (in production, this would be a CDN URL)
-    # For development, construct URL from request
+    # Return full URLs (in production, these would be CDN URLs)
+    # For development, construct URLs from request
     base_url = str(request.base_url).rstrip('/')
-    image_url = f"{base_url}/uploads/markets/{unique_filename}"
+    variant_urls = {variant: f"{base_url}/uploads/{path}" for variant, path in paths.items()}
     
     return {
         "success": True,
         "data": {
-            "image_url": image_url,
-            "filename": unique_filename,
+            "image_url": variant_urls["full"],
+            "filename": os.path.basename(paths["full"]),
+            "variants": variant_urls,
         },
         "message": "Image uploaded successfully",
     }
@@ -565,7 +698,7 @@ async def upload_market_image(
 async def get_market_history(
     market_id: str,
     time_range: Optional[str] = Query("all", description="Time range: 1h, 6h, 1d, 1w, 1m, all"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Get historical consensus data for a market
@@ -1,21 +1,28 @@
 """
 Notification endpoints
 """
+import json
+from contextlib import aclosing
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.dependencies import get_current_user, get_current_user_optional
+from app.config import settings
+from app.database import get_db, SessionLocal
+from app.dependencies import get_current_user, get_current_user_optional, get_stream_user_id, is_user_allowed
 from app.models.user import User
 from app.models.notification import Notification
-from app.schemas.notification import NotificationResponse, NotificationListResponse
+from app.schemas.notification import NotificationListResponse
 from app.services.notification_service import (
     get_notifications,
     get_unread_count,
     mark_as_read,
     mark_all_as_read,
+    unread_counter_key,
 )
+from app.services.realtime_service import broker, format_sse, user_channel, SSE_HEADERS
 
 router = APIRouter()
 
@@ -56,7 +63,7 @@ async def get_user_notifications(
     return {
         "success": True,
         "data": {
-            "notifications": [NotificationResponse.model_validate(n).model_dump() for n in notifications],
+            "notifications": notifications,
             "unread_count": unread_count,
             "pagination": {
                 "page": page,
@@ -91,6 +98,60 @@ async def get_unread_count_endpoint(
     }
 
 
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    user_id: str = Depends(get_stream_user_id),
+):
+    """
+    Server-Sent Events stream of new notifications and unread count changes
+    
+    Replaces polling: the stream opens with the current unread count, then
+    pushes events as notifications are created or read. Authenticate with the
+    access token as the `token` query parameter.
+    
+    Events:
+    - unread_count: {unread_count}
+    - notification: {unread_count, notification?} - notification is omitted for
+      bulk deliveries (e.g. market resolution); refetch the list instead
+    """
+    # Short-lived session: an open stream must not hold a pooled connection
+    db = SessionLocal()
+    try:
+        initial_count = get_unread_count(db, user_id)
+    finally:
+        db.close()
+    
+    counter_key = unread_counter_key(user_id)
+    
+    async def event_stream():
+        yield format_sse({"unread_count": initial_count}, event="unread_count")
+        try:
+            # aclosing: unsubscribe as soon as this stream ends, not when the
+            # listener generator is garbage collected
+            async with aclosing(broker.listen(user_channel(user_id), settings.STREAM_KEEPALIVE_SECONDS)) as messages:
+                async for data in messages:
+                    if await request.is_disconnected():
+                        break
+                    if data is None:
+                        # Banned or deactivated users lose their stream
+                        if not await run_in_threadpool(is_user_allowed, user_id):
+                            break
+                        yield ": keep-alive\n\n"
+                        continue
+                    message = json.loads(data)
+                    event = message.pop("type", "notification")
+                    count = await broker.redis.get(counter_key)
+                    if count is not None:
+                        message["unread_count"] = max(int(count), 0)
+                    yield format_sse(message, event=event)
+        except Exception:
+            # Redis unavailable: end the stream; the client reconnects or falls back to polling
+            return
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/{notification_id}/read", response_model=dict)
 async def mark_notification_as_read(
     notification_id: str,
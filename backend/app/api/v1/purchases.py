@@ -21,7 +21,7 @@ router = APIRouter()
 # Purchase limits (for testing)
 MIN_CHIPS_PER_PURCHASE = 20  # Minimum ₱20
 MAX_CHIPS_PER_PURCHASE = 100000  # Maximum ₱100,000
-MAX_DAILY_PURCHASE_LIMIT = 500000  # Maximum ₱500,000 per day
+# Daily limit: quota_service.PURCHASE_CHIPS_PER_DAY
 
 
 @router.post("/checkout", response_model=dict, status_code=status.HTTP_201_CREATED)
@@ -53,21 +53,13 @@ async def create_checkout(
             detail=f"Maximum purchase is {MAX_CHIPS_PER_PURCHASE} chips (₱{MAX_CHIPS_PER_PURCHASE})",
         )
     
-    # Check daily purchase limit
-    from datetime import datetime
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_purchases = db.query(Purchase).filter(
-        Purchase.user_id == current_user.id,
-        Purchase.status == "completed",
-        Purchase.created_at >= today_start,
-    ).all()
-    
-    today_total = sum(p.chips_added for p in today_purchases)
-    if today_total + purchase_data.chips_added > MAX_DAILY_PURCHASE_LIMIT:
-        remaining = MAX_DAILY_PURCHASE_LIMIT - today_total
+    # Check daily purchase limit (reserves the chips; released if the payment fails)
+    from app.services.quota_service import consume_purchase_quota, release_purchase_quota
+    exceeded = consume_purchase_quota(db, current_user.id, purchase_data.chips_added)
+    if exceeded:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Daily purchase limit reached. You can purchase up to {remaining} more chips today.",
+            detail=f"Daily purchase limit reached. You can purchase up to {exceeded.remaining} more chips today.",
         )
     
     # Calculate amount in centavos (1 chip = ₱1.00 = 100 cents)
@@ -129,6 +121,7 @@ async def create_checkout(
             }
         except Exception as e:
             db.rollback()
+            release_purchase_quota(current_user.id, purchase_data.chips_added)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to create payment intent: {str(e)}",
@@ -183,6 +176,7 @@ async def create_checkout(
             }
         except Exception as e:
             db.rollback()
+            release_purchase_quota(current_user.id, purchase_data.chips_added)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to create checkout session: {str(e)}",
@@ -203,12 +197,14 @@ async def create_checkout(
         
         # Atomically: Create purchase + credit chips
         try:
+            from app.services.chip_service import credit_chips
             db.add(purchase)
-            current_user.chips += purchase_data.chips_added
+            new_balance = credit_chips(db, current_user.id, purchase_data.chips_added, "purchase", purchase_id)
             db.commit()
             db.refresh(purchase)
         except Exception as e:
             db.rollback()
+            release_purchase_quota(current_user.id, purchase_data.chips_added)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to process purchase",
@@ -218,7 +214,7 @@ async def create_checkout(
             "success": True,
             "data": {
                 "purchase": PurchaseResponse.model_validate(purchase),
-                "new_balance": current_user.chips,
+                "new_balance": new_balance,
             },
             "message": f"Successfully purchased {purchase_data.chips_added} chips (₱{purchase_data.chips_added})",
         }
@@ -339,20 +335,19 @@ async def paymongo_webhook(
             if not purchase:
                 return {"status": "ok", "message": "Purchase not found"}
             
-            # Credit chips to user
-            user = db.query(User).filter(User.id == purchase.user_id).first()
-            if user:
-                try:
-                    purchase.status = "completed"
-                    user.chips += purchase.chips_added
+            # Complete purchase and credit chips (conditional UPDATEs: a redelivered webhook cannot credit twice)
+            from app.services.chip_service import credit_purchase
+            try:
+                if credit_purchase(db, purchase.id) is not None:
                     db.commit()
                     return {"status": "ok", "message": "Purchase completed and chips credited"}
-                except Exception as e:
-                    db.rollback()
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=f"Failed to process purchase: {str(e)}",
-                    )
+                db.rollback()
+            except Exception as e:
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to process purchase: {str(e)}",
+                )
         
         elif event_type in ["payment_intent.failed", "payment_intent.payment_failed"]:
             payment_intent_data = event_data.get("data", {})
@@ -365,9 +360,15 @@ async def paymongo_webhook(
             ).first()
             
             if purchase:
-                purchase.status = "failed"
+                # Conditional UPDATE: a redelivered webhook cannot release the quota twice
+                from app.services.chip_service import fail_purchase
+                failed = fail_purchase(db, purchase.id)
                 db.commit()
-                return {"status": "ok", "message": "Purchase marked as failed"}
+                if failed is not None:
+                    # Give the reserved chips back to the user's daily limit
+                    from app.services.quota_service import release_purchase_quota
+                    release_purchase_quota(failed.user_id, failed.chips_added, failed.created_at)
+                    return {"status": "ok", "message": "Purchase marked as failed"}
         
         return {"status": "ok", "message": "Webhook processed"}
         
@@ -433,20 +434,19 @@ async def terminal3_webhook(
             if not purchase:
                 return {"status": "ok", "message": "Purchase not found"}
             
-            # Credit chips to user
-            user = db.query(User).filter(User.id == purchase.user_id).first()
-            if user:
-                try:
-                    purchase.status = "completed"
-                    user.chips += purchase.chips_added
+            # Complete purchase and credit chips (conditional UPDATEs: a redelivered webhook cannot credit twice)
+            from app.services.chip_service import credit_purchase
+            try:
+                if credit_purchase(db, purchase.id) is not None:
                     db.commit()
                     return {"status": "ok", "message": "Purchase completed and chips credited"}
-                except Exception as e:
-                    db.rollback()
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=f"Failed to process purchase: {str(e)}",
-                    )
+                db.rollback()
+            except Exception as e:
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to process purchase: {str(e)}",
+                )
         
         # Handle payment failure
         elif event_type == "payment.failed":
@@ -463,9 +463,15 @@ async def terminal3_webhook(
                 ).first()
             
             if purchase:
-                purchase.status = "failed"
+                # Conditional UPDATE: a redelivered webhook cannot release the quota twice
+                from app.services.chip_service import fail_purchase
+                failed = fail_purchase(db, purchase.id)
                 db.commit()
-                return {"status": "ok", "message": "Purchase marked as failed"}
+                if failed is not None:
+                    # Give the reserved chips back to the user's daily limit
+                    from app.services.quota_service import release_purchase_quota
+                    release_purchase_quota(failed.user_id, failed.chips_added, failed.created_at)
+                    return {"status": "ok", "message": "Purchase marked as failed"}
         
         return {"status": "ok", "message": "Pingback processed"}
         
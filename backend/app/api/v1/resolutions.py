@@ -94,6 +94,7 @@ def score_forecasts(db: Session, market_id: str, winning_outcome_id: str) -> dic
         })
     
     # Mark winners and credit chips
+    payouts = {}  # user_id -> chips to credit
     for forecast in winning_forecasts:
         forecast.status = "won"
         won_count += 1
@@ -114,11 +115,8 @@ def score_forecasts(db: Session, market_id: str, winning_outcome_id: str) -> dic
         # Calculate chips gained (reward - original bet = profit)
         chips_gained = reward_int - forecast.points
         
-        # Credit chips to user
-        user = db.query(User).filter(User.id == forecast.user_id).first()
-        if user:
-            user.chips += reward_int
-            total_rewards += reward_int
+        # Credit chips to user (applied below in one batched UPDATE)
+        payouts[forecast.user_id] = payouts.get(forecast.user_id, 0) + reward_int
         
         user_results.append({
             "user_id": forecast.user_id,
@@ -129,6 +127,9 @@ def score_forecasts(db: Session, market_id: str, winning_outcome_id: str) -> dic
             "reward_amount": reward_int,
         })
     
+    from app.services.chip_service import credit_chips_batch
+    total_rewards = credit_chips_batch(db, payouts, "payout", market_id)
+    
     db.commit()
     
     return {
@@ -244,7 +245,8 @@ async def resolve_market(
                 "winning_outcome": winning_outcome_obj.name if winning_outcome_obj else "Unknown",
                 "resolved_by": current_user.id,
                 "house_edge_chips": scoring_results.get("house_edge_chips", 0),
-            }  # Will be stored as meta_data
+            },  # Will be stored as meta_data
+            market_category=market.category,
         )
         
         # Create individual win/loss notifications for each user
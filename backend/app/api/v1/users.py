@@ -1,7 +1,6 @@
 """
 User endpoints
 """
-import uuid as uuid_module
 import os
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.responses import JSONResponse
@@ -11,14 +10,11 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate, UserProfile
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_read_db
+from app.services.user_cache_service import invalidate_cached_user
 
 router = APIRouter()
 
-# Create uploads directory for user avatars if it doesn't exist
-UPLOAD_DIR = "uploads/avatars"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 # Allowed image MIME types (common mobile formats)
 ALLOWED_IMAGE_TYPES = [
     "image/jpeg", 
@@ -60,6 +56,7 @@ async def update_profile(
 ):
     """Update own profile endpoint"""
     # Check if display name is being changed and if it's taken
+    display_name_changed = False
     if request.display_name and request.display_name != current_user.display_name:
         existing_user = db.query(User).filter(
             User.display_name == request.display_name,
@@ -72,6 +69,7 @@ async def update_profile(
                 "errors": [{"message": "Display name already taken"}],
             }
         current_user.display_name = request.display_name
+        display_name_changed = True
     
     # Update bio if provided
     if request.bio is not None:
@@ -80,10 +78,24 @@ async def update_profile(
     # Update avatar_url if provided
     if request.avatar_url is not None:
         current_user.avatar_url = request.avatar_url
+        from app.services.image_service import ImageNotStoredError, update_image_reference
+        try:
+            update_image_reference(db, "user", current_user.id, request.avatar_url)
+        except ImageNotStoredError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Image no longer exists. Please upload it again.",
+            )
     
+    invalidate_cached_user(db, current_user.id)
     db.commit()
     db.refresh(current_user)
     
+    # Cached feed pages embed display names
+    if display_name_changed:
+        from app.services.activity_service import invalidate_global_activity_cache
+        invalidate_global_activity_cache()
+    
     return {
         "success": True,
         "data": {
@@ -94,7 +106,7 @@ async def update_profile(
 
 
 @router.get("/{user_id}/profile", response_model=dict)
-async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
+async def get_user_profile(user_id: str, db: Session = Depends(get_read_db)):
     """Get user profile endpoint (public)"""
     user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
     
@@ -120,7 +132,7 @@ async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{user_id}/badges", response_model=dict)
-async def get_user_badges(user_id: str, db: Session = Depends(get_db)):
+async def get_user_badges(user_id: str, db: Session = Depends(get_read_db)):
     """Get user badges endpoint"""
     user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
     
@@ -189,42 +201,37 @@ async def upload_profile_avatar(
     db: Session = Depends(get_db),
 ):
     """Upload profile avatar image"""
-    # Validate file type
-    if file.content_type not in ALLOWED_IMAGE_TYPES:
+    # Stream to disk (type sniffed from the content, size capped), then decode,
+    # strip metadata and write the resized variants (once per distinct image)
+    from app.services.image_service import (
+        InvalidImageError,
+        UploadTooLargeError,
+        store_image_upload,
+        update_image_reference,
+    )
+    try:
+        paths = await store_image_upload(file, MAX_FILE_SIZE, ALLOWED_IMAGE_TYPES)
+    except UploadTooLargeError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file type. Allowed types: JPEG, PNG, GIF, WebP, HEIC, HEIF",
+            detail="File size exceeds 10MB limit",
         )
-    
-    # Read file content to check size
-    file_content = await file.read()
-    file_size = len(file_content)
-    
-    if file_size > MAX_FILE_SIZE:
+    except InvalidImageError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File size exceeds 10MB limit. Current size: {file_size / 1024 / 1024:.2f}MB",
+            detail="Invalid or unsupported image. Allowed types: JPEG, PNG, GIF, WebP, HEIC, HEIF",
         )
     
-    # Generate unique filename
-    file_ext = os.path.splitext(file.filename)[1] or ".jpg"
-    # Normalize extension for HEIC/HEIF
-    if file.content_type in ["image/heic", "image/heif"]:
-        file_ext = ".heic"
-    unique_filename = f"{uuid_module.uuid4()}{file_ext}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        buffer.write(file_content)
-    
-    # Return full URL (in production, this would be a CDN URL)
-    # For development, construct URL from request
+    # Return full URLs (in production, these would be CDN URLs)
+    # For development, construct URLs from request
     base_url = str(request.base_url).rstrip('/')
-    image_url = f"{base_url}/uploads/avatars/{unique_filename}"
+    variant_urls = {variant: f"{base_url}/uploads/{path}" for variant, path in paths.items()}
+    image_url = variant_urls["full"]
     
     # Update user's avatar_url
     current_user.avatar_url = image_url
+    update_image_reference(db, "user", current_user.id, image_url)
+    invalidate_cached_user(db, current_user.id)
     db.commit()
     db.refresh(current_user)
     
@@ -232,7 +239,8 @@ async def upload_profile_avatar(
         "success": True,
         "data": {
             "avatar_url": image_url,
-            "filename": unique_filename,
+            "filename": os.path.basename(paths["full"]),
+            "variants": variant_urls,
         },
         "message": "Avatar uploaded successfully",
     }
@@ -241,7 +249,7 @@ async def upload_profile_avatar(
 @router.get("/{user_id}/reputation-history", response_model=dict)
 async def get_reputation_history(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = 100
 ):
     """Get reputation history endpoint"""
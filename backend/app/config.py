@@ -2,7 +2,7 @@
 Application configuration
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -14,6 +14,8 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "postgresql://andersonbondoc@localhost/dev_acbmarket"
+    DATABASE_REPLICA_URLS: List[str] = []  # Read replicas for read-only endpoints (empty: primary only)
+    READ_YOUR_WRITES_SECONDS: int = 5  # After a user's write, their reads stay on the primary this long
     
     # Redis
     REDIS_HOST: str = "localhost"
@@ -25,6 +27,18 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Key rotation: {"kid": "secret", ...}; tokens name their key in the kid header.
+    # Add the new key, switch JWT_ACTIVE_KID, and drop the old key once its tokens expire.
+    JWT_SIGNING_KEYS: Dict[str, str] = {}  # Empty: sign and verify with SECRET_KEY
+    JWT_ACTIVE_KID: str = ""  # Key used to sign new tokens (default: first key)
+    JWT_VERIFY_CACHE_SIZE: int = 10000
+    JWT_VERIFY_CACHE_SECONDS: int = 30  # Also bounds how long a revocation takes to reach other processes
+    
+    # Password hashing (Argon2id); hashes with other parameters are upgraded on login
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 4  # Threads hashing concurrently (each uses ARGON2_MEMORY_COST)
     
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:8100", "http://localhost:3000"]
@@ -42,6 +56,29 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
     
+    # Partitioned tables (activities, notifications) - monthly range partitions
+    PARTITION_PRECREATE_MONTHS: int = 3  # Future partitions kept ready ahead of time
+    ACTIVITY_RETENTION_MONTHS: int = 12
+    NOTIFICATION_RETENTION_MONTHS: int = 6
+    PARTITION_ARCHIVE_EXPIRED: bool = True  # Move expired partitions to the archive schema instead of dropping
+    ACTIVITY_FEED_WINDOW_DAYS: int = 90  # Global feed only reads recent (hot) partitions
+    
+    # Server push (SSE streams fed by Redis pub/sub)
+    STREAM_KEEPALIVE_SECONDS: int = 15  # Comment ping interval so proxies keep idle streams open
+    STREAM_QUEUE_SIZE: int = 100  # Pending events per connection; a slow client loses the oldest
+    MARKET_ODDS_TICK_SECONDS: float = 1.0  # Minimum interval between odds updates per market stream
+    
+    # Authenticated-user cache (auth flags checked on every request)
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60  # Redis copy; invalidated on ban, freeze and profile changes
+    AUTH_USER_LOCAL_TTL_SECONDS: int = 5  # Per-process copy; bounds staleness on other processes
+    AUTH_USER_LOCAL_CACHE_SIZE: int = 10000
+    
+    # Uploaded images (resized variants written by a worker process pool)
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_VARIANT_FORMAT: str = "webp"  # webp or jpeg
+    IMAGE_MAX_PIXELS: int = 50_000_000  # Larger images are rejected (decompression bombs)
+    IMAGE_GC_GRACE_HOURS: int = 24  # Unreferenced uploads younger than this are kept
+    
     # Email (optional)
     SMTP_HOST: str = ""
     SMTP_PORT: int = 587
@@ -1,32 +1,240 @@
 """
 Database configuration and session management
+
+Writes go to the primary (DATABASE_URL). Read-only endpoints can use
+get_read_db, which reads from a replica (DATABASE_REPLICA_URLS) unless the
+caller has written within the read-your-writes window.
 """
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Delete, Insert, Update
+from sqlalchemy.sql.elements import TextClause
 
 from app.config import settings
+from app.utils.cache import redis_client
+
+POOL_SIZE = 10
+MAX_OVERFLOW = 20
 
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
 )
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read replicas (each with its own pool); add URLs to scale reads
+replica_engines = [
+    create_engine(url, pool_pre_ping=True, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW)
+    for url in settings.DATABASE_REPLICA_URLS
+]
+_replica_cycle = itertools.cycle(replica_engines)
+
+
+def is_write_statement(clause) -> bool:
+    """
+    Whether a statement may write: INSERT/UPDATE/DELETE constructs, and raw
+    text() unless marked read-only with .execution_options(read_only=True)
+    """
+    if isinstance(clause, (Insert, Update, Delete)):
+        return True
+    if isinstance(clause, TextClause):
+        return not clause.get_execution_options().get("read_only", False)
+    return False
+
+
+class RoutingSession(Session):
+    """
+    Session that can read from a replica while writing to the primary
+    
+    With use_replica=True the session pins one replica (round robin) for
+    its reads. Flushes and write statements (is_write_statement) go to the
+    primary, and so does everything after the first write, so a session
+    always reads its own writes.
+    """
+    
+    def __init__(self, *args, use_replica: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = next(_replica_cycle) if use_replica and replica_engines else None
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.replica is not None:
+            if self._flushing or is_write_statement(clause):
+                self.replica = None
+            else:
+                return self.replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+# Create session factories
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, use_replica=True)
 
 # Base class for models
 Base = declarative_base()
 
+# Sessions handed out by get_db during the current request (see DBSessionReleaseMiddleware)
+request_sessions: ContextVar[Optional[List[Session]]] = ContextVar("request_sessions", default=None)
 
-def get_db():
-    """Dependency for getting database session"""
-    db = SessionLocal()
+
+def _recent_write_key(user_id: str) -> str:
+    return f"db:recent_write:{user_id}"
+
+
+def mark_recent_write(user_id: str) -> None:
+    """Keep a user's reads on the primary for READ_YOUR_WRITES_SECONDS"""
+    try:
+        redis_client.setex(_recent_write_key(user_id), settings.READ_YOUR_WRITES_SECONDS, 1)
+    except Exception:
+        pass
+
+
+def has_recent_write(user_id: str) -> bool:
+    """True if the user wrote within the window (or Redis cannot tell)"""
+    try:
+        return bool(redis_client.exists(_recent_write_key(user_id)))
+    except Exception:
+        return True
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_flush_writes(session: Session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_statement_writes(orm_execute_state) -> None:
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+        or is_write_statement(orm_execute_state.statement)
+    ):
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_user_writes_after_commit(session: Session) -> None:
+    # user_id is set by the auth dependencies on the request session
+    wrote = session.info.pop("has_writes", False)
+    user_id = session.info.get("user_id")
+    if wrote and user_id and replica_engines:
+        mark_recent_write(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_write_flag(session: Session) -> None:
+    session.info.pop("has_writes", None)
+
+
+class PoolStats:
+    """Connection pool usage, updated by pool checkout/checkin events"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkouts = 0
+        self.saturated = 0  # Checkouts that took the last free connection
+        self.total_hold_seconds = 0.0
+        self.max_hold_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def checked_out(self, connection_record) -> None:
+        connection_record.info["checked_out_at"] = time.monotonic()
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            if self.in_use >= self.capacity:
+                self.saturated += 1
+
+    def checked_in(self, connection_record) -> None:
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        held = time.monotonic() - checked_out_at
+        with self._lock:
+            self.in_use -= 1
+            self.total_hold_seconds += held
+            self.max_hold_seconds = max(self.max_hold_seconds, held)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "saturated_checkouts": self.saturated,
+                "avg_hold_ms": round(self.total_hold_seconds / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                "max_hold_ms": round(self.max_hold_seconds * 1000, 2),
+            }
+
+
+def _instrument(target_engine) -> PoolStats:
+    stats = PoolStats(capacity=POOL_SIZE + MAX_OVERFLOW)
+    event.listen(
+        target_engine, "checkout",
+        lambda dbapi_connection, connection_record, connection_proxy: stats.checked_out(connection_record),
+    )
+    event.listen(
+        target_engine, "checkin",
+        lambda dbapi_connection, connection_record: stats.checked_in(connection_record),
+    )
+    return stats
+
+
+pool_stats = _instrument(engine)
+replica_pool_stats = [_instrument(replica) for replica in replica_engines]
+
+
+def _pool_status(target_engine, stats: PoolStats) -> Dict:
+    status = stats.snapshot()
+    status.update({
+        "pool_size": target_engine.pool.size(),
+        "idle": target_engine.pool.checkedin(),
+        "overflow": target_engine.pool.overflow(),
+    })
+    return status
+
+
+def get_pool_status() -> Dict:
+    """Pool usage counters plus each pool's own view (idle and overflow connections)"""
+    status = _pool_status(engine, pool_stats)
+    status["replicas"] = [
+        _pool_status(replica, stats) for replica, stats in zip(replica_engines, replica_pool_stats)
+    ]
+    return status
+
+
+def open_request_session(session_factory=SessionLocal):
+    """
+    Yield a request-scoped session from `session_factory`
+    
+    The session is lazy: it checks a connection out of the pool only when it
+    first runs a query, so requests served from cache or rejected early never
+    take one. The connection goes back to the pool when the response starts
+    (DBSessionReleaseMiddleware), not after the body has been sent.
+    """
+    db = session_factory()
+    sessions = request_sessions.get()
+    if sessions is not None:
+        sessions.append(db)
     try:
         yield db
     finally:
         db.close()
 
+
+def get_db():
+    """Dependency for getting database session (primary)"""
+    yield from open_request_session(SessionLocal)
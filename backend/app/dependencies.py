@@ -3,13 +3,14 @@ Shared dependencies
 """
 import uuid
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import ReadSessionLocal, SessionLocal, get_db, has_recent_write, open_request_session, replica_engines
 from app.utils.security import decode_token
 from app.models.user import User
+from app.services.user_cache_service import attach_user, get_auth_fields
 
 security = HTTPBearer()
 security_optional = HTTPBearer(auto_error=False)
@@ -17,9 +18,8 @@ security_optional = HTTPBearer(auto_error=False)
 
 def get_current_user_id(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
 ) -> str:
-    """Get current user ID from JWT token"""
+    """Get current user ID from JWT token (no database access)"""
     token = credentials.credentials
     payload = decode_token(token)
     
@@ -39,12 +39,10 @@ def get_current_user_id(
     return user_id
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current user object from JWT token"""
-    token = credentials.credentials
+def get_stream_user_id(
+    token: str = Query(..., description="Access token (EventSource cannot send an Authorization header)")
+) -> str:
+    """Get current user ID from a JWT passed as a query parameter (event streams)"""
     payload = decode_token(token)
     
     if not payload or payload.get("type") != "access":
@@ -60,26 +58,95 @@ def get_current_user(
             detail="Invalid token payload",
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    # Short-lived session: an open stream must not hold a pooled connection
+    db = SessionLocal()
+    try:
+        fields = get_auth_fields(db, user_id)
+    finally:
+        db.close()
+    check_auth_fields(fields)
+    
+    return user_id
+
+
+def is_user_allowed(user_id: str) -> bool:
+    """Whether a user still exists and is active and not banned (for open streams)"""
+    db = SessionLocal()
+    try:
+        fields = get_auth_fields(db, user_id)
+    finally:
+        db.close()
+    return bool(fields) and fields["is_active"] and not fields["is_banned"]
+
+
+def check_auth_fields(fields: Optional[dict]) -> None:
+    """Reject missing, inactive and banned users (cached auth fields)"""
+    if not fields:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
     
-    if not user.is_active:
+    if not fields["is_active"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive",
         )
     
-    if user.is_banned:
+    if fields["is_banned"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is banned",
         )
+
+
+def get_read_db(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security_optional),
+):
+    """
+    Database session for read-only endpoints
     
-    return user
+    Reads go to a replica, except for users who wrote within the last
+    READ_YOUR_WRITES_SECONDS (their reads stay on the primary so they see
+    their own changes). Without replicas this is the primary session.
+    """
+    use_replica = bool(replica_engines)
+    if use_replica and credentials:
+        payload = decode_token(credentials.credentials)
+        user_id = payload.get("sub") if payload else None
+        if user_id and has_recent_write(user_id):
+            use_replica = False
+    yield from open_request_session(ReadSessionLocal if use_replica else SessionLocal)
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current user object from JWT token"""
+    token = credentials.credentials
+    payload = decode_token(token)
+    
+    if not payload or payload.get("type") != "access":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+    
+    user_id = payload.get("sub")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload",
+        )
+    
+    # Auth flags come from the user cache; other attributes load on first access
+    fields = get_auth_fields(db, user_id)
+    check_auth_fields(fields)
+    
+    # Commits on this session start the user's read-your-writes window
+    db.info["user_id"] = user_id
+    return attach_user(db, user_id, fields)
 
 
 def get_current_user_optional(
@@ -100,11 +167,13 @@ def get_current_user_optional(
     if not user_id:
         return None
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user or not user.is_active:
+    fields = get_auth_fields(db, user_id)
+    if not fields or not fields["is_active"]:
         return None
     
-    return user
+    # Commits on this session start the user's read-your-writes window
+    db.info["user_id"] = user_id
+    return attach_user(db, user_id, fields)
 
 
 def require_admin(user: User = Depends(get_current_user)) -> User:
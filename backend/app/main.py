@@ -3,15 +3,20 @@ FastAPI application entry point
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 import os
 
 from app.config import settings
 from app.database import engine, Base
+from app.static_files import UploadStaticFiles
+from app.utils.responses import FastJSONResponse
 from app.api.v1 import auth, markets, forecasts, purchases, users, leaderboard, admin, resolutions, notifications, activity, comments
-from app.middleware import RateLimitMiddleware, SecurityHeadersMiddleware
+from app.middleware import (
+    RateLimitMiddleware,
+    SecurityHeadersMiddleware,
+    SelectiveGZipMiddleware,
+    DBSessionReleaseMiddleware,
+)
 
 # Import models to register them with SQLAlchemy
 from app.models import User, Comment  # noqa
@@ -25,6 +30,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    default_response_class=FastJSONResponse,
 )
 
 # CORS middleware
@@ -36,8 +42,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# GZip compression middleware (compress responses > 1000 bytes)
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# GZip compression middleware (compress responses > 1000 bytes; event streams and images are sent as-is)
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1000)
 
 # Security headers middleware
 app.add_middleware(SecurityHeadersMiddleware)
@@ -45,6 +51,9 @@ app.add_middleware(SecurityHeadersMiddleware)
 # Rate limiting middleware
 app.add_middleware(RateLimitMiddleware)
 
+# Return pooled DB connections when the response starts (outermost, wraps every layer above)
+app.add_middleware(DBSessionReleaseMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
@@ -58,9 +67,16 @@ app.include_router(activity.router, prefix="/api/v1/activity", tags=["activity"]
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 app.include_router(comments.router, prefix="/api/v1", tags=["comments"])
 
-# Serve uploaded files
+# Serve uploaded files (cacheable for a year, with conditional and range requests)
 if os.path.exists("uploads"):
-    app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+    app.mount("/uploads", UploadStaticFiles(directory="uploads"), name="uploads")
+
+
+@app.on_event("shutdown")
+async def close_realtime_broker():
+    """Release the shared pub/sub connection used by event streams"""
+    from app.services.realtime_service import broker
+    await broker.close()
 
 
 @app.get("/")
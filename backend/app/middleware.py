@@ -1,114 +1,215 @@
 """
 Custom middleware
 """
-from fastapi import Request, status
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
 from typing import Optional
 
+from app.database import request_sessions
 from app.utils.cache import redis_client
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware with per-endpoint limits"""
+# Rate limits per endpoint (requests per minute)
+RATE_LIMITS = {
+    "/api/v1/auth/register": 5,
+    "/api/v1/auth/login": 10,
+    "/api/v1/auth/forgot-password": 3,
+    "/api/v1/auth/reset-password": 5,
+    "/api/v1/auth/refresh": 20,
+    "default": 60,  # Default rate limit
+}
+
+# Paths never rate limited (health checks and docs)
+RATE_LIMIT_EXEMPT_PATHS = frozenset(["/health", "/", "/api/docs", "/api/redoc", "/openapi.json"])
+
+
+def is_rate_limited(client_ip: str, path: str) -> bool:
+    """
+    Count a request against its per-IP, per-path limit
     
-    # Rate limits per endpoint (requests per minute)
-    RATE_LIMITS = {
-        "/api/v1/auth/register": 5,
-        "/api/v1/auth/login": 10,
-        "/api/v1/auth/forgot-password": 3,
-        "/api/v1/auth/reset-password": 5,
-        "/api/v1/auth/refresh": 20,
-        "default": 60,  # Default rate limit
-    }
+    Returns:
+        True if the limit was already reached (the request is not counted)
+    """
+    # Determine rate limit for this endpoint
+    rate_limit = RATE_LIMITS["default"]
+    for endpoint, limit in RATE_LIMITS.items():
+        if endpoint != "default" and path.startswith(endpoint):
+            rate_limit = limit
+            break
     
-    async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting for health checks and docs
-        if request.url.path in ["/health", "/", "/api/docs", "/api/redoc", "/openapi.json"]:
-            response = await call_next(request)
-            return response
-        
-        client_ip = request.client.host if request.client else "unknown"
-        path = request.url.path
-        
-        # Determine rate limit for this endpoint
-        rate_limit = self.RATE_LIMITS.get("default")
-        for endpoint, limit in self.RATE_LIMITS.items():
-            if endpoint != "default" and path.startswith(endpoint):
-                rate_limit = limit
-                break
-        
-        rate_limit_key = f"ratelimit:ip:{client_ip}:{path}"
-        
-        try:
-            # Check rate limit
-            current = redis_client.get(rate_limit_key)
-            if current and int(current) >= rate_limit:
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={
-                        "success": False,
-                        "data": None,
-                        "errors": [{"message": "Rate limit exceeded. Please try again later."}],
-                    },
-                )
-            
-            # Increment counter
-            redis_client.incr(rate_limit_key)
-            redis_client.expire(rate_limit_key, 60)
-        except Exception:
-            # If Redis is unavailable, allow request through (fail open)
-            # In production, you might want to fail closed
-            pass
+    rate_limit_key = f"ratelimit:ip:{client_ip}:{path}"
+    
+    try:
+        current = redis_client.get(rate_limit_key)
+        if current and int(current) >= rate_limit:
+            return True
         
-        response = await call_next(request)
-        return response
+        # Increment counter
+        redis_client.incr(rate_limit_key)
+        redis_client.expire(rate_limit_key, 60)
+    except Exception:
+        # If Redis is unavailable, allow request through (fail open)
+        # In production, you might want to fail closed
+        pass
+    return False
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to all responses"""
+class RateLimitMiddleware:
+    """Rate limiting middleware with per-endpoint limits
     
-    async def dispatch(self, request: Request, call_next):
-        # Skip security headers for OPTIONS requests (CORS preflight)
-        # These should be handled by CORS middleware only
-        if request.method == "OPTIONS":
-            response = await call_next(request)
-            return response
+    Pure ASGI: allowed requests are passed through untouched, so responses
+    (including streams) are not wrapped per request.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in RATE_LIMIT_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
         
-        response = await call_next(request)
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        if is_rate_limited(client_ip, scope["path"]):
+            response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={
+                    "success": False,
+                    "data": None,
+                    "errors": [{"message": "Rate limit exceeded. Please try again later."}],
+                },
+            )
+            await response(scope, receive, send)
+            return
         
-        # Skip security headers for API endpoints (they're for HTML pages)
-        # Only apply to non-API paths (like static files or HTML pages)
-        path = request.url.path
+        await self.app(scope, receive, send)
+
+
+# Content Security Policy - only for HTML pages
+# Allow connections to localhost for development and same origin + https for production
+CONTENT_SECURITY_POLICY = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "  # unsafe-inline/eval for Ionic
+    "style-src 'self' 'unsafe-inline'; "  # unsafe-inline for TailwindCSS
+    "img-src 'self' data: https:; "
+    "font-src 'self' data:; "
+    "connect-src 'self' http://localhost:* https: ws: wss:; "  # Allow localhost for dev, https for prod
+    "frame-ancestors 'none';"
+)
+
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+    "Content-Security-Policy": CONTENT_SECURITY_POLICY,
+    # Strict Transport Security (only in production with HTTPS)
+    # "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+}
+
+
+class SecurityHeadersMiddleware:
+    """Add security headers to non-API responses
+    
+    Pure ASGI: headers are added to the response start message as it is sent,
+    so bodies are never buffered.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Fast path: API and upload responses, and OPTIONS requests (CORS
+        # preflight, handled by CORS middleware only), are passed through as-is.
+        # Security headers are meant for HTML pages and can interfere with CORS.
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"].startswith(("/api/", "/uploads/"))
+        ):
+            await self.app(scope, receive, send)
+            return
         
-        # Don't apply security headers to API responses - they can interfere with CORS
-        # Security headers are meant for HTML pages, not JSON API responses
-        if path.startswith("/api/") or path.startswith("/uploads/"):
-            return response
+        async def send_with_headers(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in SECURITY_HEADERS.items():
+                    headers[name] = value
+            await send(message)
         
-        # Apply security headers only to non-API responses (HTML pages, static files)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+        await self.app(scope, receive, send_with_headers)
+
+
+# Response types that are already compressed; gzip would only burn CPU
+INCOMPRESSIBLE_CONTENT_TYPES = ("image/", "video/", "audio/", "font/woff", "application/zip", "application/gzip")
+
+
+class _SelectiveGZipResponder(GZipResponder):
+    """GZipResponder that passes compressed media and partial content through"""
+    
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if message["status"] == 206 or headers.get("content-type", "").startswith(INCOMPRESSIBLE_CONTENT_TYPES):
+                # Treated like a response that already has a Content-Encoding:
+                # the body is sent unchanged
+                self.initial_message = message
+                self.content_encoding_set = True
+                return
+        await super().send_with_gzip(message)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip compression for responses that benefit from it
+    
+    Server-Sent Events streams are left uncompressed: the gzip compressor only
+    emits output once its buffer fills, which would hold push events back
+    instead of delivering them as they happen. Images and other compressed
+    media (INCOMPRESSIBLE_CONTENT_TYPES) and 206 partial responses are sent
+    as-is.
+    """
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            if "text/event-stream" not in headers.get("accept", "") and "gzip" in headers.get("accept-encoding", ""):
+                responder = _SelectiveGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class DBSessionReleaseMiddleware:
+    """Close request database sessions as soon as the response starts
+    
+    FastAPI closes yield dependencies only after the response body has been
+    sent, so a session would otherwise keep its pooled connection (and any
+    open transaction) while a slow client downloads the response.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Content Security Policy - only for HTML pages
-        # Allow connections to localhost for development and same origin + https for production
-        csp = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "  # unsafe-inline/eval for Ionic
-            "style-src 'self' 'unsafe-inline'; "  # unsafe-inline for TailwindCSS
-            "img-src 'self' data: https:; "
-            "font-src 'self' data:; "
-            "connect-src 'self' http://localhost:* https: ws: wss:; "  # Allow localhost for dev, https for prod
-            "frame-ancestors 'none';"
-        )
-        response.headers["Content-Security-Policy"] = csp
+        sessions = []
+        token = request_sessions.set(sessions)
         
-        # Strict Transport Security (only in production with HTTPS)
-        # response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        async def send_releasing_sessions(message) -> None:
+            if message["type"] == "http.response.start":
+                while sessions:
+                    sessions.pop().close()
+            await send(message)
         
-        return response
-
+        try:
+            await self.app(scope, receive, send_releasing_sessions)
+        finally:
+            request_sessions.reset(token)
@@ -6,7 +6,9 @@ from app.models.forecast import Forecast
 from app.models.resolution import Resolution
 from app.models.reputation_history import ReputationHistory
 from app.models.activity import Activity
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationPayload
 from app.models.comment import Comment
+from app.models.chip_ledger import ChipLedgerEntry, ChipBalanceSnapshot
+from app.models.stored_image import StoredImage, ImageReference
 
-__all__ = ["User", "Market", "Outcome", "Purchase", "Forecast", "Resolution", "ReputationHistory", "Activity", "Notification", "Comment"]
+__all__ = ["User", "Market", "Outcome", "Purchase", "Forecast", "Resolution", "ReputationHistory", "Activity", "Notification", "NotificationPayload", "Comment", "ChipLedgerEntry", "ChipBalanceSnapshot", "StoredImage", "ImageReference"]
@@ -18,10 +18,12 @@ class Activity(Base):
     user_id = Column(String, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
     activity_type = Column(String, nullable=False, index=True)  # forecast_placed, market_resolved, badge_earned, market_created, user_registered
     market_id = Column(String, ForeignKey("markets.id", ondelete="SET NULL"), nullable=True, index=True)
+    market_category = Column(String, nullable=True)  # Denormalized from markets.category for category-filtered feeds
     meta_data = Column(JSONB, nullable=True, default=dict)  # Flexible data storage (renamed from metadata - SQLAlchemy reserved)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    # Part of the primary key: the table is range-partitioned by created_at (monthly)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, nullable=False, index=True)
     
     # Relationships
     user = relationship("User", backref="activities")
@@ -33,5 +35,7 @@ class Activity(Base):
         Index('idx_activities_global_created', 'created_at', postgresql_ops={'created_at': 'DESC'}, postgresql_where=(user_id.is_(None))),
         Index('idx_activities_market_created', 'market_id', 'created_at', postgresql_ops={'created_at': 'DESC'}, postgresql_where=(market_id.isnot(None))),
         Index('idx_activities_type_created', 'activity_type', 'created_at', postgresql_ops={'created_at': 'DESC'}),
+        Index('idx_activities_category_created', 'market_category', 'created_at', postgresql_ops={'created_at': 'DESC'}, postgresql_where=(market_category.isnot(None))),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
 
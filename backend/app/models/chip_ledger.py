@@ -0,0 +1,52 @@
+"""
+Chip ledger models
+"""
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class ChipLedgerEntry(Base):
+    """Chip ledger - append-only journal of every chip balance change"""
+    __tablename__ = "chip_ledger"
+
+    # Monotonic id: snapshots record the last entry they include
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    entry_type = Column(String, nullable=False)  # opening_balance, purchase, forecast, forecast_update, payout
+    amount = Column(Integer, nullable=False)  # Signed: credits positive, debits negative
+    balance_after = Column(Integer, nullable=False)  # User balance right after this entry
+    reference_id = Column(String, nullable=True)  # Purchase, forecast or market ID
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relationships
+    user = relationship("User", backref="chip_ledger_entries")
+
+    __table_args__ = (
+        # User history / balance-at-time scans
+        Index('idx_chip_ledger_user_id', 'user_id', 'id'),
+        # Revenue and payout aggregates by type over time
+        Index('idx_chip_ledger_type_created', 'entry_type', 'created_at'),
+    )
+
+
+class ChipBalanceSnapshot(Base):
+    """Periodic per-user balance checkpoint, as of a ledger entry"""
+    __tablename__ = "chip_balance_snapshots"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    balance = Column(Integer, nullable=False)
+    ledger_entry_id = Column(BigInteger, nullable=False)  # Last ledger entry included in the balance
+
+    # Timestamps
+    taken_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_chip_balance_snapshots_user_entry', 'user_id', 'ledger_entry_id'),
+        Index('idx_chip_balance_snapshots_user_taken', 'user_id', 'taken_at'),
+    )
@@ -1,7 +1,7 @@
 """
 Notification model
 """
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import JSONB
@@ -16,16 +16,25 @@ class Notification(Base):
 
     id = Column(String, primary_key=True, index=True)
     user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    type = Column(String, nullable=False, index=True)  # market_resolved, badge_earned, new_market, forecast_reminder
-    message = Column(Text, nullable=False)
+    type = Column(String, nullable=False, index=True)  # market_resolved, badge_earned, new_market, forecast_reminder, forecast_won, forecast_lost
+    message = Column(Text, nullable=True)  # NULL for templated notifications (rendered at read time)
     read = Column(Boolean, default=False, nullable=False)
     meta_data = Column(JSONB, nullable=True, default=dict)  # Flexible data storage (renamed from metadata - SQLAlchemy reserved)
     
+    # Templated notifications: type is the template key, shared data lives in the
+    # payload, and only per-user numbers are stored on the row
+    payload_id = Column(String, ForeignKey("notification_payloads.id", ondelete="CASCADE"), nullable=True)
+    forecast_points = Column(Integer, nullable=True)
+    chips_amount = Column(Integer, nullable=True)  # Chips gained (won) or lost (lost)
+    reward_amount = Column(Integer, nullable=True)
+    
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    # Part of the primary key: the table is range-partitioned by created_at (monthly)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, nullable=False, index=True)
     
     # Relationships
     user = relationship("User", backref="notifications")
+    payload = relationship("NotificationPayload")
     
     # Optimized indexes for performance
     __table_args__ = (
@@ -35,5 +44,18 @@ class Notification(Base):
         Index('idx_notifications_user_all', 'user_id', 'created_at', postgresql_ops={'created_at': 'DESC'}),
         # Type filtering
         Index('idx_notifications_type', 'type'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
 
+
+
+class NotificationPayload(Base):
+    """Shared data for templated notifications (e.g. one row per market resolution)"""
+    __tablename__ = "notification_payloads"
+
+    id = Column(String, primary_key=True, index=True)
+    market_id = Column(String, ForeignKey("markets.id", ondelete="CASCADE"), nullable=True, index=True)
+    data = Column(JSONB, nullable=False, default=dict)  # market_id, market_title, winning_outcome
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,40 @@
+"""
+Stored image models
+"""
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class StoredImage(Base):
+    """Uploaded image stored by content hash (SHA-256 of the uploaded bytes)"""
+    __tablename__ = "stored_images"
+
+    content_hash = Column(String(64), primary_key=True)
+    byte_size = Column(BigInteger, nullable=False)  # Size of the original upload
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_uploaded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Protects fresh uploads from GC
+
+    __table_args__ = (
+        # Garbage collection scans for old uploads
+        Index('idx_stored_images_last_uploaded_at', 'last_uploaded_at'),
+    )
+
+
+class ImageReference(Base):
+    """A market or user showing a stored image (one image per owner)"""
+    __tablename__ = "image_references"
+
+    owner_type = Column(String, primary_key=True)  # market, user
+    owner_id = Column(String, primary_key=True)
+    content_hash = Column(String(64), ForeignKey("stored_images.content_hash"), nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_image_references_content_hash', 'content_hash'),
+    )
@@ -2,14 +2,22 @@
 Activity service
 """
 import uuid
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func, desc
+from sqlalchemy import and_, func, desc, event, insert
 
 from app.models.activity import Activity
 from app.models.user import User
 from app.models.market import Market
-from app.utils.cache import get_cache, set_cache, delete_cache_pattern
+from app.config import settings
+from app.schemas.activity import ActivityDetailResponse
+from app.utils.cache import get_cache, set_cache, delete_cache_pattern, increment_cache
+
+# Global feed pages are cached fully serialized, keyed by a version counter that
+# is bumped after every commit that adds an activity (old pages simply expire)
+GLOBAL_FEED_VERSION_KEY = "activity:global:version"
+GLOBAL_FEED_CACHE_TTL = 300  # 5 minutes
 
 
 def create_activity(
@@ -17,7 +25,8 @@ def create_activity(
     activity_type: str,
     user_id: Optional[str] = None,
     market_id: Optional[str] = None,
-    metadata: Optional[Dict] = None
+    metadata: Optional[Dict] = None,
+    market_category: Optional[str] = None
 ) -> Activity:
     """
     Create an activity record
@@ -28,27 +37,124 @@ def create_activity(
         user_id: User ID (None for system/global activities)
         market_id: Market ID (if applicable)
         metadata: Additional data (JSON)
+        market_category: Category of the market (looked up if omitted)
     
     Returns:
         Created Activity object
     """
+    if market_id and market_category is None:
+        market_category = db.query(Market.category).filter(Market.id == market_id).scalar()
+    
     activity = Activity(
         id=str(uuid.uuid4()),
         user_id=user_id,
         activity_type=activity_type,
         market_id=market_id,
+        market_category=market_category,
         meta_data=metadata or {}
     )
     db.add(activity)
     
-    # Invalidate global activity cache
-    delete_cache_pattern("activity:global:*")
+    # Invalidate global activity cache once the activity is committed
+    db.info["global_feed_dirty"] = True
     if user_id:
         delete_cache_pattern(f"activity:feed:{user_id}:*")
     
     return activity
 
 
+def create_activities(db: Session, activities: List[Dict]) -> None:
+    """
+    Insert many activity records in one multi-row INSERT
+    
+    Args:
+        db: Database session
+        activities: Dicts with activity_type and optionally user_id,
+            market_id, market_category and metadata (as for create_activity;
+            market_category is not looked up)
+    """
+    if not activities:
+        return
+    
+    db.execute(
+        insert(Activity),
+        [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": activity.get("user_id"),
+                "activity_type": activity["activity_type"],
+                "market_id": activity.get("market_id"),
+                "market_category": activity.get("market_category"),
+                "meta_data": activity.get("metadata") or {},
+            }
+            for activity in activities
+        ],
+    )
+    
+    db.info["global_feed_dirty"] = True
+    for user_id in {activity.get("user_id") for activity in activities}:
+        if user_id:
+            delete_cache_pattern(f"activity:feed:{user_id}:*")
+
+
+def invalidate_global_activity_cache() -> None:
+    """Invalidate all cached global feed pages (O(1) version bump)"""
+    increment_cache(GLOBAL_FEED_VERSION_KEY)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_global_feed_after_commit(session: Session) -> None:
+    if session.info.pop("global_feed_dirty", False):
+        invalidate_global_activity_cache()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_global_feed_flag(session: Session) -> None:
+    session.info.pop("global_feed_dirty", None)
+
+
+def get_feed_window_start() -> datetime:
+    """
+    Oldest created_at shown in activity feeds
+    
+    activities is partitioned by month, so bounding feeds by created_at lets
+    Postgres prune everything but the recent (hot) partitions.
+    """
+    return datetime.now(timezone.utc) - timedelta(days=settings.ACTIVITY_FEED_WINDOW_DAYS)
+
+
+def get_retention_window_start() -> datetime:
+    """
+    Oldest created_at still retained (start of the oldest kept partition)
+    
+    Bounds per-user and per-market history: unlike the global feed, these
+    show everything that is kept, while still skipping expired partitions.
+    """
+    from app.services.partition_service import add_months, month_start
+    
+    oldest = add_months(month_start(datetime.now(timezone.utc).date()), -settings.ACTIVITY_RETENTION_MONTHS)
+    return datetime(oldest.year, oldest.month, 1, tzinfo=timezone.utc)
+
+
+def serialize_activity(activity: Activity) -> Dict:
+    """
+    Serialize an activity (with eagerly loaded user and market) to a JSON-ready dict
+    
+    Returns:
+        ActivityDetailResponse as a dict
+    """
+    return ActivityDetailResponse(
+        id=activity.id,
+        user_id=activity.user_id,
+        activity_type=activity.activity_type,
+        market_id=activity.market_id,
+        meta_data=activity.meta_data or {},
+        created_at=activity.created_at,
+        user_display_name=activity.user.display_name if activity.user else None,
+        market_title=activity.market.title if activity.market else None,
+    ).model_dump(mode="json")
+
+
 def get_user_activity_feed(
     db: Session,
     user_id: str,
@@ -73,7 +179,8 @@ def get_user_activity_feed(
         joinedload(Activity.user),
         joinedload(Activity.market)
     ).filter(
-        (Activity.user_id == user_id) | (Activity.user_id.is_(None))
+        (Activity.user_id == user_id) | (Activity.user_id.is_(None)),
+        Activity.created_at >= get_retention_window_start(),
     )
     
     if activity_type:
@@ -103,36 +210,36 @@ def get_global_activity_feed(
     activity_type: Optional[str] = None,
     category: Optional[str] = None,
     use_cache: bool = True
-) -> tuple[List[Activity], int]:
+) -> tuple[List[Dict], int]:
     """
     Get global activity feed (public)
     
-    Optimized with eager loading and efficient category filtering.
+    Pages are cached fully serialized per type/category, so a cache hit costs
+    two Redis GETs and no database work. Category filtering uses the
+    denormalized Activity.market_category column instead of a market ID list.
     
     Returns:
-        Tuple of (activities list, total count)
+        Tuple of (serialized activities list, total count)
     """
+    cache_key = None
+    if use_cache:
+        version = get_cache(GLOBAL_FEED_VERSION_KEY) or 0
+        cache_key = f"activity:global:v{version}:{activity_type or 'all'}:{category or 'all'}:{page}:{limit}"
+        cached = get_cache(cache_key)
+        if cached is not None:
+            return cached["activities"], cached["total"]
+    
     # Query global activities with eager loading to avoid N+1 queries
-    # Use selectinload for better performance with many activities
     query = db.query(Activity).options(
         joinedload(Activity.user),
         joinedload(Activity.market)
-    )
+    ).filter(Activity.created_at >= get_feed_window_start())
     
     if activity_type:
         query = query.filter(Activity.activity_type == activity_type)
     
-    # If category filter, use subquery for better performance
-    # This avoids full table scan when joining
     if category:
-        # Get market IDs for this category first (more efficient)
-        market_ids = db.query(Market.id).filter(Market.category == category).all()
-        market_id_list = [m[0] for m in market_ids]
-        if market_id_list:
-            query = query.filter(Activity.market_id.in_(market_id_list))
-        else:
-            # No markets in this category, return empty result
-            return [], 0
+        query = query.filter(Activity.market_category == category)
     
     # Get total count
     # For very large datasets, consider using estimated count or materialized views
@@ -141,9 +248,9 @@ def get_global_activity_feed(
     # Apply pagination with eager loading
     offset = (page - 1) * limit
     activities = query.order_by(desc(Activity.created_at)).offset(offset).limit(limit).all()
+    serialized = [serialize_activity(activity) for activity in activities]
     
-    # Note: Caching Activity objects directly is complex due to SQLAlchemy serialization
-    # For now, we'll rely on database query optimization and eager loading
-    # Future optimization: Serialize to dict before caching
-    return (activities, total)
-
+    if cache_key:
+        set_cache(cache_key, {"activities": serialized, "total": total}, ttl=GLOBAL_FEED_CACHE_TTL)
+    
+    return (serialized, total)
@@ -1,7 +1,7 @@
 """
 Badge system service
 """
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func, desc
@@ -140,10 +140,13 @@ def check_specialist_badge(db: Session, user_id: str, category: str) -> bool:
     return accuracy > 0.70
 
 
-def check_and_award_badges(db: Session, user_id: str) -> List[str]:
+def check_and_award_badges(db: Session, user_id: str, badge_ids: Optional[Iterable[str]] = None) -> List[str]:
     """
     Check all badge criteria and award eligible badges
     
+    Args:
+        badge_ids: Only check these badges (default: all, including specialist badges)
+    
     Returns:
         List of newly awarded badge IDs
     """
@@ -176,6 +179,13 @@ def check_and_award_badges(db: Session, user_id: str) -> List[str]:
         "perfect_week": check_perfect_week_badge,
     }
     
+    if badge_ids is not None:
+        badge_ids = set(badge_ids)
+        badge_checks = {
+            badge_id: check_func for badge_id, check_func in badge_checks.items()
+            if badge_id in badge_ids
+        }
+    
     for badge_id, check_func in badge_checks.items():
         if badge_id not in current_badges:
             if check_func(db, user_id):
@@ -186,6 +196,8 @@ def check_and_award_badges(db: Session, user_id: str) -> List[str]:
     categories = ['election', 'politics', 'sports', 'entertainment', 'economy', 'weather']
     for category in categories:
         badge_id = f"specialist_{category}"
+        if badge_ids is not None and badge_id not in badge_ids:
+            continue
         if badge_id not in current_badges:
             if check_specialist_badge(db, user_id, category):
                 current_badges.append(badge_id)
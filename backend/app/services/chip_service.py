@@ -0,0 +1,292 @@
+"""
+Chip balance service
+
+Balances are changed only with single conditional UPDATE ... RETURNING
+statements, so concurrent requests cannot overdraw or lose updates and no
+row is loaded (or locked) before it is written. Each balance change is
+journaled to the append-only chip_ledger by the same statement (the UPDATE
+runs as a CTE feeding the ledger INSERT), so the ledger cannot drift from
+users.chips.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, String, column, func, insert, literal, select, text, update, values
+from sqlalchemy.orm import Session
+
+from app.models.chip_ledger import ChipBalanceSnapshot, ChipLedgerEntry
+from app.models.purchase import Purchase
+from app.models.user import User
+
+PAYOUT_BATCH_SIZE = 5000
+SNAPSHOT_LAG = timedelta(minutes=5)
+
+_users = User.__table__
+_ledger = ChipLedgerEntry.__table__
+_purchases = Purchase.__table__
+
+
+def _journal(db: Session, changed, entry_type: str):
+    """
+    Insert ledger rows for the balance changes returned by `changed`
+
+    `changed` is an UPDATE ... RETURNING CTE yielding user_id, balance,
+    amount and reference_id; it runs in the same statement as the INSERT.
+    """
+    statement = insert(_ledger).from_select(
+        ["user_id", "entry_type", "amount", "balance_after", "reference_id"],
+        select(
+            changed.c.user_id,
+            literal(entry_type, String),
+            changed.c.amount,
+            changed.c.balance,
+            changed.c.reference_id,
+        ),
+    ).add_cte(changed).returning(_ledger.c.user_id, _ledger.c.balance_after)
+    return db.execute(statement)
+
+
+def debit_chips(
+    db: Session,
+    user_id: str,
+    amount: int,
+    entry_type: str = "forecast",
+    reference_id: Optional[str] = None
+) -> Optional[int]:
+    """
+    Debit chips only if the balance covers the amount
+
+    Returns:
+        New balance, or None if the user has insufficient chips
+    """
+    changed = (
+        update(_users)
+        .where(_users.c.id == user_id, _users.c.chips >= amount)
+        .values(chips=_users.c.chips - amount)
+        .returning(
+            _users.c.id.label("user_id"),
+            _users.c.chips.label("balance"),
+            literal(-amount, Integer).label("amount"),
+            literal(reference_id, String).label("reference_id"),
+        )
+        .cte("changed")
+    )
+    row = _journal(db, changed, entry_type).first()
+    return row.balance_after if row else None
+
+
+def credit_chips(
+    db: Session,
+    user_id: str,
+    amount: int,
+    entry_type: str = "purchase",
+    reference_id: Optional[str] = None
+) -> Optional[int]:
+    """
+    Credit chips to a user
+
+    Returns:
+        New balance, or None if the user does not exist
+    """
+    changed = (
+        update(_users)
+        .where(_users.c.id == user_id)
+        .values(chips=_users.c.chips + amount)
+        .returning(
+            _users.c.id.label("user_id"),
+            _users.c.chips.label("balance"),
+            literal(amount, Integer).label("amount"),
+            literal(reference_id, String).label("reference_id"),
+        )
+        .cte("changed")
+    )
+    row = _journal(db, changed, entry_type).first()
+    return row.balance_after if row else None
+
+
+def credit_purchase(db: Session, purchase_id: str) -> Optional[int]:
+    """
+    Complete a pending purchase and credit its chips
+
+    The pending -> completed transition is itself a conditional UPDATE, so
+    concurrent or redelivered payment webhooks credit a purchase only once.
+
+    Returns:
+        New balance, or None if the purchase was not pending (or the user no
+        longer exists - roll back in that case)
+    """
+    claimed = (
+        update(_purchases)
+        .where(_purchases.c.id == purchase_id, _purchases.c.status == "pending")
+        .values(status="completed")
+        .returning(_purchases.c.id, _purchases.c.user_id, _purchases.c.chips_added)
+        .cte("claimed")
+    )
+    changed = (
+        update(_users)
+        .where(_users.c.id == claimed.c.user_id)
+        .values(chips=_users.c.chips + claimed.c.chips_added)
+        .returning(
+            _users.c.id.label("user_id"),
+            _users.c.chips.label("balance"),
+            claimed.c.chips_added.label("amount"),
+            claimed.c.id.label("reference_id"),
+        )
+        .cte("changed")
+    )
+    row = _journal(db, changed, "purchase").first()
+    return row.balance_after if row else None
+
+
+def fail_purchase(db: Session, purchase_id: str):
+    """
+    Mark a pending purchase as failed
+
+    A conditional UPDATE, like credit_purchase: of concurrent or redelivered
+    failure webhooks only one sees the purchase change, so its reserved
+    quota is released once.
+
+    Returns:
+        Row with user_id, chips_added and created_at, or None if the
+        purchase was not pending
+    """
+    return db.execute(
+        update(_purchases)
+        .where(_purchases.c.id == purchase_id, _purchases.c.status == "pending")
+        .values(status="failed")
+        .returning(_purchases.c.user_id, _purchases.c.chips_added, _purchases.c.created_at)
+    ).first()
+
+
+def credit_chips_batch(
+    db: Session,
+    amounts: Dict[str, int],
+    entry_type: str = "payout",
+    reference_id: Optional[str] = None,
+    batch_size: int = PAYOUT_BATCH_SIZE
+) -> int:
+    """
+    Credit chips to many users (e.g. market payouts)
+
+    One UPDATE ... FROM (VALUES ...) statement per batch, journaled in the
+    same statement.
+
+    Args:
+        amounts: user_id -> chips to credit
+        reference_id: Stored on every ledger entry (e.g. the market ID)
+
+    Returns:
+        Total chips credited
+    """
+    total = 0
+    # Sorted so concurrent batches tend to lock user rows in the same order
+    user_ids = sorted(amounts)
+    for start in range(0, len(user_ids), batch_size):
+        batch = values(
+            column("user_id", String), column("amount", Integer), name="payouts"
+        ).data([(user_id, amounts[user_id]) for user_id in user_ids[start:start + batch_size]])
+        changed = (
+            update(_users)
+            .where(_users.c.id == batch.c.user_id)
+            .values(chips=_users.c.chips + batch.c.amount)
+            .returning(
+                _users.c.id.label("user_id"),
+                _users.c.chips.label("balance"),
+                batch.c.amount.label("amount"),
+                literal(reference_id, String).label("reference_id"),
+            )
+            .cte("changed")
+        )
+        credited = _journal(db, changed, entry_type).all()
+        total += sum(amounts[row.user_id] for row in credited)
+    return total
+
+
+def take_balance_snapshots(db: Session) -> int:
+    """
+    Checkpoint balances of users with ledger activity since the last snapshot
+
+    Each new snapshot is the user's previous snapshot plus the ledger entries
+    after it, up to a common cutoff entry. The cutoff trails the newest entry
+    by SNAPSHOT_LAG so ids allocated by still-open transactions are not
+    skipped.
+
+    Returns:
+        Number of snapshots written
+    """
+    cutoff = db.query(func.max(ChipLedgerEntry.id)).filter(
+        ChipLedgerEntry.created_at < func.now() - SNAPSHOT_LAG
+    ).scalar()
+    if cutoff is None:
+        return 0
+    previous_cutoff = db.query(func.max(ChipBalanceSnapshot.ledger_entry_id)).scalar() or 0
+    if cutoff <= previous_cutoff:
+        return 0
+
+    result = db.execute(
+        text("""
+            INSERT INTO chip_balance_snapshots (user_id, balance, ledger_entry_id, taken_at)
+            SELECT l.user_id, COALESCE(s.balance, 0) + SUM(l.amount), :cutoff, now()
+            FROM chip_ledger l
+            LEFT JOIN LATERAL (
+                SELECT balance FROM chip_balance_snapshots
+                WHERE user_id = l.user_id
+                ORDER BY ledger_entry_id DESC
+                LIMIT 1
+            ) s ON true
+            WHERE l.id > :previous_cutoff AND l.id <= :cutoff
+            GROUP BY l.user_id, s.balance
+        """),
+        {"cutoff": cutoff, "previous_cutoff": previous_cutoff},
+    )
+    db.commit()
+    return result.rowcount
+
+
+def get_balance_at(db: Session, user_id: str, at: datetime) -> int:
+    """
+    A user's chip balance at time `at`
+
+    Starts from the nearest snapshot taken at or before `at` and adds the
+    ledger entries after it (a short scan on idx_chip_ledger_user_id).
+    """
+    snapshot = db.query(ChipBalanceSnapshot).filter(
+        ChipBalanceSnapshot.user_id == user_id,
+        ChipBalanceSnapshot.taken_at <= at,
+    ).order_by(ChipBalanceSnapshot.taken_at.desc()).first()
+
+    balance = snapshot.balance if snapshot else 0
+    after_entry_id = snapshot.ledger_entry_id if snapshot else 0
+
+    delta = db.query(func.coalesce(func.sum(ChipLedgerEntry.amount), 0)).filter(
+        ChipLedgerEntry.user_id == user_id,
+        ChipLedgerEntry.id > after_entry_id,
+        ChipLedgerEntry.created_at <= at,
+    ).scalar()
+    return balance + delta
+
+
+def find_balance_mismatches(db: Session, limit: int = 100) -> List[Dict]:
+    """
+    Users whose balance differs from their latest ledger entry
+
+    Returns:
+        List of dicts with user_id, chips and ledger_balance
+    """
+    ledger_balance = func.coalesce(
+        select(ChipLedgerEntry.balance_after)
+        .where(ChipLedgerEntry.user_id == User.id)
+        .order_by(ChipLedgerEntry.id.desc())
+        .limit(1)
+        .correlate(User)
+        .scalar_subquery(),
+        0,
+    )
+    rows = db.query(User.id, User.chips, ledger_balance.label("ledger_balance")).filter(
+        User.chips != ledger_balance
+    ).limit(limit).all()
+
+    return [
+        {"user_id": row.id, "chips": row.chips, "ledger_balance": row.ledger_balance}
+        for row in rows
+    ]
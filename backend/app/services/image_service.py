@@ -0,0 +1,438 @@
+"""
+Image service (processing and storing uploaded market images and avatars)
+
+Uploads are decoded, oriented, stripped of metadata (EXIF including GPS, ICC
+profiles, comments) and re-encoded as resized variants in a worker process
+pool, so decoding and resizing never run on the event loop.
+
+Images are content addressed: variants are stored once per SHA-256 of the
+uploaded bytes, as `images/{hash[:2]}/{hash}_{variant}.{ext}` under uploads,
+so identical uploads share files and URLs. stored_images tracks each hash,
+image_references the markets and users showing it, and
+collect_orphaned_images() removes images nothing references.
+
+The stored URL is the `full` variant; responses swap in the variant they
+display with image_variant_url().
+"""
+import asyncio
+import glob
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import anyio
+from fastapi import UploadFile
+from sqlalchemy import delete, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.stored_image import ImageReference, StoredImage
+
+UPLOAD_ROOT = "uploads"
+IMAGE_UPLOAD_DIR = os.path.join(UPLOAD_ROOT, "images")
+os.makedirs(IMAGE_UPLOAD_DIR, exist_ok=True)
+
+# Longest edge in pixels per variant (images are never upscaled)
+IMAGE_VARIANTS = {
+    "full": 1600,  # market detail, profile page
+    "card": 480,  # market cards
+    "thumb": 160,  # avatars in lists and leaderboards
+}
+
+_FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+}
+
+_VARIANT_URL = re.compile(r"_(?:%s)\.(webp|jpg)$" % "|".join(IMAGE_VARIANTS))
+_STORED_IMAGE_URL = re.compile(
+    r"/uploads/images/[0-9a-f]{2}/([0-9a-f]{64})_(?:%s)\.(?:webp|jpg)$" % "|".join(IMAGE_VARIANTS)
+)
+
+_HEIC_BRANDS = (b"heic", b"heix", b"heim", b"heis", b"hevc", b"hevx")
+_HEIF_BRANDS = (b"mif1", b"msf1")
+
+# Uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+class InvalidImageError(ValueError):
+    """Upload could not be decoded as a supported image"""
+
+
+class UploadTooLargeError(ValueError):
+    """Upload is larger than the endpoint allows"""
+
+
+class ImageNotStoredError(ValueError):
+    """URL points at an uploaded image that is no longer stored"""
+
+    def __init__(self, url: str):
+        super().__init__(f"Image no longer exists: {url}")
+        self.url = url
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """MIME type of an image from its leading bytes (None if not recognised)"""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    # ISO base media file: size, "ftyp", major brand
+    if header[4:8] == b"ftyp":
+        brand = header[8:12]
+        if brand in _HEIC_BRANDS:
+            return "image/heic"
+        if brand in _HEIF_BRANDS:
+            return "image/heif"
+    return None
+
+
+def image_variant_url(url: Optional[str], variant: str) -> Optional[str]:
+    """
+    URL of another variant of a processed upload
+
+    URLs that are not processed uploads (external images, uploads from before
+    variants existed) are returned unchanged.
+    """
+    if not url:
+        return url
+    return _VARIANT_URL.sub(lambda match: f"_{variant}.{match.group(1)}", url)
+
+
+def stored_image_hash(url: Optional[str]) -> Optional[str]:
+    """Content hash of a stored image URL (None for any other URL)"""
+    match = _STORED_IMAGE_URL.search(url or "")
+    return match.group(1) if match else None
+
+
+def stored_image_paths(content_hash: str) -> Dict[str, str]:
+    """Variant paths of a stored image, relative to the uploads directory"""
+    extension = _FORMATS[settings.IMAGE_VARIANT_FORMAT][1]
+    return {
+        variant: f"images/{content_hash[:2]}/{content_hash}_{variant}.{extension}"
+        for variant in IMAGE_VARIANTS
+    }
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs an event loop and DB pools is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _render_variants(source_path: str, dest_dir: str, stem: str, image_format: str) -> Dict[str, str]:
+    """Decode an image and write its variants (runs in a worker process)"""
+    # Imported in the worker processes only
+    from PIL import Image, ImageOps, UnidentifiedImageError
+    from pillow_heif import register_heif_opener
+
+    register_heif_opener()
+    Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
+    pil_format, extension = _FORMATS[image_format]
+
+    written = {}
+    try:
+        with Image.open(source_path) as source:
+            # Pillow only raises DecompressionBombError above twice
+            # MAX_IMAGE_PIXELS (it just warns below that), so enforce the
+            # limit itself before anything is decoded
+            width, height = source.size
+            if width * height > settings.IMAGE_MAX_PIXELS:
+                raise Image.DecompressionBombError(
+                    f"Image has {width * height} pixels, more than {settings.IMAGE_MAX_PIXELS}"
+                )
+            # Decode JPEGs at a reduced scale when the largest variant allows it
+            largest = max(IMAGE_VARIANTS.values())
+            source.draft("RGB", (largest, largest))
+            # Apply the EXIF orientation before metadata is dropped
+            image = ImageOps.exif_transpose(source)
+            has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha and pil_format == "WEBP" else "RGB")
+
+            # Largest first, each variant resized from the previous one
+            for variant, size in sorted(IMAGE_VARIANTS.items(), key=lambda item: -item[1]):
+                image.thumbnail((size, size), Image.Resampling.LANCZOS)
+                filename = f"{stem}_{variant}.{extension}"
+                path = os.path.join(dest_dir, filename)
+                # Written under a temporary name, then renamed: concurrent
+                # uploads of the same image never expose a partial file
+                partial_path = f"{path}.{os.getpid()}.partial"
+                # No exif/icc arguments: saved files carry no metadata
+                if pil_format == "WEBP":
+                    image.save(partial_path, "WEBP", quality=82, method=4)
+                else:
+                    image.save(partial_path, "JPEG", quality=82, optimize=True, progressive=True)
+                os.replace(partial_path, path)
+                written[variant] = filename
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as e:
+        for path in glob.glob(os.path.join(dest_dir, f"{stem}_*.partial")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        raise InvalidImageError(str(e)) from None
+    return written
+
+
+async def process_image(source_path: str, dest_dir: str, stem: str) -> Dict[str, str]:
+    """
+    Write the resized variants of an uploaded image in the worker pool
+
+    Args:
+        source_path: The uploaded file (left in place)
+        dest_dir: Directory for the variants
+        stem: Shared file name stem (the content hash)
+
+    Returns:
+        Variant filenames by variant name
+
+    Raises:
+        InvalidImageError: The file is not a decodable image, or is too large
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), _render_variants, source_path, dest_dir, stem, settings.IMAGE_VARIANT_FORMAT
+    )
+
+
+async def spool_upload(
+    file: UploadFile, max_bytes: int, allowed_types: Iterable[str]
+) -> Tuple[str, str, int]:
+    """
+    Copy an upload to a temporary file one chunk at a time, hashing it
+
+    The type is sniffed from the file's first bytes (the client's
+    content_type is ignored), and copying stops as soon as the file exceeds
+    max_bytes, so at most one chunk is held in memory.
+
+    Returns:
+        (path, sha256 hex digest, size) - the caller removes the file
+
+    Raises:
+        InvalidImageError: Empty file, or not one of allowed_types
+        UploadTooLargeError: The file is larger than max_bytes
+    """
+    fd, path = tempfile.mkstemp(suffix=".upload")
+    os.close(fd)
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        async with await anyio.open_file(path, "wb") as spooled:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                if size == 0 and sniff_image_type(chunk) not in allowed_types:
+                    raise InvalidImageError("Unsupported image type")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                await spooled.write(chunk)
+        if size == 0:
+            raise InvalidImageError("Empty upload")
+    except BaseException:
+        await anyio.Path(path).unlink(missing_ok=True)
+        raise
+    return path, digest.hexdigest(), size
+
+
+def _claim_stored_image(content_hash: str, size: int) -> bool:
+    """Upsert the stored_images row in its own short transaction; True if it was inserted"""
+    db = SessionLocal()
+    try:
+        # Both timestamps are now() only when the row was just inserted
+        inserted = db.execute(
+            insert(StoredImage)
+            .values(content_hash=content_hash, byte_size=size)
+            .on_conflict_do_update(
+                index_elements=[StoredImage.content_hash],
+                set_={"last_uploaded_at": func.now()},
+            )
+            .returning(StoredImage.created_at == StoredImage.last_uploaded_at)
+        ).scalar()
+        db.commit()
+        return bool(inserted)
+    finally:
+        db.close()
+
+
+def _discard_stored_image(content_hash: str) -> None:
+    """Delete a stored_images row whose upload failed, unless something references it"""
+    db = SessionLocal()
+    try:
+        db.execute(
+            delete(StoredImage).where(
+                StoredImage.content_hash == content_hash,
+                ~exists().where(ImageReference.content_hash == StoredImage.content_hash),
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def store_image_upload(
+    file: UploadFile, max_bytes: int, allowed_types: Iterable[str]
+) -> Dict[str, str]:
+    """
+    Stream an upload to disk and store its variants by content hash
+
+    Images stored before are not processed again. The stored_images row is
+    upserted in its own short transaction (never the caller's) before
+    rendering, which protects the image from garbage collection until it is
+    referenced; a new row is deleted again if the image does not render.
+    When the row is new the variants are always rendered, even if files for
+    the hash exist: those may be left over from a collected image and about
+    to be removed.
+
+    Returns:
+        Variant paths (relative to the uploads directory) by variant name
+
+    Raises:
+        InvalidImageError, UploadTooLargeError
+    """
+    source_path, content_hash, size = await spool_upload(file, max_bytes, allowed_types)
+    try:
+        inserted = await run_in_threadpool(_claim_stored_image, content_hash, size)
+
+        paths = stored_image_paths(content_hash)
+        if not inserted:
+            for path in paths.values():
+                if not await anyio.Path(UPLOAD_ROOT, path).exists():
+                    break
+            else:
+                return paths
+
+        dest_dir = os.path.join(IMAGE_UPLOAD_DIR, content_hash[:2])
+        await anyio.Path(dest_dir).mkdir(exist_ok=True)
+        try:
+            await process_image(source_path, dest_dir, content_hash)
+        except Exception:
+            if inserted:
+                await run_in_threadpool(_discard_stored_image, content_hash)
+            raise
+        return paths
+    finally:
+        await anyio.Path(source_path).unlink(missing_ok=True)
+
+
+def update_image_reference(db: Session, owner_type: str, owner_id: str, url: Optional[str]) -> None:
+    """
+    Point an owner's image reference at the image a URL shows
+
+    Call in the transaction that sets the URL (market image_url, user
+    avatar_url). URLs that are not stored images remove the reference.
+
+    Raises:
+        ImageNotStoredError: The URL is a stored image that has been collected
+            (roll back rather than save the URL)
+    """
+    content_hash = stored_image_hash(url)
+    if content_hash is None:
+        db.execute(
+            delete(ImageReference).where(
+                ImageReference.owner_type == owner_type,
+                ImageReference.owner_id == owner_id,
+            )
+        )
+        return
+
+    # Only images that are still stored can be referenced
+    stmt = insert(ImageReference).from_select(
+        ["owner_type", "owner_id", "content_hash"],
+        select(literal(owner_type), literal(owner_id), StoredImage.content_hash).where(
+            StoredImage.content_hash == content_hash
+        ),
+    )
+    result = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ImageReference.owner_type, ImageReference.owner_id],
+            set_={"content_hash": stmt.excluded.content_hash, "created_at": func.now()},
+        )
+    )
+    if result.rowcount == 0:
+        raise ImageNotStoredError(url)
+
+
+def _remove_image_files(content_hash: str) -> int:
+    removed = 0
+    for path in glob.glob(os.path.join(IMAGE_UPLOAD_DIR, content_hash[:2], f"{content_hash}_*")):
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def collect_orphaned_images(db: Session) -> Dict[str, int]:
+    """
+    Delete stored images nothing references, and files with no stored image
+
+    Images (and stray files) uploaded within IMAGE_GC_GRACE_HOURS are kept,
+    since an upload is referenced only once its market or profile is saved.
+
+    Returns:
+        Counts of deleted images and removed files
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.IMAGE_GC_GRACE_HOURS)
+    orphaned = db.execute(
+        delete(StoredImage)
+        .where(
+            StoredImage.last_uploaded_at < cutoff,
+            ~exists().where(ImageReference.content_hash == StoredImage.content_hash),
+        )
+        .returning(StoredImage.content_hash)
+    ).scalars().all()
+    # Files go before the delete commits: until then the deleted rows stay
+    # locked, so a re-upload of the same image waits and then renders anew
+    removed_files = sum(_remove_image_files(content_hash) for content_hash in orphaned)
+    db.commit()
+
+    # Files left behind without a row (e.g. a worker died mid-upload)
+    stale_before = cutoff.timestamp()
+    stray = {}
+    for path in glob.glob(os.path.join(IMAGE_UPLOAD_DIR, "*", "*")):
+        content_hash = os.path.basename(path)[:64]
+        try:
+            if os.path.getmtime(path) < stale_before:
+                stray.setdefault(content_hash, []).append(path)
+        except OSError:
+            pass
+    if stray:
+        known = set(
+            db.execute(
+                select(StoredImage.content_hash).where(StoredImage.content_hash.in_(list(stray)))
+            ).scalars()
+        )
+        for content_hash, paths in stray.items():
+            if content_hash in known:
+                continue
+            for path in paths:
+                try:
+                    # Skip files an upload has just rendered again
+                    if os.path.getmtime(path) < stale_before:
+                        os.remove(path)
+                        removed_files += 1
+                except OSError:
+                    pass
+
+    return {"images": len(orphaned), "files": removed_files}
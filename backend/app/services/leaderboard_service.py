@@ -10,6 +10,7 @@ from sqlalchemy import and_, func, desc
 from app.models.user import User
 from app.models.forecast import Forecast
 from app.models.market import Market
+from app.services.image_service import image_variant_url
 from app.services.streak_service import calculate_winning_streak, calculate_activity_streak
 from app.services.reputation_service import get_user_forecast_stats
 from app.utils.cache import get_cache, set_cache, delete_cache_pattern
@@ -179,7 +180,7 @@ def calculate_leaderboard(
         leaderboard.append({
             "user_id": user.id,
             "display_name": user.display_name,
-            "avatar_url": user.avatar_url,
+            "avatar_url": image_variant_url(user.avatar_url, "thumb"),
             "reputation": round(user.reputation, 2),
             "rank_score": rank_score,
             "winning_streak": winning_streak,
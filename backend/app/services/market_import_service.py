@@ -0,0 +1,278 @@
+"""
+Market bulk creation and import
+
+Rows come from a JSON array, an NDJSON file or a CSV file. Every row is
+validated with MarketCreate before anything is written; a batch with any
+invalid row is rejected as a whole, with an error per row, so a corrected
+file can simply be submitted again. Valid batches are written in one
+transaction: slugs allocated with one lookup, then multi-row inserts for
+markets, outcomes and market_created activities.
+"""
+import csv
+import io
+import json
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from slugify import slugify
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.market import Market, Outcome
+from app.schemas.market import MarketCreate
+
+# Largest batch accepted in one request
+MAX_BULK_MARKETS = 500
+
+# Attempts to claim slugs when concurrent requests race for the same ones
+SLUG_CLAIM_ATTEMPTS = 5
+
+# CSV columns: outcomes are separated by CSV_OUTCOME_SEPARATOR, meta_data is
+# a JSON object. Empty cells are left out so schema defaults apply.
+CSV_COLUMNS = (
+    "title", "description", "rules", "image_url", "category",
+    "end_date", "max_points_per_user", "outcomes", "meta_data",
+)
+CSV_OUTCOME_SEPARATOR = "|"
+
+
+class MarketImportError(ValueError):
+    """The submitted batch cannot be read at all (bad file, too many rows)"""
+
+
+def next_free_slug(base_slug: str, taken: Iterable[str]) -> str:
+    """`base_slug`, or `base_slug-N` with the lowest N not in `taken`"""
+    taken = set(taken)
+    if base_slug not in taken:
+        return base_slug
+    counter = 1
+    while f"{base_slug}-{counter}" in taken:
+        counter += 1
+    return f"{base_slug}-{counter}"
+
+
+def taken_slugs(db: Session, base_slugs: Iterable[str]) -> Set[str]:
+    """Existing slugs equal to, or numbered variants of, any of `base_slugs` (one query)"""
+    base_slugs = set(base_slugs)
+    if not base_slugs:
+        return set()
+    # slugify output has no LIKE wildcards; other titles sharing the prefix
+    # (base-foo) are filtered out below
+    rows = db.query(Market.slug).filter(
+        or_(*[
+            or_(Market.slug == base_slug, Market.slug.like(f"{base_slug}-%"))
+            for base_slug in base_slugs
+        ])
+    ).all()
+    taken = set()
+    for (slug,) in rows:
+        base, _, suffix = slug.rpartition("-")
+        if slug in base_slugs or (suffix.isdigit() and base in base_slugs):
+            taken.add(slug)
+    return taken
+
+
+def is_slug_conflict(error: IntegrityError) -> bool:
+    """Whether an IntegrityError is the unique constraint on markets.slug"""
+    return "slug" in str(error.orig)
+
+
+def allocate_slugs(db: Session, titles: List[str]) -> List[str]:
+    """Unique slugs for titles, in order (titles repeated in the batch get -1, -2, ...)"""
+    base_slugs = [slugify(title) for title in titles]
+    taken = taken_slugs(db, base_slugs)
+    slugs = []
+    for base_slug in base_slugs:
+        slug = next_free_slug(base_slug, taken)
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def _row_errors(row: int, error: Exception) -> List[Dict[str, Any]]:
+    if isinstance(error, ValidationError):
+        return [
+            {
+                "row": row,
+                "field": ".".join(str(part) for part in item["loc"]) or None,
+                "message": item["msg"],
+            }
+            for item in error.errors()
+        ]
+    return [{"row": row, "field": None, "message": str(error)}]
+
+
+def _check_size(count: int) -> None:
+    if count == 0:
+        raise MarketImportError("No markets to create")
+    if count > MAX_BULK_MARKETS:
+        raise MarketImportError(f"At most {MAX_BULK_MARKETS} markets can be created at once")
+
+
+def parse_json_rows(items: List[Any]) -> List[Tuple[int, Any]]:
+    """(row number, raw row) for a JSON array, numbered from 1"""
+    _check_size(len(items))
+    return list(enumerate(items, start=1))
+
+
+def parse_ndjson_rows(text: str) -> List[Tuple[int, Any]]:
+    """
+    (line number, raw row) for each non-blank NDJSON line
+
+    Lines that are not valid JSON are kept as the JSONDecodeError so they are
+    reported with the row's validation errors.
+    """
+    rows = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            rows.append((line_number, json.loads(line)))
+        except json.JSONDecodeError as e:
+            rows.append((line_number, ValueError(f"Invalid JSON: {e.msg}")))
+    _check_size(len(rows))
+    return rows
+
+
+def _csv_record_to_row(record: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    row: Dict[str, Any] = {}
+    for column in CSV_COLUMNS:
+        value = (record.get(column) or "").strip()
+        if not value:
+            continue
+        if column == "outcomes":
+            row[column] = [
+                {"name": name.strip()}
+                for name in value.split(CSV_OUTCOME_SEPARATOR)
+                if name.strip()
+            ]
+        elif column == "meta_data":
+            try:
+                row[column] = json.loads(value)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"meta_data is not valid JSON: {e.msg}")
+        else:
+            row[column] = value
+    return row
+
+
+def parse_csv_rows(text: str) -> List[Tuple[int, Any]]:
+    """
+    (line number, raw row) for each CSV record (the header is line 1)
+
+    Raises:
+        MarketImportError: if the header lacks title, category or outcomes
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    missing = {"title", "category", "outcomes"} - set(reader.fieldnames or [])
+    if missing:
+        raise MarketImportError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+
+    rows = []
+    for record in reader:
+        if not any((value or "").strip() for value in record.values() if isinstance(value, str)):
+            continue
+        try:
+            rows.append((reader.line_num, _csv_record_to_row(record)))
+        except ValueError as e:
+            rows.append((reader.line_num, e))
+    _check_size(len(rows))
+    return rows
+
+
+def validate_rows(rows: List[Tuple[int, Any]]) -> Tuple[List[Tuple[int, MarketCreate]], List[Dict[str, Any]]]:
+    """
+    Validate raw rows with MarketCreate
+
+    Returns:
+        (valid rows as (row number, MarketCreate), errors as {row, field, message})
+    """
+    valid, errors = [], []
+    for row, data in rows:
+        try:
+            if isinstance(data, Exception):
+                raise data
+            valid.append((row, MarketCreate.model_validate(data)))
+        except (ValidationError, ValueError) as e:
+            errors.extend(_row_errors(row, e))
+    return valid, errors
+
+
+def bulk_create_markets(db: Session, markets: List[MarketCreate], created_by: str) -> List[Dict[str, str]]:
+    """
+    Insert markets, their outcomes and market_created activities
+
+    Markets are inserted in a savepoint; if a concurrent request claims one
+    of the allocated slugs first, slugs are allocated again and the insert
+    retried. The caller commits.
+
+    Returns:
+        {id, slug, title} per market, in input order
+
+    Raises:
+        IntegrityError: if slugs could not be claimed after SLUG_CLAIM_ATTEMPTS
+    """
+    from app.services.activity_service import create_activities
+    from app.services.image_service import update_image_reference
+
+    if not markets:
+        return []
+
+    market_rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": market.title,
+            "description": market.description,
+            "rules": market.rules,
+            "image_url": market.image_url,
+            "category": market.category,
+            "meta_data": market.meta_data or {},
+            "max_points_per_user": market.max_points_per_user,
+            "end_date": market.end_date,
+            "created_by": created_by,
+            "status": "open",
+        }
+        for market in markets
+    ]
+
+    for attempt in range(SLUG_CLAIM_ATTEMPTS):
+        for market_row, slug in zip(market_rows, allocate_slugs(db, [market.title for market in markets])):
+            market_row["slug"] = slug
+        try:
+            with db.begin_nested():
+                db.execute(insert(Market), market_rows)
+            break
+        except IntegrityError as e:
+            if not is_slug_conflict(e) or attempt == SLUG_CLAIM_ATTEMPTS - 1:
+                raise
+
+    db.execute(
+        insert(Outcome),
+        [
+            {"id": str(uuid.uuid4()), "market_id": market_row["id"], "name": outcome.name, "total_points": 0}
+            for market, market_row in zip(markets, market_rows)
+            for outcome in market.outcomes
+        ],
+    )
+
+    for market_row in market_rows:
+        if market_row["image_url"]:
+            update_image_reference(db, "market", market_row["id"], market_row["image_url"])
+
+    create_activities(
+        db,
+        [
+            {
+                "activity_type": "market_created",
+                "user_id": created_by,
+                "market_id": market_row["id"],
+                "market_category": market_row["category"],
+                "metadata": {"market_title": market_row["title"], "category": market_row["category"]},
+            }
+            for market_row in market_rows
+        ],
+    )
+
+    return [{"id": row["id"], "slug": row["slug"], "title": row["title"]} for row in market_rows]
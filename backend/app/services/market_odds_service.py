@@ -0,0 +1,249 @@
+"""
+Market odds service (outcome totals, consensus snapshots and live odds streams)
+"""
+import asyncio
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.market import Market, Outcome
+from app.services.realtime_service import (
+    broker,
+    format_sse,
+    offer,
+    publish_events,
+    PubSubBroker,
+    STREAM_CLOSED,
+)
+
+ODDS_CHANNEL_PREFIX = "market:odds:"
+
+
+def odds_channel(market_id: str) -> str:
+    return f"{ODDS_CHANNEL_PREFIX}{market_id}"
+
+
+def compute_consensus(outcomes: Iterable) -> Tuple[Dict[str, float], int]:
+    """
+    Consensus percentage per outcome name from outcome point totals
+
+    Returns:
+        (consensus, total_points) - consensus is empty when no points are allocated
+    """
+    outcomes = list(outcomes)
+    total_points = sum(outcome.total_points for outcome in outcomes)
+    consensus = {}
+    if total_points > 0:
+        for outcome in outcomes:
+            consensus[outcome.name] = round((outcome.total_points / total_points) * 100, 2)
+    return consensus, total_points
+
+
+def load_market_odds(db: Session, market_id: str) -> Optional[Dict]:
+    """
+    Current odds snapshot for a market (one query on outcomes plus the market status)
+
+    Returns:
+        Dict with market_id, status, outcomes, consensus and total_volume, or None if not found
+    """
+    market_status = db.query(Market.status).filter(Market.id == market_id).scalar()
+    if market_status is None:
+        return None
+
+    outcomes = db.query(Outcome.id, Outcome.name, Outcome.total_points).filter(
+        Outcome.market_id == market_id
+    ).order_by(Outcome.created_at).all()
+    consensus, total_points = compute_consensus(outcomes)
+
+    return {
+        "market_id": market_id,
+        "status": market_status,
+        "outcomes": [
+            {"id": outcome.id, "name": outcome.name, "total_points": outcome.total_points}
+            for outcome in outcomes
+        ],
+        "consensus": consensus,
+        "total_volume": total_points,
+    }
+
+
+def add_outcome_points(db: Session, outcome_id: str, points: int) -> int:
+    """
+    Atomically add (or subtract) points on an outcome's total
+
+    A single UPDATE ... SET total_points = total_points + :n RETURNING, so
+    concurrent forecasts never lose updates. The row lock is held until the
+    transaction ends: call this as the last write before commit.
+
+    Returns:
+        New total_points
+    """
+    return db.execute(
+        update(Outcome)
+        .where(Outcome.id == outcome_id)
+        .values(total_points=Outcome.total_points + points)
+        .returning(Outcome.total_points)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+
+
+def queue_odds_update(db: Session, market_id: str) -> None:
+    """Mark a market's odds as changed; streams are notified after the session commits"""
+    db.info.setdefault("odds_changed_markets", set()).add(market_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_odds_changes_after_commit(session: Session) -> None:
+    market_ids = session.info.pop("odds_changed_markets", None)
+    if market_ids:
+        # Only a change marker is published; each process reloads at most once per tick
+        publish_events([([odds_channel(market_id) for market_id in market_ids], {"type": "odds"})])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_odds_changes(session: Session) -> None:
+    session.info.pop("odds_changed_markets", None)
+
+
+def _load_odds_message(market_id: str) -> Optional[str]:
+    """Load a snapshot with a short-lived session and encode it once for all viewers"""
+    db = SessionLocal()
+    try:
+        snapshot = load_market_odds(db, market_id)
+    finally:
+        db.close()
+    if snapshot is None:
+        return None
+    return format_sse(snapshot, event="odds")
+
+
+class MarketOddsHub:
+    """
+    Per-process fan-out of market odds to connected viewers
+
+    Each watched market has one feed task that listens for change markers,
+    reloads the snapshot at most once per tick and hands the same encoded
+    message to every local viewer. Viewer queues hold only the latest
+    snapshot, so slow clients skip intermediate ticks.
+    """
+
+    def __init__(self, pubsub: PubSubBroker, tick_seconds: float = 1.0):
+        self.pubsub = pubsub
+        self.tick_seconds = tick_seconds
+        self._viewers: Dict[str, Set[asyncio.Queue]] = {}
+        self._latest: Dict[str, str] = {}
+        self._feeds: Dict[str, asyncio.Task] = {}
+        self._lock = asyncio.Lock()
+
+    async def snapshot(self, market_id: str) -> Optional[str]:
+        """
+        Current encoded snapshot of a market (shared one if it is watched)
+
+        Returns:
+            SSE message, or None if the market does not exist
+        """
+        message = self._latest.get(market_id)
+        if message is None:
+            message = await run_in_threadpool(_load_odds_message, market_id)
+        return message
+
+    async def join(self, market_id: str, message: Optional[str] = None) -> Optional[asyncio.Queue]:
+        """
+        Register a viewer; the queue starts with the current snapshot
+
+        Args:
+            message: Snapshot already fetched with snapshot() (loaded if omitted)
+
+        Returns:
+            Viewer queue, or None if the market does not exist
+        """
+        if message is None:
+            message = await self.snapshot(market_id)
+            if message is None:
+                return None
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        async with self._lock:
+            message = self._latest.setdefault(market_id, message)
+            self._viewers.setdefault(market_id, set()).add(queue)
+            if market_id not in self._feeds:
+                self._feeds[market_id] = asyncio.create_task(self._run_feed(market_id))
+        offer(queue, message)
+        return queue
+
+    async def leave(self, market_id: str, queue: asyncio.Queue) -> None:
+        """Unregister a viewer, stopping the market's feed after the last one leaves"""
+        feed = None
+        async with self._lock:
+            viewers = self._viewers.get(market_id)
+            if viewers is None:
+                return
+            viewers.discard(queue)
+            if not viewers:
+                del self._viewers[market_id]
+                self._latest.pop(market_id, None)
+                feed = self._feeds.pop(market_id, None)
+        if feed is not None:
+            feed.cancel()
+
+    async def _run_feed(self, market_id: str) -> None:
+        channel = odds_channel(market_id)
+        try:
+            updates = await self.pubsub.subscribe(channel)
+        except Exception:
+            # Redis unavailable: viewers keep their initial snapshot; the next join retries
+            async with self._lock:
+                self._feeds.pop(market_id, None)
+            return
+
+        loop = asyncio.get_running_loop()
+        last_tick = 0.0
+        try:
+            while True:
+                if await updates.get() is STREAM_CLOSED:
+                    break
+
+                # Coalesce: wait out the rest of the tick, then drop markers that piled up
+                delay = last_tick + self.tick_seconds - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                closed = _drain(updates)
+
+                message = await run_in_threadpool(_load_odds_message, market_id)
+                last_tick = loop.time()
+                if message is not None:
+                    self._latest[market_id] = message
+                    for queue in tuple(self._viewers.get(market_id, ())):
+                        offer(queue, message)
+                if closed:
+                    break
+        finally:
+            await self.pubsub.unsubscribe(channel, updates)
+
+        # Lost the subscription: end the streams so clients reconnect
+        await self._close_viewers(market_id)
+
+    async def _close_viewers(self, market_id: str) -> None:
+        async with self._lock:
+            viewers = self._viewers.pop(market_id, set())
+            self._latest.pop(market_id, None)
+            self._feeds.pop(market_id, None)
+        for queue in viewers:
+            offer(queue, STREAM_CLOSED)
+
+
+def _drain(queue: asyncio.Queue) -> bool:
+    """Empty a queue; True if the stream-closed sentinel was among the items"""
+    closed = False
+    while True:
+        try:
+            closed = queue.get_nowait() is STREAM_CLOSED or closed
+        except asyncio.QueueEmpty:
+            return closed
+
+
+hub = MarketOddsHub(broker, tick_seconds=settings.MARKET_ODDS_TICK_SECONDS)
@@ -1,15 +1,159 @@
 """
 Notification service
 """
+import csv
+import io
+import itertools
+import json
 import uuid
-from typing import List, Dict, Optional
+from typing import Iterable, Iterator, List, Dict, Optional
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from sqlalchemy import and_, func, desc, event
 
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationPayload
+from app.schemas.notification import NotificationResponse
 from app.models.user import User
-from app.utils.cache import get_cache, set_cache, delete_cache
+from app.utils.cache import get_cache, set_cache, delete_cache, delete_cache_keys, redis_client
+from app.services.realtime_service import publish_events, user_channel
+
+# Authoritative per-user unread counters live in Redis. Writes queue deltas on
+# the session and apply them after commit; reconcile_unread_counters() fixes
+# any drift against the database periodically.
+UNREAD_COUNTER_PREFIX = "notifications:unread:"
+UNREAD_PIPELINE_SIZE = 10000
+
+# Seeding races with counter updates: a reader counts the database, then a
+# notification commits and its update finds no counter, then the reader seeds
+# its (now stale) count. Updates that find no counter therefore set a stale
+# marker; readers clear it before counting and skip seeding if it reappears.
+UNREAD_STALE_SUFFIX = ":stale"
+UNREAD_STALE_TTL_SECONDS = 60  # Comfortably longer than a seeding read
+
+# Only adjust counters that exist (a missing counter is seeded from the DB on read)
+_incr_if_exists = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('INCRBY', KEYS[1], ARGV[1])
+end
+redis.call('SET', KEYS[2], 1, 'EX', ARGV[2])
+return nil
+""")
+_decr_floor_zero = redis_client.register_script("""
+local value = tonumber(redis.call('GET', KEYS[1]))
+if value == nil then
+    redis.call('SET', KEYS[2], 1, 'EX', ARGV[2])
+    return nil
+end
+value = math.max(value - tonumber(ARGV[1]), 0)
+redis.call('SET', KEYS[1], value)
+return value
+""")
+# Seed a missing counter unless an update was missed since the count began
+_seed_counter = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX') then
+    return 1
+end
+return 0
+""")
+# Compare-and-set used by reconciliation so concurrent updates are not clobbered
+_set_if_unchanged = redis_client.register_script("""
+local current = redis.call('GET', KEYS[1])
+if current == ARGV[1] or (current == false and ARGV[1] == '') then
+    redis.call('SET', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+""")
+
+
+def unread_counter_key(user_id: str) -> str:
+    return f"{UNREAD_COUNTER_PREFIX}{user_id}"
+
+
+def _unread_counter_keys(user_id: str) -> List[str]:
+    """Counter key and its stale marker (the KEYS of the counter scripts)"""
+    key = unread_counter_key(user_id)
+    return [key, key + UNREAD_STALE_SUFFIX]
+
+
+def _queue_unread_increment(db: Session, user_ids: Iterable[str]) -> None:
+    """Queue +1 unread for each user, applied after the session commits"""
+    db.info.setdefault("unread_increments", []).append(user_ids)
+
+
+def _queue_unread_decrement(db: Session, user_id: str) -> None:
+    decrements = db.info.setdefault("unread_decrements", {})
+    decrements[user_id] = decrements.get(user_id, 0) + 1
+
+
+def _queue_unread_reset(db: Session, user_id: str) -> None:
+    db.info.setdefault("unread_resets", set()).add(user_id)
+
+
+def _queue_push_event(db: Session, user_ids: Iterable[str], message: Dict) -> None:
+    """Queue a push event for each user's stream, published after the session commits"""
+    db.info.setdefault("notification_events", []).append((user_ids, message))
+
+
+def apply_unread_counter_updates(
+    increments: Iterable[Iterable[str]],
+    decrements: Dict[str, int],
+    resets: Iterable[str]
+) -> None:
+    """Apply queued counter changes in pipelined batches (fail open if Redis is down)"""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        queued = 0
+        
+        def flush_if_full():
+            nonlocal queued
+            queued += 1
+            if queued >= UNREAD_PIPELINE_SIZE:
+                pipe.execute()
+                queued = 0
+        
+        for user_id in resets:
+            pipe.set(unread_counter_key(user_id), 0)
+            flush_if_full()
+        for user_ids in increments:
+            for user_id in user_ids:
+                _incr_if_exists(keys=_unread_counter_keys(user_id), args=[1, UNREAD_STALE_TTL_SECONDS], client=pipe)
+                flush_if_full()
+        for user_id, amount in decrements.items():
+            _decr_floor_zero(keys=_unread_counter_keys(user_id), args=[amount, UNREAD_STALE_TTL_SECONDS], client=pipe)
+            flush_if_full()
+        
+        if queued:
+            pipe.execute()
+    except Exception:
+        pass
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_unread_counters_after_commit(session: Session) -> None:
+    increments = session.info.pop("unread_increments", [])
+    decrements = session.info.pop("unread_decrements", {})
+    resets = session.info.pop("unread_resets", set())
+    events = session.info.pop("notification_events", [])
+    if increments or decrements or resets:
+        apply_unread_counter_updates(increments, decrements, resets)
+    # Publish after the counters move so streams read the updated unread count
+    if events:
+        publish_events(
+            ((user_channel(user_id) for user_id in user_ids), message)
+            for user_ids, message in events
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_unread_counter_updates(session: Session) -> None:
+    session.info.pop("unread_increments", None)
+    session.info.pop("unread_decrements", None)
+    session.info.pop("unread_resets", None)
+    session.info.pop("notification_events", None)
 
 
 def create_notification(
@@ -31,65 +175,204 @@ def create_notification(
         type=notification_type,
         message=message,
         read=False,
-        meta_data=metadata or {}
+        meta_data=metadata or {},
+        created_at=datetime.now(timezone.utc)
     )
     db.add(notification)
     
-    # Invalidate cache
-    delete_cache(f"notifications:unread_count:{user_id}")
+    # Bump unread counter and push to connected streams on commit; invalidate cache
+    _queue_unread_increment(db, [user_id])
+    _queue_push_event(db, [user_id], {"type": "notification", "notification": render_notification(notification)})
     delete_cache(f"notifications:recent:{user_id}")
     
     return notification
 
 
+# Column order used by the COPY-based bulk writer
+NOTIFICATION_COPY_COLUMNS = (
+    "id", "user_id", "type", "message", "read", "meta_data", "created_at",
+    "payload_id", "forecast_points", "chips_amount", "reward_amount",
+)
+
+# Templates for notifications rendered at read time, keyed by notification type.
+# Fields come from the shared payload plus the row's per-user numbers.
+NOTIFICATION_TEMPLATES = {
+    "forecast_won": "🎉 You won! Market '{market_title}' resolved in your favor. You gained ₱{chips_gained:,} chips (total reward: ₱{reward_amount:,}).",
+    "forecast_lost": "Market '{market_title}' resolved. Your forecast didn't win. You lost ₱{chips_lost:,} chips.",
+}
+PAYLOAD_CACHE_TTL = 86400  # Payloads are immutable
+
+
+def notification_row(
+    user_id: str,
+    notification_type: str,
+    created_at: datetime,
+    message: Optional[str] = None,
+    metadata: Optional[Dict] = None,
+    payload_id: Optional[str] = None,
+    forecast_points: Optional[int] = None,
+    chips_amount: Optional[int] = None,
+    reward_amount: Optional[int] = None
+) -> tuple:
+    """Build a row tuple in NOTIFICATION_COPY_COLUMNS order"""
+    return (
+        str(uuid.uuid4()), user_id, notification_type, message, False, metadata, created_at,
+        payload_id, forecast_points, chips_amount, reward_amount,
+    )
+
+
+def notification_cache_keys(user_ids: Iterable[str]) -> Iterator[str]:
+    """Per-user notification cache keys to invalidate after writes"""
+    for user_id in user_ids:
+        yield f"notifications:recent:{user_id}"
+
+
+class _CsvRowStream:
+    """
+    File-like object that encodes notification rows to CSV on demand
+    
+    psycopg2's copy_expert pulls data with read(size), so rows are encoded
+    lazily chunk by chunk instead of building the whole payload in memory.
+    """
+    
+    def __init__(self, rows: Iterable[tuple], rows_per_chunk: int = 5000):
+        self._rows = iter(rows)
+        self._rows_per_chunk = rows_per_chunk
+        self._buffer = ""
+        self._offset = 0
+        self.row_count = 0
+    
+    @staticmethod
+    def _csv_value(value):
+        if value is None:
+            return None  # Unquoted empty field is NULL in CSV COPY
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, dict):
+            return json.dumps(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+    
+    def _encode_chunk(self) -> str:
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        csv_value = self._csv_value
+        for row in itertools.islice(self._rows, self._rows_per_chunk):
+            writer.writerow([csv_value(value) for value in row])
+            self.row_count += 1
+        return out.getvalue()
+    
+    def read(self, size: int = -1) -> str:
+        if self._offset >= len(self._buffer):
+            self._buffer = self._encode_chunk()
+            self._offset = 0
+        if size < 0:
+            size = len(self._buffer) - self._offset
+        data = self._buffer[self._offset:self._offset + size]
+        self._offset += len(data)
+        return data
+    
+    def readline(self, size: int = -1) -> str:
+        return self.read(size)
+
+
+def copy_notifications(
+    db: Session,
+    rows: Iterable[tuple],
+    table: str = Notification.__tablename__,
+    rows_per_chunk: int = 5000
+) -> int:
+    """
+    Stream notification rows into the database with COPY FROM STDIN
+    
+    Runs on the session's own connection, so it is part of the caller's
+    transaction. Falls back to bulk_insert_mappings on non-PostgreSQL engines.
+    
+    Args:
+        db: Database session
+        rows: Iterable of row tuples in NOTIFICATION_COPY_COLUMNS order (see notification_row)
+        table: Target table (overridable for benchmarks)
+        rows_per_chunk: Rows CSV-encoded per chunk pulled by COPY
+    
+    Returns:
+        Number of rows written
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        mappings = [dict(zip(NOTIFICATION_COPY_COLUMNS, row)) for row in rows]
+        db.bulk_insert_mappings(Notification, mappings)
+        return len(mappings)
+    
+    stream = _CsvRowStream(rows, rows_per_chunk)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(NOTIFICATION_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            stream,
+        )
+    finally:
+        cursor.close()
+    return stream.row_count
+
+
 def create_notifications_batch(
     db: Session,
     user_ids: List[str],
     notification_type: str,
     message: str,
     metadata: Optional[Dict] = None
-) -> List[Notification]:
+) -> int:
     """
-    Create notifications for multiple users in batch (optimized)
+    Create the same notification for multiple users in batch (COPY-based)
     
     Returns:
-        List of created Notification objects
+        Number of notifications created
     """
-    notifications = [
-        Notification(
-            id=str(uuid.uuid4()),
-            user_id=user_id,
-            type=notification_type,
-            message=message,
-            read=False,
-            meta_data=metadata or {}
-        )
-        for user_id in user_ids
-    ]
-    
     # Use datetime.now(timezone.utc) instead of func.now() for bulk insert
     # func.now() is a SQLAlchemy function object and can't be adapted by psycopg2
     current_time = datetime.now(timezone.utc)
     
-    db.bulk_insert_mappings(Notification, [
-        {
-            "id": n.id,
-            "user_id": n.user_id,
-            "type": n.type,
-            "message": n.message,
-            "read": n.read,
-            "meta_data": n.meta_data,
-            "created_at": current_time
-        }
-        for n in notifications
-    ])
-    
-    # Invalidate cache for all affected users
-    for user_id in user_ids:
-        delete_cache(f"notifications:unread_count:{user_id}")
-        delete_cache(f"notifications:recent:{user_id}")
+    count = copy_notifications(db, (
+        notification_row(user_id, notification_type, current_time, message=message, metadata=metadata or {})
+        for user_id in user_ids
+    ))
     
-    return notifications
+    # Bump unread counters on commit; invalidate cache for all affected users (pipelined)
+    _queue_unread_increment(db, user_ids)
+    delete_cache_keys(notification_cache_keys(user_ids))
+    
+    return count
+
+
+def _forecast_result_rows(
+    user_results: List[Dict],
+    payload_id: str,
+    created_at: datetime
+) -> Iterator[tuple]:
+    """Build compact templated win/loss rows lazily from scoring results"""
+    for result in user_results:
+        forecast_points = result["forecast_points"]
+        
+        if result["won"]:
+            chips_gained = result["chips_gained"]
+            yield notification_row(
+                result["user_id"],
+                "forecast_won",
+                created_at,
+                payload_id=payload_id,
+                forecast_points=forecast_points,
+                chips_amount=chips_gained,
+                reward_amount=result.get("reward_amount", forecast_points + chips_gained),
+            )
+        else:
+            yield notification_row(
+                result["user_id"],
+                "forecast_lost",
+                created_at,
+                payload_id=payload_id,
+                forecast_points=forecast_points,
+                chips_amount=result["chips_lost"],
+            )
 
 
 def create_forecast_result_notifications(
@@ -105,9 +388,11 @@ def create_forecast_result_notifications(
     Create individual win/loss notifications for each user after market resolution
     
     Optimized for large-scale operations (100k+ users):
-    - Batched bulk inserts to avoid memory issues and long transactions
+    - Market title/outcome are stored once in a NotificationPayload; each row holds
+      only the template key (type), payload reference and per-user numbers
+    - Rows are streamed through COPY FROM STDIN instead of ORM bulk inserts
     - Background processing option for very large batches
-    - Efficient cache invalidation
+    - Cache invalidation with pipelined multi-key UNLINKs (one round trip per batch_size users)
     
     Args:
         db: Database session
@@ -115,11 +400,11 @@ def create_forecast_result_notifications(
         market_id: ID of the resolved market
         market_title: Title of the resolved market
         winning_outcome_name: Name of the winning outcome
-        batch_size: Number of notifications to insert per batch (default: 5000)
+        batch_size: Rows encoded per COPY chunk / keys per UNLINK pipeline (default: 5000)
         use_async: If True and batch is large, use Celery for background processing
     
     Returns:
-        List of created Notification objects (empty if async)
+        List of created Notification objects (always empty - rows are written in bulk)
     """
     num_users = len(user_results)
     
@@ -137,116 +422,186 @@ def create_forecast_result_notifications(
             return []  # Return immediately, processing happens in background
         except (ImportError, AttributeError):
             # Celery task not available or Celery not configured, fall back to synchronous processing
-            # This is fine - the batched approach will still work efficiently
+            # This is fine - the streaming COPY approach will still work efficiently
             pass
     
+    if not user_results:
+        return []
+    
     current_time = datetime.now(timezone.utc)
-    all_user_ids = set()
     
-    # Process in batches to avoid memory issues and long transactions
-    for batch_start in range(0, num_users, batch_size):
-        batch_end = min(batch_start + batch_size, num_users)
-        batch_results = user_results[batch_start:batch_end]
-        
-        notifications_batch = []
-        
-        for result in batch_results:
-            user_id = result["user_id"]
-            won = result["won"]
-            forecast_points = result["forecast_points"]
-            all_user_ids.add(user_id)
-            
-            if won:
-                chips_gained = result["chips_gained"]
-                reward_amount = result.get("reward_amount", forecast_points + chips_gained)
-                notification_type = "forecast_won"
-                message = f"🎉 You won! Market '{market_title}' resolved in your favor. You gained ₱{chips_gained:,} chips (total reward: ₱{reward_amount:,})."
-                metadata = {
-                    "market_id": market_id,
-                    "market_title": market_title,
-                    "winning_outcome": winning_outcome_name,
-                    "forecast_points": forecast_points,
-                    "chips_gained": chips_gained,
-                    "reward_amount": reward_amount,
-                }
-            else:
-                chips_lost = result["chips_lost"]
-                notification_type = "forecast_lost"
-                message = f"Market '{market_title}' resolved. Your forecast didn't win. You lost ₱{chips_lost:,} chips."
-                metadata = {
-                    "market_id": market_id,
-                    "market_title": market_title,
-                    "winning_outcome": winning_outcome_name,
-                    "forecast_points": forecast_points,
-                    "chips_lost": chips_lost,
-                }
-            
-            notifications_batch.append({
-                "id": str(uuid.uuid4()),
-                "user_id": user_id,
-                "type": notification_type,
-                "message": message,
-                "read": False,
-                "meta_data": metadata,
-                "created_at": current_time
-            })
-        
-        # Bulk insert this batch
-        if notifications_batch:
-            db.bulk_insert_mappings(Notification, notifications_batch)
-            db.flush()  # Flush after each batch to avoid huge transaction
-    
-    # Batch cache invalidation (more efficient than individual calls)
-    # Invalidate cache for all affected users at once using a pattern
-    # Note: This requires Redis pattern deletion or we can do it in batches
-    if all_user_ids:
-        # Invalidate cache in batches to avoid blocking
-        user_ids_list = list(all_user_ids)
-        cache_batch_size = 1000
-        
-        for cache_batch_start in range(0, len(user_ids_list), cache_batch_size):
-            cache_batch_end = min(cache_batch_start + cache_batch_size, len(user_ids_list))
-            cache_batch = user_ids_list[cache_batch_start:cache_batch_end]
-            
-            # Invalidate cache for this batch
-            for user_id in cache_batch:
-                delete_cache(f"notifications:unread_count:{user_id}")
-                delete_cache(f"notifications:recent:{user_id}")
+    # One shared payload per resolution; rows only carry per-user numbers
+    payload = NotificationPayload(
+        id=str(uuid.uuid4()),
+        market_id=market_id,
+        data={
+            "market_id": market_id,
+            "market_title": market_title,
+            "winning_outcome": winning_outcome_name,
+        },
+    )
+    db.add(payload)
+    db.flush()
+    
+    rows = _forecast_result_rows(user_results, payload.id, current_time)
+    copy_notifications(db, rows, rows_per_chunk=batch_size)
+    
+    # Bump unread counters on commit (pipelined INCRBY); invalidate cache with pipelined UNLINKs
+    user_ids = [result["user_id"] for result in user_results]
+    _queue_unread_increment(db, user_ids)
+    # Rows are never materialized here, so streams get a compact event and refetch the list
+    _queue_push_event(db, user_ids, {"type": "notification"})
+    delete_cache_keys(notification_cache_keys(user_ids), chunk_size=batch_size)
     
     return []
 
 
 def get_unread_count(db: Session, user_id: str, use_cache: bool = True) -> int:
     """
-    Get unread notification count for a user (cached)
+    Get unread notification count for a user
+    
+    Served from the Redis counter (a single GET). The counter is seeded from
+    the database on first read and kept current by the write paths.
     
     Args:
         db: Database session
         user_id: User ID
-        use_cache: Whether to use cache (default: True)
+        use_cache: Whether to use the Redis counter (default: True)
     
     Returns:
         Unread count
     """
-    cache_key = f"notifications:unread_count:{user_id}"
+    key, stale_key = _unread_counter_keys(user_id)
     
-    # Try cache first
     if use_cache:
-        cached = get_cache(cache_key)
-        if cached is not None:
-            return cached
+        try:
+            value = redis_client.get(key)
+            if value is not None:
+                return max(int(value), 0)
+            # Updates committed after this point will find no counter and mark it stale
+            redis_client.delete(stale_key)
+        except Exception:
+            pass
     
     # Query database
-    count = db.query(Notification).filter(
+    count = count_unread(db, user_id)
+    
+    # Seed the counter (NX: never overwrite a counter updated concurrently; not
+    # at all if an update was missed meanwhile - the next read recounts)
+    if use_cache:
+        try:
+            _seed_counter(keys=[key, stale_key], args=[count])
+        except Exception:
+            pass
+    
+    return count
+
+
+def count_unread(db: Session, user_id: str) -> int:
+    """Count unread notifications in the database"""
+    return db.query(Notification).filter(
         Notification.user_id == user_id,
         Notification.read == False
     ).count()
+
+
+def reconcile_unread_counters(db: Session, batch_size: int = 1000) -> int:
+    """
+    Reconcile Redis unread counters against the database
     
-    # Cache result (30 second TTL)
-    if use_cache:
-        set_cache(cache_key, count, ttl=30)
+    Scans existing counters in batches, recounts with one GROUP BY per batch,
+    and corrects drifted values with a compare-and-set so increments that
+    land during the recount are not lost.
     
-    return count
+    Returns:
+        Number of counters corrected
+    """
+    corrected = 0
+    batch = []
+    
+    def reconcile_batch(keys: List[str]) -> int:
+        before = redis_client.mget(keys)
+        user_ids = [key[len(UNREAD_COUNTER_PREFIX):] for key in keys]
+        counts = dict(
+            db.query(Notification.user_id, func.count(Notification.id))
+            .filter(Notification.user_id.in_(user_ids), Notification.read == False)
+            .group_by(Notification.user_id)
+            .all()
+        )
+        fixed = 0
+        for key, user_id, value in zip(keys, user_ids, before):
+            actual = counts.get(user_id, 0)
+            if value is None or int(value) != actual:
+                fixed += _set_if_unchanged(keys=[key], args=[value or "", actual])
+        return fixed
+    
+    for key in redis_client.scan_iter(match=f"{UNREAD_COUNTER_PREFIX}*", count=batch_size):
+        if key.endswith(UNREAD_STALE_SUFFIX):
+            continue
+        batch.append(key)
+        if len(batch) >= batch_size:
+            corrected += reconcile_batch(batch)
+            batch = []
+    if batch:
+        corrected += reconcile_batch(batch)
+    
+    return corrected
+
+
+def get_payloads(db: Session, payload_ids: Iterable[str]) -> Dict[str, Dict]:
+    """
+    Load shared notification payloads by ID (cached - payloads are immutable)
+    
+    Returns:
+        Dict mapping payload ID to payload data
+    """
+    payloads = {}
+    missing = []
+    for payload_id in set(payload_ids):
+        cached = get_cache(f"notifications:payload:{payload_id}")
+        if cached is not None:
+            payloads[payload_id] = cached
+        else:
+            missing.append(payload_id)
+    
+    if missing:
+        for payload in db.query(NotificationPayload).filter(NotificationPayload.id.in_(missing)).all():
+            payloads[payload.id] = payload.data
+            set_cache(f"notifications:payload:{payload.id}", payload.data, ttl=PAYLOAD_CACHE_TTL)
+    
+    return payloads
+
+
+def render_notification(notification: Notification, payload: Optional[Dict] = None) -> Dict:
+    """
+    Serialize a notification, rendering templated rows from their payload
+    
+    Returns:
+        NotificationResponse as a dict
+    """
+    message = notification.message
+    metadata = notification.meta_data or {}
+    
+    template = NOTIFICATION_TEMPLATES.get(notification.type)
+    if notification.payload_id and template and payload is not None:
+        metadata = dict(payload)
+        metadata["forecast_points"] = notification.forecast_points
+        if notification.type == "forecast_won":
+            metadata["chips_gained"] = notification.chips_amount
+            metadata["reward_amount"] = notification.reward_amount
+        elif notification.type == "forecast_lost":
+            metadata["chips_lost"] = notification.chips_amount
+        message = template.format(**metadata)
+    
+    return NotificationResponse(
+        id=notification.id,
+        user_id=notification.user_id,
+        type=notification.type,
+        message=message or "",
+        read=notification.read,
+        meta_data=metadata,
+        created_at=notification.created_at,
+    ).model_dump()
 
 
 def get_notifications(
@@ -256,12 +611,14 @@ def get_notifications(
     page: int = 1,
     limit: int = 20,
     notification_type: Optional[str] = None
-) -> tuple[List[Notification], int]:
+) -> tuple[List[Dict], int]:
     """
     Get notifications for a user with pagination
     
+    Templated notifications are rendered here from their shared payloads.
+    
     Returns:
-        Tuple of (notifications list, total count)
+        Tuple of (rendered notifications list, total count)
     """
     query = db.query(Notification).filter(Notification.user_id == user_id)
     
@@ -278,7 +635,10 @@ def get_notifications(
     offset = (page - 1) * limit
     notifications = query.order_by(desc(Notification.created_at)).offset(offset).limit(limit).all()
     
-    return notifications, total
+    payloads = get_payloads(db, (n.payload_id for n in notifications if n.payload_id))
+    rendered = [render_notification(n, payloads.get(n.payload_id)) for n in notifications]
+    
+    return rendered, total
 
 
 def mark_as_read(db: Session, notification_id: str, user_id: str) -> bool:
@@ -296,10 +656,12 @@ def mark_as_read(db: Session, notification_id: str, user_id: str) -> bool:
     if not notification:
         return False
     
-    notification.read = True
+    if not notification.read:
+        notification.read = True
+        _queue_unread_decrement(db, user_id)
+        _queue_push_event(db, [user_id], {"type": "unread_count"})
     
     # Invalidate cache
-    delete_cache(f"notifications:unread_count:{user_id}")
     delete_cache(f"notifications:recent:{user_id}")
     
     return True
@@ -317,8 +679,9 @@ def mark_all_as_read(db: Session, user_id: str) -> int:
         Notification.read == False
     ).update({"read": True}, synchronize_session=False)
     
-    # Invalidate cache
-    delete_cache(f"notifications:unread_count:{user_id}")
+    # Counter goes to zero on commit; invalidate cache
+    _queue_unread_reset(db, user_id)
+    _queue_push_event(db, [user_id], {"type": "unread_count"})
     delete_cache(f"notifications:recent:{user_id}")
     
     return count
@@ -0,0 +1,191 @@
+"""
+Partition maintenance service
+
+activities and notifications are range-partitioned by created_at, one
+partition per month (e.g. activities_y2026m01). This service creates upcoming
+partitions ahead of time and detaches expired ones, which are either moved to
+the archive schema or dropped - no DELETE scans over large tables.
+
+Each table also has a DEFAULT partition (e.g. activities_default), so inserts
+never fail if maintenance falls behind. Rows that land there are moved into
+their monthly partitions when those are created.
+"""
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+ARCHIVE_SCHEMA = "archive"
+PARTITION_NAME_RE = re.compile(r"^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$")
+
+
+def get_retention_policy() -> Dict[str, int]:
+    """Retention in months for each partitioned table"""
+    return {
+        "activities": settings.ACTIVITY_RETENTION_MONTHS,
+        "notifications": settings.NOTIFICATION_RETENTION_MONTHS,
+    }
+
+
+def month_start(value: date) -> date:
+    """First day of the month containing value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Shift a month start by a number of months"""
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, start: date) -> str:
+    """Partition table name for the month starting at start"""
+    return f"{table}_y{start.year:04d}m{start.month:02d}"
+
+
+def parse_partition_month(name: str) -> Optional[date]:
+    """Month start encoded in a partition name (None if not a monthly partition)"""
+    match = PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group("year")), int(match.group("month")), 1)
+
+
+def default_partition_name(table: str) -> str:
+    """DEFAULT partition catching rows outside every monthly partition"""
+    return f"{table}_default"
+
+
+def create_partition(db: Session, table: str, start: date) -> str:
+    """
+    Create the monthly partition starting at start (no-op if it exists)
+    
+    Postgres refuses to create a partition for rows already in the DEFAULT
+    partition, so any such rows are moved into the new partition before it is
+    attached.
+    """
+    name = partition_name(table, start)
+    end = add_months(start, 1)
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return name
+    
+    default = default_partition_name(table)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    has_default = db.execute(text("SELECT to_regclass(:name)"), {"name": default}).scalar() is not None
+    in_range = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+    if has_default and db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})")).scalar():
+        db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        db.execute(text(
+            f"WITH moved AS (DELETE FROM {default} WHERE {in_range} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ))
+        db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+    else:
+        db.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+    return name
+
+
+def default_partition_months(db: Session, table: str) -> List[date]:
+    """Months with rows in the DEFAULT partition (maintenance fell behind)"""
+    default = default_partition_name(table)
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": default}).scalar() is None:
+        return []
+    rows = db.execute(text(
+        f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {default}"
+    )).fetchall()
+    return sorted(row[0] for row in rows)
+
+
+def list_partitions(db: Session, table: str) -> List[str]:
+    """Names of partitions currently attached to table"""
+    rows = db.execute(text(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+        JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+        WHERE parent.relname = :table
+        ORDER BY child.relname
+        """
+    ), {"table": table}).fetchall()
+    return [row[0] for row in rows]
+
+
+def ensure_partitions(
+    db: Session,
+    table: str,
+    months_ahead: Optional[int] = None,
+    today: Optional[date] = None
+) -> List[str]:
+    """
+    Make sure partitions exist for the current month and the next months_ahead
+    
+    Months with rows in the DEFAULT partition get their partitions too, so
+    the rows move out of it (and later expire like any other month).
+    
+    Returns:
+        Names of the partitions that were checked/created
+    """
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_PRECREATE_MONTHS
+    current = month_start(today or datetime.now(timezone.utc).date())
+    months = [add_months(current, i) for i in range(months_ahead + 1)]
+    months += [month for month in default_partition_months(db, table) if month not in months]
+    return [create_partition(db, table, month) for month in months]
+
+
+def expire_partitions(
+    db: Session,
+    table: str,
+    retention_months: int,
+    archive: Optional[bool] = None,
+    today: Optional[date] = None
+) -> List[str]:
+    """
+    Detach partitions that are entirely older than the retention window
+    
+    Detached partitions are moved to the archive schema (for pg_dump/offload)
+    or dropped, depending on settings.PARTITION_ARCHIVE_EXPIRED.
+    
+    Returns:
+        Names of the expired partitions
+    """
+    if archive is None:
+        archive = settings.PARTITION_ARCHIVE_EXPIRED
+    cutoff = add_months(month_start(today or datetime.now(timezone.utc).date()), -retention_months)
+    
+    expired = []
+    for name in list_partitions(db, table):
+        start = parse_partition_month(name)
+        if start is None or add_months(start, 1) > cutoff:
+            continue
+        
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if archive:
+            db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            db.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        else:
+            db.execute(text(f"DROP TABLE {name}"))
+        expired.append(name)
+    
+    return expired
+
+
+def run_partition_maintenance(db: Session) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Create upcoming partitions and expire old ones for all partitioned tables
+    
+    Returns:
+        Per-table dict of ensured and expired partition names
+    """
+    results = {}
+    for table, retention_months in get_retention_policy().items():
+        results[table] = {
+            "ensured": ensure_partitions(db, table),
+            "expired": expire_partitions(db, table, retention_months),
+        }
+    db.commit()
+    return results
@@ -0,0 +1,221 @@
+"""
+Quota service (per-user write limits on Redis counters)
+
+Quotas are checked and consumed atomically in Redis, so write endpoints do
+not COUNT or SUM their own tables on every request. The database is queried
+only when Redis is unavailable.
+
+Fixed windows are aligned to the epoch (daily quotas reset at 00:00 UTC).
+Sliding windows weight the previous fixed window by how much of it still
+overlaps the sliding window, which smooths bursts across window edges
+without storing one entry per request.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.forecast import Forecast
+from app.models.purchase import Purchase
+from app.utils.cache import redis_client
+
+
+class Quota(NamedTuple):
+    """A limit of `limit` units per window of `window_seconds`"""
+    name: str
+    limit: int
+    window_seconds: int
+    sliding: bool = False
+
+
+class QuotaExceeded(NamedTuple):
+    """The quota that refused a consume, and its usage at that moment"""
+    quota: Quota
+    used: int
+
+    @property
+    def remaining(self) -> int:
+        return max(self.quota.limit - self.used, 0)
+
+
+# Forecast and purchase quotas
+FORECASTS_PER_MINUTE = Quota("forecasts_minute", 10, 60, sliding=True)
+FORECASTS_PER_DAY = Quota("forecasts_day", 50, 86400)
+PURCHASE_CHIPS_PER_DAY = Quota("purchase_chips_day", 500000, 86400)  # ₱500,000 per day
+
+# Checked in this order: a burst reports the per-minute limit first
+FORECAST_QUOTAS = (FORECASTS_PER_MINUTE, FORECASTS_PER_DAY)
+
+
+# All-or-nothing consume across several quotas.
+# KEYS: current and previous window counter per quota.
+# ARGV: amount, then limit, TTL and previous-window weight per quota.
+# Returns {index, used} of the first exceeded quota (1-based), or {0, 0}.
+_consume_script = redis_client.register_script("""
+local amount = tonumber(ARGV[1])
+local quotas = #KEYS / 2
+for i = 1, quotas do
+    local limit = tonumber(ARGV[i * 3 - 1])
+    local weight = tonumber(ARGV[i * 3 + 1])
+    local used = tonumber(redis.call('GET', KEYS[i * 2 - 1]) or '0')
+    if weight > 0 then
+        used = used + math.floor(tonumber(redis.call('GET', KEYS[i * 2]) or '0') * weight)
+    end
+    if used + amount > limit then
+        return {i, used}
+    end
+end
+for i = 1, quotas do
+    local key = KEYS[i * 2 - 1]
+    redis.call('INCRBY', key, amount)
+    if redis.call('TTL', key) < 0 then
+        redis.call('EXPIRE', key, ARGV[i * 3])
+    end
+end
+return {0, 0}
+""")
+
+
+def _window_key(quota: Quota, subject: str, window: int) -> str:
+    return f"quota:{quota.name}:{subject}:{window}"
+
+
+def consume_quotas(
+    subject: str,
+    quotas: Sequence[Quota],
+    amount: int = 1,
+    fallback: Optional[Callable[[], Optional[QuotaExceeded]]] = None
+) -> Optional[QuotaExceeded]:
+    """
+    Consume `amount` from every quota, or from none if any would be exceeded
+
+    Args:
+        subject: Whose quota (e.g. user ID)
+        quotas: Quotas to consume together
+        amount: Units to consume
+        fallback: Database check used only when Redis is unavailable; without
+            one the check fails open
+
+    Returns:
+        QuotaExceeded for the first quota that refused, or None if consumed
+    """
+    now = time.time()
+    keys = []
+    args = [amount]
+    for quota in quotas:
+        window, offset = divmod(now, quota.window_seconds)
+        keys.append(_window_key(quota, subject, int(window)))
+        keys.append(_window_key(quota, subject, int(window) - 1))
+        if quota.sliding:
+            # The previous window is still needed while it overlaps the sliding window
+            args.extend([quota.limit, quota.window_seconds * 2, 1 - offset / quota.window_seconds])
+        else:
+            args.extend([quota.limit, quota.window_seconds, 0])
+
+    try:
+        index, used = _consume_script(keys=keys, args=args)
+    except Exception:
+        return fallback() if fallback else None
+
+    return QuotaExceeded(quotas[index - 1], used) if index else None
+
+
+def release_quotas(
+    subject: str,
+    quotas: Sequence[Quota],
+    amount: int = 1,
+    consumed_at: Optional[datetime] = None
+) -> None:
+    """
+    Give back units for a write that did not go through
+
+    Args:
+        consumed_at: When the units were consumed (default: now); releases
+            into a window that has already expired are no-ops
+    """
+    at = consumed_at.timestamp() if consumed_at else time.time()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for quota in quotas:
+            key = _window_key(quota, subject, int(at // quota.window_seconds))
+            # Only decrement counters that still exist, never recreate one without a TTL
+            pipe.eval(
+                "if redis.call('EXISTS', KEYS[1]) == 1 then return redis.call('DECRBY', KEYS[1], ARGV[1]) end return 0",
+                1, key, amount,
+            )
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def consume_forecast_quota(db: Session, user_id: str) -> Optional[QuotaExceeded]:
+    """Consume one forecast from the per-minute and daily quotas"""
+    return consume_quotas(
+        user_id,
+        FORECAST_QUOTAS,
+        fallback=lambda: _count_forecast_usage(db, user_id),
+    )
+
+
+def release_forecast_quota(user_id: str) -> None:
+    release_quotas(user_id, FORECAST_QUOTAS)
+
+
+def consume_purchase_quota(db: Session, user_id: str, chips: int) -> Optional[QuotaExceeded]:
+    """
+    Reserve chips against the daily purchase limit
+
+    Checkout reserves the chips so concurrent checkouts cannot together
+    exceed the limit; release the reservation when a payment fails. A
+    checkout abandoned without a failure webhook keeps its reservation only
+    until the day's window ends (the counter expires at 00:00 UTC). The
+    database fallback counts completed purchases only, like the limit itself.
+    """
+    return consume_quotas(
+        user_id,
+        (PURCHASE_CHIPS_PER_DAY,),
+        amount=chips,
+        fallback=lambda: _sum_purchase_usage(db, user_id, chips),
+    )
+
+
+def release_purchase_quota(user_id: str, chips: int, reserved_at: Optional[datetime] = None) -> None:
+    release_quotas(user_id, (PURCHASE_CHIPS_PER_DAY,), amount=chips, consumed_at=reserved_at)
+
+
+def _today_start() -> datetime:
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _count_forecast_usage(db: Session, user_id: str) -> Optional[QuotaExceeded]:
+    """Database check of the forecast quotas (Redis unavailable)"""
+    one_minute_ago = datetime.utcnow() - timedelta(seconds=FORECASTS_PER_MINUTE.window_seconds)
+    today_start = _today_start()
+    today_forecasts, recent_forecasts = db.query(
+        func.count(Forecast.id).filter(Forecast.created_at >= today_start),
+        func.count(Forecast.id).filter(Forecast.created_at >= one_minute_ago),
+    ).filter(
+        Forecast.user_id == user_id,
+        Forecast.created_at >= min(today_start, one_minute_ago),
+    ).one()
+
+    if recent_forecasts >= FORECASTS_PER_MINUTE.limit:
+        return QuotaExceeded(FORECASTS_PER_MINUTE, recent_forecasts)
+    if today_forecasts >= FORECASTS_PER_DAY.limit:
+        return QuotaExceeded(FORECASTS_PER_DAY, today_forecasts)
+    return None
+
+
+def _sum_purchase_usage(db: Session, user_id: str, chips: int) -> Optional[QuotaExceeded]:
+    """Database check of the daily purchase limit (Redis unavailable): chips bought today"""
+    today_total = db.query(func.coalesce(func.sum(Purchase.chips_added), 0)).filter(
+        Purchase.user_id == user_id,
+        Purchase.status == "completed",
+        Purchase.created_at >= _today_start(),
+    ).scalar()
+
+    if today_total + chips > PURCHASE_CHIPS_PER_DAY.limit:
+        return QuotaExceeded(PURCHASE_CHIPS_PER_DAY, today_total)
+    return None
@@ -0,0 +1,212 @@
+"""
+Realtime push service
+
+Write paths publish small JSON events to Redis pub/sub channels after their
+transaction commits. Each API process holds a single subscriber connection and
+fans messages out to the Server-Sent Events streams connected to it, so the
+number of Redis connections does not grow with the number of viewers.
+"""
+import asyncio
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+import redis.asyncio as aioredis
+
+from app.config import settings
+from app.utils.cache import redis_client
+
+PUBLISH_PIPELINE_SIZE = 10000
+
+# Response headers for event streams: no caching and no proxy buffering
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+# Sentinel pushed to subscriber queues when the Redis connection is lost
+STREAM_CLOSED = object()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def user_channel(user_id: str) -> str:
+    return f"notifications:user:{user_id}"
+
+
+def publish_events(events: Iterable[Tuple[Iterable[str], Dict]], batch_size: int = PUBLISH_PIPELINE_SIZE) -> int:
+    """
+    Publish events with pipelined PUBLISH commands (fail open if Redis is down)
+
+    Args:
+        events: (channels, message) pairs; the message is encoded once per pair
+        batch_size: Commands per pipeline round trip
+
+    Returns:
+        Number of messages published
+    """
+    published = 0
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        queued = 0
+        for channels, message in events:
+            data = json.dumps(message, default=_json_default)
+            for channel in channels:
+                pipe.publish(channel, data)
+                queued += 1
+                if queued >= batch_size:
+                    pipe.execute()
+                    published += queued
+                    queued = 0
+        if queued:
+            pipe.execute()
+            published += queued
+    except Exception:
+        pass
+    return published
+
+
+def format_sse(data: Dict, event: Optional[str] = None) -> str:
+    """Encode one Server-Sent Events message"""
+    message = f"data: {json.dumps(data, default=_json_default)}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
+
+
+def offer(queue: asyncio.Queue, data) -> None:
+    """Enqueue without blocking; a slow client loses its oldest event"""
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(data)
+
+
+class PubSubBroker:
+    """Per-process Redis subscriber shared by all connected streams"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._redis: Optional[aioredis.Redis] = None
+        self._pubsub = None
+        self._queues: Dict[str, Set[asyncio.Queue]] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        """Async client for reads alongside the stream (e.g. current counters)"""
+        if self._redis is None:
+            self._redis = aioredis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                decode_responses=True
+            )
+        return self._redis
+
+    async def subscribe(self, channel: str) -> asyncio.Queue:
+        """Register a local queue for a channel, subscribing in Redis on first use"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            listeners = self._queues.setdefault(channel, set())
+            if not listeners:
+                try:
+                    await self._pubsub.subscribe(channel)
+                except Exception:
+                    del self._queues[channel]
+                    raise
+            listeners.add(queue)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+        return queue
+
+    async def unsubscribe(self, channel: str, queue: asyncio.Queue) -> None:
+        """Drop a local queue, unsubscribing in Redis when it was the last one"""
+        async with self._lock:
+            listeners = self._queues.get(channel)
+            if listeners is None:
+                return
+            listeners.discard(queue)
+            if not listeners:
+                del self._queues[channel]
+                if self._pubsub is not None:
+                    try:
+                        await self._pubsub.unsubscribe(channel)
+                    except Exception:
+                        pass
+
+    async def listen(self, channel: str, keepalive: float) -> AsyncIterator[Optional[str]]:
+        """
+        Yield raw messages published to a channel
+
+        Yields None every `keepalive` seconds without traffic so callers can
+        send a ping. Ends when the Redis connection is lost; clients reconnect.
+        """
+        queue = await self.subscribe(channel)
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if data is STREAM_CLOSED:
+                    return
+                yield data
+        finally:
+            await self.unsubscribe(channel, queue)
+
+    async def _read(self) -> None:
+        while self._queues:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await self._reset()
+                return
+            if message is None or message.get("type") != "message":
+                continue
+            for queue in tuple(self._queues.get(message["channel"], ())):
+                offer(queue, message["data"])
+
+    async def _reset(self) -> None:
+        """Close every stream so clients reconnect against a fresh subscription"""
+        async with self._lock:
+            for listeners in self._queues.values():
+                for queue in listeners:
+                    offer(queue, STREAM_CLOSED)
+            self._queues.clear()
+            pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.close()
+            except Exception:
+                pass
+
+    async def close(self) -> None:
+        """Stop the reader and release Redis connections (application shutdown)"""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        await self._reset()
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+
+broker = PubSubBroker(queue_size=settings.STREAM_QUEUE_SIZE)
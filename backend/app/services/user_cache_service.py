@@ -0,0 +1,85 @@
+"""
+Authenticated-user cache
+
+Auth dependencies only need a user's status flags on most requests. The
+flags are cached in a small per-process LRU in front of Redis, so requests
+authenticate without querying users. Write paths that change them queue an
+invalidation, applied once their transaction commits.
+"""
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+from app.models.user import User
+from app.utils.cache import LocalTTLCache, get_cache, redis_client, set_cache
+
+# User fields needed to authorize a request
+AUTH_FIELDS = ("is_active", "is_banned", "is_admin", "is_market_moderator", "chips_frozen")
+
+
+_local_cache = LocalTTLCache(settings.AUTH_USER_LOCAL_CACHE_SIZE, settings.AUTH_USER_LOCAL_TTL_SECONDS)
+
+
+def _cache_key(user_id: str) -> str:
+    return f"auth_user:{user_id}"
+
+
+def get_auth_fields(db: Session, user_id: str) -> Optional[Dict]:
+    """
+    A user's auth flags: local LRU, then Redis, then the database
+
+    Returns:
+        Dict of AUTH_FIELDS, or None if the user does not exist
+    """
+    fields = _local_cache.get(user_id)
+    if fields is not None:
+        return fields
+
+    fields = get_cache(_cache_key(user_id))
+    if fields is None:
+        row = db.query(*[getattr(User, name) for name in AUTH_FIELDS]).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        fields = dict(row._mapping)
+        set_cache(_cache_key(user_id), fields, ttl=settings.AUTH_USER_CACHE_TTL_SECONDS)
+
+    _local_cache.set(user_id, fields)
+    return fields
+
+
+def attach_user(db: Session, user_id: str, fields: Dict) -> User:
+    """
+    A User in `db` with only the cached fields loaded
+
+    The instance behaves like a queried user: any other attribute loads the
+    row on first access, and changes are flushed as usual.
+    """
+    user = User(id=user_id, **fields)
+    make_transient_to_detached(user)
+    db.add(user)
+    return user
+
+
+def invalidate_cached_user(db: Session, user_id: str) -> None:
+    """Drop a user's cached auth flags once the session commits"""
+    db.info.setdefault("auth_user_invalidations", set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_users_after_commit(session: Session) -> None:
+    user_ids = session.info.pop("auth_user_invalidations", None)
+    if not user_ids:
+        return
+    for user_id in user_ids:
+        _local_cache.delete(user_id)
+    try:
+        redis_client.delete(*[_cache_key(user_id) for user_id in user_ids])
+    except Exception:
+        pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_invalidations(session: Session) -> None:
+    session.info.pop("auth_user_invalidations", None)
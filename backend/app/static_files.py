@@ -0,0 +1,153 @@
+"""
+Serving uploaded files
+"""
+import os
+import re
+from email.utils import parsedate
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# Upload filenames are random and never reused for different content, so
+# browsers and CDNs can keep them for a year without revalidating
+UPLOAD_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etags(header: str) -> list:
+    """Entity tags listed in an If-None-Match header"""
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+class FileRangeResponse(Response):
+    """206 response with a single byte range of a file, streamed in chunks"""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, start: int, end: int, size: int, headers: Headers, method: str):
+        super().__init__(status_code=206, headers=headers)
+        self.path = path
+        self.start = start
+        self.end = end
+        self.send_body = method.upper() != "HEAD"
+        self.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        self.headers["Content-Length"] = str(end - start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File was truncated while streaming; end the response
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class UploadStaticFiles(StaticFiles):
+    """
+    StaticFiles for /uploads with long-lived caching and byte ranges
+
+    Adds Cache-Control (UPLOAD_CACHE_CONTROL) and Accept-Ranges to every file,
+    answers conditional requests with 304 (If-None-Match lists and `*`, taking
+    precedence over If-Modified-Since) and serves single `Range` requests as
+    206, honouring If-Range. Multiple ranges get the whole file.
+    """
+
+    def file_response(
+        self,
+        full_path: "os.PathLike[str] | str",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        method = scope["method"]
+        request_headers = Headers(scope=scope)
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, method=method)
+        if status_code != 200:
+            return response
+        response.headers["Cache-Control"] = UPLOAD_CACHE_CONTROL
+        response.headers["Accept-Ranges"] = "bytes"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        if "range" not in request_headers or not self._if_range_matches(response.headers, request_headers):
+            return response
+
+        size = stat_result.st_size
+        byte_range = self._parse_range(request_headers["range"], size)
+        if byte_range is None:
+            return response
+        start, end = byte_range
+        if start >= size:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        return FileRangeResponse(str(full_path), start, end, size, response.headers, method)
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        etag = response_headers.get("etag")
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            tags = _etags(if_none_match)
+            return etag is not None and ("*" in tags or _strip_weak(etag) in map(_strip_weak, tags))
+
+        if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+        last_modified = parsedate(response_headers.get("last-modified", ""))
+        return if_modified_since is not None and last_modified is not None and if_modified_since >= last_modified
+
+    @staticmethod
+    def _if_range_matches(response_headers: Headers, request_headers: Headers) -> bool:
+        """Whether a Range request may be served partially (If-Range still current)"""
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        if if_range.startswith(('"', "W/")):
+            # Strong comparison: weak tags never match
+            return not if_range.startswith("W/") and if_range == response_headers.get("etag")
+        return if_range == response_headers.get("last-modified")
+
+    @staticmethod
+    def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+        """
+        A single `bytes=` range as inclusive (start, end)
+
+        Returns:
+            None for malformed or multi-range headers (serve the whole file)
+        """
+        match = _BYTE_RANGE.match(header.strip())
+        if match is None:
+            return None
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                return size, size - 1
+            return max(size - length, 0), size - 1
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+        return start, end
@@ -2,12 +2,14 @@
 Celery application configuration
 """
 from celery import Celery
+from celery.schedules import crontab
 from app.config import settings
 
 celery_app = Celery(
     "ACBMarket",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.notification_tasks", "app.tasks.maintenance_tasks"],
 )
 
 celery_app.conf.update(
@@ -16,5 +18,28 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    beat_schedule={
+        # Keep monthly partitions of activities/notifications ahead of time
+        # and archive the ones past retention
+        "maintain-partitions": {
+            "task": "maintain_partitions",
+            "schedule": crontab(hour=3, minute=0),
+        },
+        # Correct drift in the Redis unread notification counters
+        "reconcile-unread-counts": {
+            "task": "reconcile_unread_counts",
+            "schedule": crontab(minute="*/10"),
+        },
+        # Checkpoint chip balances from the ledger
+        "snapshot-chip-balances": {
+            "task": "snapshot_chip_balances",
+            "schedule": crontab(minute=15),
+        },
+        # Remove uploaded images that are no longer referenced
+        "collect-orphaned-images": {
+            "task": "collect_orphaned_images",
+            "schedule": crontab(hour=4, minute=0),
+        },
+    },
 )
 
@@ -0,0 +1,73 @@
+"""
+Celery tasks for periodic database maintenance
+"""
+from celery import shared_task
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.services.partition_service import run_partition_maintenance
+from app.services.chip_service import take_balance_snapshots, find_balance_mismatches
+from app.services.image_service import collect_orphaned_images
+
+
+@shared_task(name="maintain_partitions")
+def maintain_partitions():
+    """
+    Create upcoming monthly partitions and archive/drop expired ones
+    
+    Scheduled daily via Celery beat; safe to run repeatedly.
+    """
+    db: Session = SessionLocal()
+    try:
+        results = run_partition_maintenance(db)
+        return results
+    except Exception as e:
+        db.rollback()
+        # Log error (in production, use proper logging)
+        print(f"Error maintaining partitions: {e}")
+        raise
+    finally:
+        db.close()
+
+
+@shared_task(name="snapshot_chip_balances")
+def snapshot_chip_balances():
+    """
+    Checkpoint chip balances from the ledger and report balance drift
+    
+    Scheduled hourly via Celery beat; users without new ledger entries keep
+    their previous snapshot.
+    """
+    db: Session = SessionLocal()
+    try:
+        snapshots = take_balance_snapshots(db)
+        mismatches = find_balance_mismatches(db)
+        if mismatches:
+            # Log error (in production, use proper logging)
+            print(f"Chip balance mismatches against ledger: {mismatches}")
+        return {"snapshots": snapshots, "mismatches": len(mismatches)}
+    except Exception as e:
+        db.rollback()
+        # Log error (in production, use proper logging)
+        print(f"Error taking chip balance snapshots: {e}")
+        raise
+    finally:
+        db.close()
+
+
+@shared_task(name="collect_orphaned_images")
+def collect_orphaned_images_task():
+    """
+    Delete uploaded images no market or user references any more
+    
+    Scheduled daily via Celery beat; safe to run repeatedly.
+    """
+    db: Session = SessionLocal()
+    try:
+        return collect_orphaned_images(db)
+    except Exception as e:
+        db.rollback()
+        # Log error (in production, use proper logging)
+        print(f"Error collecting orphaned images: {e}")
+        raise
+    finally:
+        db.close()
@@ -5,7 +5,7 @@ Used for large-scale notification creation to avoid blocking API requests
 from celery import shared_task
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
-from app.services.notification_service import create_forecast_result_notifications
+from app.services.notification_service import create_forecast_result_notifications, reconcile_unread_counters
 
 
 @shared_task(name="create_notifications_async")
@@ -46,3 +46,21 @@ def create_notifications_async(
         raise
     finally:
         db.close()
+
+
+@shared_task(name="reconcile_unread_counts")
+def reconcile_unread_counts():
+    """
+    Periodic task to correct Redis unread counters that drifted from the database
+    
+    Scheduled via Celery beat.
+    """
+    db: Session = SessionLocal()
+    try:
+        return reconcile_unread_counters(db)
+    except Exception as e:
+        # Log error (in production, use proper logging)
+        print(f"Error reconciling unread counts: {e}")
+        raise
+    finally:
+        db.close()
@@ -3,7 +3,10 @@ Redis cache utilities
 """
 import redis
 import json
-from typing import Optional, Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Any, Iterable
 from app.config import settings
 
 redis_client = redis.Redis(
@@ -43,6 +46,29 @@ def delete_cache(key: str) -> bool:
         return False
 
 
+def delete_cache_keys(keys: Iterable[str], chunk_size: int = 1000) -> bool:
+    """
+    Delete many keys with pipelined multi-key UNLINKs
+    
+    Keys are sent chunk_size at a time in a single pipeline (one round trip),
+    and UNLINK frees memory asynchronously so Redis is not blocked.
+    """
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        chunk = []
+        for key in keys:
+            chunk.append(key)
+            if len(chunk) >= chunk_size:
+                pipe.unlink(*chunk)
+                chunk = []
+        if chunk:
+            pipe.unlink(*chunk)
+        pipe.execute()
+        return True
+    except Exception:
+        return False
+
+
 def delete_cache_pattern(pattern: str) -> bool:
     """Delete all keys matching pattern"""
     try:
@@ -53,3 +79,44 @@ def delete_cache_pattern(pattern: str) -> bool:
     except Exception:
         return False
 
+
+
+def increment_cache(key: str, amount: int = 1) -> Optional[int]:
+    """Atomically increment an integer counter, returning the new value"""
+    try:
+        return redis_client.incrby(key, amount)
+    except Exception:
+        return None
+
+
+class LocalTTLCache:
+    """Thread-safe LRU with a per-entry TTL (sync dependencies run in a threadpool)"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
@@ -0,0 +1,33 @@
+"""
+JSON responses
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    """Types orjson does not serialize natively, encoded like jsonable_encoder"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    orjson response, the app's default response class
+
+    Endpoints that return a dict still go through response_model validation
+    and jsonable_encoder. Hot endpoints build plain dicts (datetimes included)
+    and return this response directly, which skips both.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
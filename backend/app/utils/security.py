@@ -1,15 +1,39 @@
 """
 Security utilities
 """
+import asyncio
+import hashlib
 import secrets
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from app.config import settings
+from app.utils.cache import LocalTTLCache, redis_client
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+DEFAULT_KID = "default"
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+# Argon2 releases the GIL, so a small dedicated pool hashes in parallel without
+# blocking the event loop or taking threads from the shared threadpool
+_password_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+
+# Recently verified token payloads by SHA-256 digest of the token
+_verified_tokens = LocalTTLCache(settings.JWT_VERIFY_CACHE_SIZE, settings.JWT_VERIFY_CACHE_SECONDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -22,6 +46,49 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password in the password hashing pool
+    
+    Returns:
+        (valid, new_hash) - new_hash is set when the stored hash uses outdated
+        Argon2 parameters and should replace it
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the password hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_hash_executor, pwd_context.hash, password)
+
+
+def _signing_keys() -> Dict[str, str]:
+    """Active JWT keys by kid (SECRET_KEY alone when no keys are configured)"""
+    return settings.JWT_SIGNING_KEYS or {DEFAULT_KID: settings.SECRET_KEY}
+
+
+def _active_kid() -> str:
+    keys = _signing_keys()
+    return settings.JWT_ACTIVE_KID if settings.JWT_ACTIVE_KID in keys else next(iter(keys))
+
+
+def _verification_key(kid: Optional[str]) -> Optional[str]:
+    # Tokens issued before key ids existed carry no kid and were signed with SECRET_KEY
+    if kid is None:
+        return settings.SECRET_KEY
+    return _signing_keys().get(kid)
+
+
+def _encode_token(to_encode: dict) -> str:
+    kid = _active_kid()
+    to_encode.update({"iat": datetime.utcnow(), "jti": uuid.uuid4().hex})
+    return jwt.encode(to_encode, _signing_keys()[kid], algorithm=settings.ALGORITHM, headers={"kid": kid})
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -30,8 +97,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return _encode_token(to_encode)
 
 
 def create_refresh_token(data: dict) -> str:
@@ -39,17 +105,97 @@ def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return _encode_token(to_encode)
+
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _revoked_token_key(jti: str) -> str:
+    return f"jwt:revoked:{jti}"
+
+
+def _revoked_before_key(user_id: str) -> str:
+    return f"jwt:revoked_before:{user_id}"
+
+
+def is_token_revoked(payload: dict) -> bool:
+    """
+    Check the token and its user against the revocation keys (one MGET)
+    
+    Fails open when Redis is unavailable, like the rest of the cache layer.
+    """
+    try:
+        revoked, revoked_before = redis_client.mget(
+            _revoked_token_key(payload.get("jti", "")),
+            _revoked_before_key(payload.get("sub", "")),
+        )
+    except Exception:
+        return False
+    if revoked:
+        return True
+    return bool(revoked_before) and payload.get("iat", 0) < int(revoked_before)
 
 
 def decode_token(token: str) -> dict:
-    """Decode JWT token"""
+    """
+    Decode and verify a JWT
+    
+    Verified payloads are cached by token digest for JWT_VERIFY_CACHE_SECONDS,
+    so repeat requests skip signature verification and the revocation
+    lookup. Revocations reach other processes within that interval.
+    """
+    digest = _token_digest(token)
+    payload = _verified_tokens.get(digest)
+    if payload is not None:
+        return payload if payload.get("exp", 0) > time.time() else {}
+    
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        key = _verification_key(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            return {}
+        payload = jwt.decode(token, key, algorithms=[settings.ALGORITHM])
     except JWTError:
         return {}
+    
+    if is_token_revoked(payload):
+        return {}
+    _verified_tokens.set(digest, payload)
+    return payload
+
+
+def revoke_token(token: str) -> bool:
+    """
+    Revoke a single token until it expires
+    
+    Returns:
+        True if the token was valid and is now revoked
+    """
+    payload = decode_token(token)
+    if not payload or "jti" not in payload:
+        return False
+    ttl = int(payload["exp"] - time.time())
+    _verified_tokens.delete(_token_digest(token))
+    if ttl <= 0:
+        return True
+    try:
+        redis_client.setex(_revoked_token_key(payload["jti"]), ttl, 1)
+    except Exception:
+        return False
+    return True
+
+
+def revoke_user_tokens(user_id: str) -> None:
+    """Revoke every token issued to a user so far (e.g. password reset, ban)"""
+    try:
+        redis_client.setex(
+            _revoked_before_key(user_id),
+            timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            int(time.time()),
+        )
+    except Exception:
+        pass
 
 
 def generate_reset_token() -> str:
@@ -0,0 +1,91 @@
+"""
+Benchmark: login throughput under concurrency
+
+Runs N concurrent logins (Argon2 verification with the configured
+parameters) on one event loop, next to a probe that measures how long other
+requests wait for the loop, for:
+- inline: verify_password called in the coroutine (blocks the loop)
+- pool: verify_password_async (password hashing thread pool)
+
+No database or Redis is needed; login is reduced to its password check.
+
+Usage:
+    python -m benchmarks.bench_login [concurrency...]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from app.config import settings
+from app.utils.security import get_password_hash, verify_password, verify_password_async
+
+DEFAULT_CONCURRENCY = [1, 8, 32, 128]
+LOGINS_PER_CLIENT = 4
+PROBE_INTERVAL = 0.005
+
+
+async def login_inline(password: str, hashed: str) -> None:
+    assert verify_password(password, hashed)
+
+
+async def login_pool(password: str, hashed: str) -> None:
+    valid, _ = await verify_password_async(password, hashed)
+    assert valid
+
+
+async def probe_loop_lag(stop: asyncio.Event, lags: list) -> None:
+    """Stand-in for other requests: how late a short sleep wakes up"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def run(login, concurrency: int, password: str, hashed: str):
+    async def client():
+        for _ in range(LOGINS_PER_CLIENT):
+            await login(password, hashed)
+
+    stop = asyncio.Event()
+    lags = []
+    probe = asyncio.create_task(probe_loop_lag(stop, lags))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    return concurrency * LOGINS_PER_CLIENT / elapsed, lags
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main(levels: list) -> None:
+    password = "correct horse battery staple"
+    hashed = get_password_hash(password)
+    print(
+        f"Argon2id t={settings.ARGON2_TIME_COST} m={settings.ARGON2_MEMORY_COST}KiB "
+        f"p={settings.ARGON2_PARALLELISM}, pool workers={settings.PASSWORD_HASH_WORKERS}"
+    )
+    print(f"{'mode':<8}{'clients':>8}{'logins/s':>12}{'loop lag p50':>15}{'p99':>10}{'max':>10}")
+    for concurrency in levels:
+        for mode, login in (("inline", login_inline), ("pool", login_pool)):
+            throughput, lags = asyncio.run(run(login, concurrency, password, hashed))
+            print(
+                f"{mode:<8}{concurrency:>8}{throughput:>12.1f}"
+                f"{statistics.median(lags) * 1000 if lags else 0.0:>13.1f}ms"
+                f"{percentile(lags, 0.99) * 1000:>8.1f}ms"
+                f"{max(lags, default=0.0) * 1000:>8.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_CONCURRENCY)
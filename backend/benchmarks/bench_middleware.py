@@ -0,0 +1,162 @@
+"""
+Benchmark: per-request middleware overhead
+
+Sends requests straight through the app's middleware stack (CORS, GZip,
+security headers, rate limiting, session release) around a minimal endpoint,
+for:
+- base_http: rate limiting and security headers as BaseHTTPMiddleware
+- asgi: the pure ASGI RateLimitMiddleware and SecurityHeadersMiddleware
+
+and reports microseconds per request for an API path (/api/...) and a page
+path, plus the bare endpoint for reference. Rate limit counters are kept in
+memory so the numbers measure the middleware rather than Redis round trips.
+
+Usage:
+    python -m benchmarks.bench_middleware [requests]
+"""
+import asyncio
+import sys
+import time
+
+from fastapi import Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app import middleware
+from app.middleware import (
+    RATE_LIMIT_EXEMPT_PATHS,
+    SECURITY_HEADERS,
+    DBSessionReleaseMiddleware,
+    SelectiveGZipMiddleware,
+    RateLimitMiddleware,
+    SecurityHeadersMiddleware,
+    is_rate_limited,
+)
+
+DEFAULT_REQUESTS = 5_000
+BODY = b'{"success":true,"data":{"status":"ok"},"errors":null}'
+
+
+class MemoryCounters:
+    """In-process stand-in for the rate limit counters (GET/INCR/EXPIRE)"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def get(self, key):
+        return self.counts.get(key)
+
+    def incr(self, key):
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def expire(self, key, seconds):
+        # Keep every benchmark request under its limit
+        self.counts.pop(key, None)
+
+
+class BaseHTTPRateLimitMiddleware(BaseHTTPMiddleware):
+    """Rate limiting as a BaseHTTPMiddleware (the previous implementation)"""
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in RATE_LIMIT_EXEMPT_PATHS:
+            return await call_next(request)
+        client_ip = request.client.host if request.client else "unknown"
+        if is_rate_limited(client_ip, request.url.path):
+            return JSONResponse(status_code=429, content={"success": False})
+        return await call_next(request)
+
+
+class BaseHTTPSecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """Security headers as a BaseHTTPMiddleware (the previous implementation)"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.method == "OPTIONS" or request.url.path.startswith(("/api/", "/uploads/")):
+            return response
+        for name, value in SECURITY_HEADERS.items():
+            response.headers[name] = value
+        return response
+
+
+async def endpoint(scope, receive, send) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(BODY)).encode())],
+    })
+    await send({"type": "http.response.body", "body": BODY})
+
+
+def build_stack(rate_limit, security_headers):
+    """Same order as app.main (last added is outermost)"""
+    app = endpoint
+    app = CORSMiddleware(app, allow_origins=["http://localhost:3000"], allow_methods=["*"], allow_headers=["*"])
+    app = SelectiveGZipMiddleware(app, minimum_size=1000)
+    app = security_headers(app)
+    app = rate_limit(app)
+    return DBSessionReleaseMiddleware(app)
+
+
+def make_scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost:8000"),
+            (b"origin", b"http://localhost:3000"),
+            (b"accept-encoding", b"gzip"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+
+async def run(app, path: str, requests: int) -> float:
+    """Mean seconds per request"""
+    disconnected = asyncio.Event()
+
+    def make_receive():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # Like a server: nothing more until the client goes away
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        return receive
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(make_scope(path), make_receive(), send)
+    return (time.perf_counter() - start) / requests
+
+
+def main(requests: int) -> None:
+    middleware.redis_client = MemoryCounters()
+    stacks = (
+        ("endpoint", endpoint),
+        ("base_http", build_stack(BaseHTTPRateLimitMiddleware, BaseHTTPSecurityHeadersMiddleware)),
+        ("asgi", build_stack(RateLimitMiddleware, SecurityHeadersMiddleware)),
+    )
+    print(f"{'stack':<12}{'/api/v1/markets':>18}{'/index.html':>14}")
+    for name, app in stacks:
+        api = asyncio.run(run(app, "/api/v1/markets", requests))
+        page = asyncio.run(run(app, "/index.html", requests))
+        print(f"{name:<12}{api * 1e6:>16.1f}us{page * 1e6:>12.1f}us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REQUESTS)
@@ -0,0 +1,159 @@
+"""
+Benchmark: bulk notification writer throughput
+
+Compares, for 10k/100k/1M resolution notifications:
+- CSV encoding only (no database)
+- COPY FROM STDIN (copy_notifications) vs bulk_insert_mappings in 5000-row batches
+- Cache invalidation: two DELETEs per user vs pipelined multi-key UNLINK
+
+Database and Redis phases use settings.DATABASE_URL / REDIS_* and are skipped
+when unreachable. Rows go into a temporary table, so nothing is persisted.
+
+Usage:
+    python -m benchmarks.bench_notification_writer [sizes...]
+"""
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.models.notification import Notification
+from app.services.notification_service import (
+    NOTIFICATION_COPY_COLUMNS,
+    _CsvRowStream,
+    _forecast_result_rows,
+    copy_notifications,
+    notification_cache_keys,
+)
+from app.utils.cache import delete_cache_keys, redis_client
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+BENCH_TABLE = "bench_notifications"
+
+
+def make_user_results(count: int) -> list:
+    """Synthetic scoring results: every third user won"""
+    return [
+        {
+            "user_id": f"bench-user-{i}",
+            "won": i % 3 == 0,
+            "chips_gained": 150,
+            "chips_lost": 0 if i % 3 == 0 else 100,
+            "forecast_points": 100,
+            "reward_amount": 250,
+        }
+        for i in range(count)
+    ]
+
+
+def make_rows(user_results: list):
+    return _forecast_result_rows(user_results, "bench-payload", datetime.now(timezone.utc))
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def report(label: str, count: int, seconds: float) -> None:
+    print(f"  {label:<32} {seconds:8.3f}s  {count / seconds:>12,.0f} rows/s")
+
+
+def bench_encoding(user_results: list) -> None:
+    stream = _CsvRowStream(make_rows(user_results))
+    seconds = timed(lambda: [None for _ in iter(lambda: stream.read(65536), "")])
+    report("CSV encoding only", len(user_results), seconds)
+
+
+def bench_database(user_results: list) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(text(
+            f"CREATE TEMP TABLE {BENCH_TABLE} "
+            f"(LIKE {Notification.__tablename__} INCLUDING DEFAULTS) ON COMMIT DROP"
+        ))
+        
+        seconds = timed(lambda: copy_notifications(db, make_rows(user_results), table=BENCH_TABLE))
+        report("COPY FROM STDIN", len(user_results), seconds)
+        db.execute(text(f"TRUNCATE {BENCH_TABLE}"))
+        
+        # Baseline: batched executemany, equivalent to the old bulk_insert_mappings path
+        def bulk_insert():
+            insert = text(
+                f"INSERT INTO {BENCH_TABLE} ({', '.join(NOTIFICATION_COPY_COLUMNS)}) "
+                f"VALUES ({', '.join(':' + c for c in NOTIFICATION_COPY_COLUMNS)})"
+            )
+            batch = []
+            for row in make_rows(user_results):
+                mapping = dict(zip(NOTIFICATION_COPY_COLUMNS, row))
+                mapping["meta_data"] = json.dumps(mapping["meta_data"])
+                batch.append(mapping)
+                if len(batch) >= 5000:
+                    db.execute(insert, batch)
+                    batch = []
+            if batch:
+                db.execute(insert, batch)
+        
+        seconds = timed(bulk_insert)
+        report("executemany (5000/batch)", len(user_results), seconds)
+    finally:
+        db.rollback()
+        db.close()
+
+
+def bench_cache_invalidation(user_results: list) -> None:
+    user_ids = [r["user_id"] for r in user_results]
+    
+    def per_key_delete():
+        for key in notification_cache_keys(user_ids):
+            redis_client.delete(key)
+    
+    if len(user_ids) <= 100_000:
+        report("Redis DELETE per key", len(user_ids), timed(per_key_delete))
+    report("Redis pipelined UNLINK", len(user_ids), timed(lambda: delete_cache_keys(notification_cache_keys(user_ids))))
+
+
+def is_database_available() -> bool:
+    try:
+        db = SessionLocal()
+        try:
+            return db.get_bind().dialect.name == "postgresql" and db.execute(text("SELECT 1")).scalar() == 1
+        finally:
+            db.close()
+    except Exception:
+        return False
+
+
+def is_redis_available() -> bool:
+    try:
+        return bool(redis_client.ping())
+    except Exception:
+        return False
+
+
+def main(argv: list) -> None:
+    sizes = [int(arg) for arg in argv] or DEFAULT_SIZES
+    database_available = is_database_available()
+    redis_available = is_redis_available()
+    
+    for size in sizes:
+        print(f"\n{size:,} notifications")
+        user_results = make_user_results(size)
+        bench_encoding(user_results)
+        if database_available:
+            bench_database(user_results)
+        if redis_available:
+            bench_cache_invalidation(user_results)
+    
+    if not database_available:
+        print("\n(database phase skipped: PostgreSQL not reachable)")
+    if not redis_available:
+        print("(cache phase skipped: Redis not reachable)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
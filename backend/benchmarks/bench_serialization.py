@@ -0,0 +1,157 @@
+"""
+Benchmark: response serialization CPU per request
+
+Serializes market list and market forecast pages, built from in-memory rows,
+the two ways endpoints can respond:
+- models: MarketResponse/ForecastDetailResponse per row, then jsonable_encoder
+  and stdlib json (the path for dicts returned through response_model)
+- direct: market_to_dict/forecast_to_dict rendered by FastJSONResponse (orjson)
+
+No database or Redis is needed.
+
+Usage:
+    python -m benchmarks.bench_serialization [page sizes...]
+"""
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.v1.forecasts import forecast_to_dict
+from app.api.v1.markets import market_to_dict
+from app.schemas.forecast import ForecastDetailResponse
+from app.schemas.market import MarketResponse
+from app.utils.responses import FastJSONResponse
+
+DEFAULT_PAGE_SIZES = [20, 100]
+MIN_SECONDS = 1.0
+
+
+def make_markets(count: int) -> list:
+    """Synthetic markets with three outcomes each"""
+    now = datetime.utcnow()
+    markets = []
+    for i in range(count):
+        market_id = str(uuid.uuid4())
+        markets.append(SimpleNamespace(
+            id=market_id,
+            title=f"Will benchmark market {i} resolve yes?",
+            slug=f"will-benchmark-market-{i}-resolve-yes",
+            description="A synthetic market used to measure serialization. " * 4,
+            rules="Resolves yes if the benchmark finishes.",
+            image_url=f"/uploads/markets/{market_id}.webp",
+            category="other",
+            meta_data={"source": "benchmark", "tags": ["a", "b"]},
+            max_points_per_user=10000,
+            end_date=now + timedelta(days=30),
+            status="open",
+            resolution_outcome=None,
+            resolution_time=None,
+            created_by=str(uuid.uuid4()),
+            created_at=now,
+            updated_at=now,
+            outcomes=[
+                SimpleNamespace(
+                    id=str(uuid.uuid4()),
+                    market_id=market_id,
+                    name=name,
+                    total_points=1000 * (j + 1),
+                    created_at=now,
+                )
+                for j, name in enumerate(("Yes", "No", "Maybe"))
+            ],
+        ))
+    return markets
+
+
+def make_forecasts(count: int) -> list:
+    """Synthetic forecasts on one market"""
+    now = datetime.utcnow()
+    market_id = str(uuid.uuid4())
+    return [
+        SimpleNamespace(
+            id=str(uuid.uuid4()),
+            user_id=str(uuid.uuid4()),
+            market_id=market_id,
+            outcome_id=str(uuid.uuid4()),
+            outcome=SimpleNamespace(name="Yes"),
+            points=100 + i,
+            reward_amount=None,
+            status="pending",
+            is_flagged=False,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def markets_via_models(markets: list) -> bytes:
+    content = {
+        "success": True,
+        "data": {"markets": [MarketResponse(**market_to_dict(market)) for market in markets]},
+    }
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def markets_direct(markets: list) -> bytes:
+    content = {
+        "success": True,
+        "data": {"markets": [market_to_dict(market) for market in markets]},
+    }
+    return FastJSONResponse(content).body
+
+
+def forecasts_via_models(forecasts: list) -> bytes:
+    details = [
+        ForecastDetailResponse(**forecast_to_dict(
+            forecast, outcome_name=forecast.outcome.name, market_title="Benchmark market",
+        ))
+        for forecast in forecasts
+    ]
+    return JSONResponse(jsonable_encoder({"success": True, "data": {"forecasts": details}})).body
+
+
+def forecasts_direct(forecasts: list) -> bytes:
+    details = [
+        forecast_to_dict(forecast, outcome_name=forecast.outcome.name, market_title="Benchmark market")
+        for forecast in forecasts
+    ]
+    return FastJSONResponse({"success": True, "data": {"forecasts": details}}).body
+
+
+def time_per_call(serialize, rows: list) -> float:
+    """Mean seconds per call, repeating for at least MIN_SECONDS"""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        serialize(rows)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            return elapsed / calls
+
+
+def main(page_sizes: list) -> None:
+    cases = (
+        ("markets", make_markets, markets_via_models, markets_direct),
+        ("forecasts", make_forecasts, forecasts_via_models, forecasts_direct),
+    )
+    print(f"{'page':<10}{'rows':>6}{'models':>12}{'direct':>12}{'speedup':>10}")
+    for name, make_rows, via_models, direct in cases:
+        for size in page_sizes:
+            rows = make_rows(size)
+            before = time_per_call(via_models, rows)
+            after = time_per_call(direct, rows)
+            print(
+                f"{name:<10}{size:>6}{before * 1000:>10.2f}ms{after * 1000:>10.2f}ms"
+                f"{before / after:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_PAGE_SIZES)
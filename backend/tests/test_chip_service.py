@@ -0,0 +1,56 @@
+"""
+Test chip balance statements
+"""
+from sqlalchemy.dialects import postgresql
+
+from app.services import chip_service
+
+
+class _RecordingSession:
+    """Captures executed statements instead of running them"""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement, *args):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return _EmptyResult()
+
+
+class _EmptyResult:
+    def first(self):
+        return None
+
+    def all(self):
+        return []
+
+
+def test_debit_is_conditional_and_journaled_in_one_statement():
+    """The balance check, debit and ledger entry are a single round trip"""
+    db = _RecordingSession()
+    assert chip_service.debit_chips(db, "user-1", 50, "forecast", "forecast-1") is None
+
+    assert len(db.statements) == 1
+    sql = db.statements[0]
+    assert sql.startswith("WITH changed AS")
+    assert "UPDATE users SET chips=(users.chips -" in sql
+    assert "users.chips >=" in sql
+    assert "INSERT INTO chip_ledger" in sql
+
+
+def test_purchase_credit_claims_pending_purchase():
+    """A purchase is credited only when it moves from pending to completed"""
+    db = _RecordingSession()
+    assert chip_service.credit_purchase(db, "purchase-1") is None
+
+    sql = db.statements[0]
+    assert "UPDATE purchases SET status=" in sql
+    assert "purchases.status =" in sql
+    assert "INSERT INTO chip_ledger" in sql
+
+
+def test_batch_credit_chunks_statements():
+    db = _RecordingSession()
+    chip_service.credit_chips_batch(db, {f"user-{i}": 10 for i in range(5)}, "payout", "market-1", batch_size=2)
+    assert len(db.statements) == 3
+    assert all("FROM (VALUES" in sql for sql in db.statements)
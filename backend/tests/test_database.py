@@ -0,0 +1,87 @@
+"""
+Test request session release and pool instrumentation
+"""
+import asyncio
+import itertools
+
+from sqlalchemy import create_engine, text, update
+from sqlalchemy.orm import Session
+
+from app import database
+from app.database import PoolStats, RoutingSession, request_sessions
+from app.middleware import DBSessionReleaseMiddleware
+from app.models.user import User
+
+
+class _ConnectionRecord:
+    def __init__(self):
+        self.info = {}
+
+
+def test_sessions_released_when_response_starts():
+    events = []
+
+    class _Session:
+        def close(self):
+            events.append("close")
+
+    async def endpoint(scope, receive, send):
+        request_sessions.get().append(_Session())
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def send(message):
+        events.append(message["type"])
+
+    asyncio.run(DBSessionReleaseMiddleware(endpoint)({"type": "http"}, None, send))
+
+    assert events == ["close", "http.response.start", "http.response.body"]
+    assert request_sessions.get() is None
+
+
+def test_pool_stats_track_usage():
+    stats = PoolStats(capacity=2)
+    first, second = _ConnectionRecord(), _ConnectionRecord()
+    stats.checked_out(first)
+    stats.checked_out(second)
+    stats.checked_in(first)
+    # Connections invalidated before checkout are checked in without a timestamp
+    stats.checked_in(_ConnectionRecord())
+
+    snapshot = stats.snapshot()
+    assert snapshot["in_use"] == 1
+    assert snapshot["peak_in_use"] == 2
+    assert snapshot["checkouts"] == 2
+    assert snapshot["saturated_checkouts"] == 1
+
+
+def _primary_and_replica(monkeypatch):
+    primary, replica = create_engine("sqlite://"), create_engine("sqlite://")
+    for target, name in ((primary, "primary"), (replica, "replica")):
+        User.__table__.create(target)
+        with Session(target) as seed:
+            seed.add(User(id="user-1", email=name, hashed_password="x", display_name=name, contact_number="1"))
+            seed.commit()
+    monkeypatch.setattr(database, "replica_engines", [replica])
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle([replica]))
+    return primary
+
+
+def test_routing_session_reads_replica_until_first_write(monkeypatch):
+    db = RoutingSession(bind=_primary_and_replica(monkeypatch), use_replica=True)
+    assert db.query(User.email).scalar() == "replica"
+
+    db.execute(update(User).values(chips=5))
+    assert db.query(User.email).scalar() == "primary"
+    db.close()
+
+
+def test_routing_session_sends_raw_sql_to_primary_unless_read_only(monkeypatch):
+    db = RoutingSession(bind=_primary_and_replica(monkeypatch), use_replica=True)
+    read_only = text("SELECT email FROM users").execution_options(read_only=True)
+    assert db.execute(read_only).scalar() == "replica"
+
+    db.execute(text("UPDATE users SET chips = 5"))
+    assert db.info["has_writes"]
+    assert db.query(User.email).scalar() == "primary"
+    db.close()
@@ -0,0 +1,135 @@
+"""
+Test image uploads, variants and content-addressed paths
+"""
+import hashlib
+import io
+import os
+from types import SimpleNamespace
+
+import anyio
+import pytest
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from app.config import settings
+from app.services import image_service
+from app.services.image_service import (
+    IMAGE_VARIANTS,
+    ImageNotStoredError,
+    UPLOAD_CHUNK_SIZE,
+    InvalidImageError,
+    UploadTooLargeError,
+    _render_variants,
+    image_variant_url,
+    sniff_image_type,
+    spool_upload,
+    stored_image_hash,
+    stored_image_paths,
+    update_image_reference,
+)
+
+
+def test_variant_urls():
+    url = "http://localhost:8000/uploads/markets/0c7e_full.webp"
+    assert image_variant_url(url, "thumb") == "http://localhost:8000/uploads/markets/0c7e_thumb.webp"
+    assert image_variant_url(url.replace(".webp", ".jpg"), "card").endswith("/0c7e_card.jpg")
+    # Unprocessed uploads and external images are left alone
+    assert image_variant_url("http://localhost:8000/uploads/markets/0c7e.png", "thumb").endswith("/0c7e.png")
+    assert image_variant_url("https://example.com/full.webp", "thumb") == "https://example.com/full.webp"
+    assert image_variant_url(None, "thumb") is None
+
+
+def test_stored_image_urls_round_trip():
+    content_hash = hashlib.sha256(b"image").hexdigest()
+    paths = stored_image_paths(content_hash)
+
+    assert paths["full"].startswith(f"images/{content_hash[:2]}/{content_hash}_full.")
+    for path in paths.values():
+        assert stored_image_hash(f"http://localhost:8000/uploads/{path}") == content_hash
+    assert stored_image_hash(image_variant_url(f"/uploads/{paths['full']}", "thumb")) == content_hash
+    assert stored_image_hash("http://localhost:8000/uploads/markets/0c7e_full.webp") is None
+    assert stored_image_hash(None) is None
+
+
+def test_reference_to_collected_image_is_rejected():
+    class _Session:
+        def execute(self, statement):
+            # INSERT ... SELECT found no stored_images row
+            return SimpleNamespace(rowcount=0)
+
+    url = f"http://localhost:8000/uploads/{stored_image_paths('ab' * 32)['full']}"
+    with pytest.raises(ImageNotStoredError):
+        update_image_reference(_Session(), "market", "m1", url)
+
+
+def test_render_variants_resizes_and_strips_metadata(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    pytest.importorskip("pillow_heif")
+    source = tmp_path / "upload.jpg"
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    Image.new("RGB", (3000, 2000), "red").save(source, "JPEG", exif=exif)
+
+    variants = _render_variants(str(source), str(tmp_path), "stem", "webp")
+
+    assert set(variants) == set(IMAGE_VARIANTS)
+    for variant, filename in variants.items():
+        with Image.open(tmp_path / filename) as image:
+            assert max(image.size) == IMAGE_VARIANTS[variant]
+            assert not image.getexif()
+
+
+def test_render_variants_rejects_images_over_pixel_limit(tmp_path, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    pytest.importorskip("pillow_heif")
+    monkeypatch.setattr(settings, "IMAGE_MAX_PIXELS", 100 * 100)
+    source = tmp_path / "upload.png"
+    # Just over the limit: Pillow alone would only warn until twice the limit
+    Image.new("RGB", (101, 100), "red").save(source, "PNG")
+
+    with pytest.raises(InvalidImageError):
+        _render_variants(str(source), str(tmp_path), "stem", "webp")
+    assert not list(tmp_path.glob("stem_*"))
+
+
+def test_sniff_image_type():
+    assert sniff_image_type(b"\xff\xd8\xff\xe0\x00\x10JFIF") == "image/jpeg"
+    assert sniff_image_type(b"\x89PNG\r\n\x1a\n\x00") == "image/png"
+    assert sniff_image_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+    assert sniff_image_type(b"\x00\x00\x00\x18ftypheic\x00\x00") == "image/heic"
+    assert sniff_image_type(b"<svg xmlns=") is None
+
+
+def test_spool_upload_checks_content_and_size():
+    png = b"\x89PNG\r\n\x1a\n" + b"\x00" * (3 * UPLOAD_CHUNK_SIZE)
+    allowed = ["image/png"]
+
+    path, content_hash, size = anyio.run(spool_upload, UploadFile(io.BytesIO(png)), len(png), allowed)
+    try:
+        assert open(path, "rb").read() == png
+        assert content_hash == hashlib.sha256(png).hexdigest() and size == len(png)
+    finally:
+        os.remove(path)
+
+    with pytest.raises(UploadTooLargeError):
+        anyio.run(spool_upload, UploadFile(io.BytesIO(png)), UPLOAD_CHUNK_SIZE, allowed)
+    # Declared content type is not trusted
+    with pytest.raises(InvalidImageError):
+        upload = UploadFile(io.BytesIO(b"GIF89a" + b"\x00" * 100), headers=Headers({"content-type": "image/png"}))
+        anyio.run(spool_upload, upload, len(png), allowed)
+
+
+def test_new_stored_image_is_discarded_when_rendering_fails(monkeypatch):
+    discarded = []
+
+    async def broken_image(source_path, dest_dir, stem):
+        raise InvalidImageError("cannot identify image file")
+
+    monkeypatch.setattr(image_service, "_claim_stored_image", lambda content_hash, size: True)
+    monkeypatch.setattr(image_service, "_discard_stored_image", discarded.append)
+    monkeypatch.setattr(image_service, "process_image", broken_image)
+
+    png = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+    with pytest.raises(InvalidImageError):
+        anyio.run(image_service.store_image_upload, UploadFile(io.BytesIO(png)), len(png), ["image/png"])
+    assert discarded == [hashlib.sha256(png).hexdigest()]
@@ -0,0 +1,77 @@
+"""
+Test market bulk import parsing, validation and batch slug allocation
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models.market import Market
+from app.models.user import User
+from app.services.market_import_service import (
+    MAX_BULK_MARKETS,
+    MarketImportError,
+    allocate_slugs,
+    parse_csv_rows,
+    parse_json_rows,
+    parse_ndjson_rows,
+    validate_rows,
+)
+
+
+def test_csv_rows_are_validated_with_line_numbers():
+    text = (
+        "title,category,outcomes,end_date,meta_data\n"
+        "Who wins the Manila mayoral race?,election,Candidate A|Candidate B|Candidate C,,\n"
+        "\n"
+        "Tiny,election,Yes|No,,\n"
+        "Will turnout exceed 80%?,election,Yes|No,2026-11-04T00:00:00Z,{bad\n"
+    )
+    valid, errors = validate_rows(parse_csv_rows(text))
+
+    assert [row for row, _ in valid] == [2]
+    assert [outcome.name for outcome in valid[0][1].outcomes] == ["Candidate A", "Candidate B", "Candidate C"]
+    assert valid[0][1].max_points_per_user == 10000
+    assert {(error["row"], error["field"]) for error in errors} == {(4, "title"), (5, None)}
+
+
+def test_csv_header_must_name_required_columns():
+    with pytest.raises(MarketImportError):
+        parse_csv_rows("title,outcomes\nA market title,Yes|No\n")
+
+
+def test_ndjson_reports_bad_lines_and_duplicate_outcomes():
+    text = (
+        '{"title": "Will it rain on election day?", "category": "weather", "outcomes": [{"name": "Yes"}, {"name": "No"}]}\n'
+        "not json\n"
+        '{"title": "Duplicate outcomes here", "category": "other", "outcomes": [{"name": "Yes"}, {"name": "Yes"}]}\n'
+    )
+    valid, errors = validate_rows(parse_ndjson_rows(text))
+
+    assert [row for row, _ in valid] == [1]
+    assert [error["row"] for error in errors] == [2, 3]
+
+
+def test_batch_size_is_capped():
+    with pytest.raises(MarketImportError):
+        parse_json_rows([{}] * (MAX_BULK_MARKETS + 1))
+
+
+def test_allocate_slugs_in_one_batch():
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    Market.__table__.create(engine)
+    db = Session(engine)
+    db.add(Market(id="1", title="Who wins?", slug="who-wins", category="election"))
+    db.commit()
+
+    assert allocate_slugs(db, ["Who wins?", "Who wins?", "Turnout"]) == ["who-wins-1", "who-wins-2", "turnout"]
+
+
+@pytest.mark.parametrize("parse, content", [
+    (parse_json_rows, []),
+    (parse_csv_rows, "title,category,outcomes\n"),
+    (parse_ndjson_rows, "\n  \n"),
+])
+def test_empty_batches_are_rejected(parse, content):
+    with pytest.raises(MarketImportError):
+        parse(content)
@@ -0,0 +1,73 @@
+"""
+Test market slug allocation
+"""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.api.v1 import markets
+from app.api.v1.markets import assign_unique_slug, generate_unique_slug, next_free_slug
+from app.models.market import Market
+from app.models.user import User
+
+
+def _session() -> Session:
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    Market.__table__.create(engine)
+    return Session(engine)
+
+
+def _market(slug=None) -> Market:
+    return Market(id=slug or "new", title="Will it rain?", slug=slug, category="weather")
+
+
+def test_next_free_slug_fills_lowest_gap():
+    assert next_free_slug("rain", []) == "rain"
+    assert next_free_slug("rain", ["rain", "rain-1", "rain-3"]) == "rain-2"
+
+
+def test_generate_unique_slug_ignores_other_titles_with_same_prefix():
+    db = _session()
+    db.add_all([_market("will-it-rain"), _market("will-it-rain-1"), _market("will-it-rain-tomorrow")])
+    db.commit()
+
+    assert generate_unique_slug(db, "Will it rain?") == "will-it-rain-2"
+    # A market keeps a slug that already belongs to its title
+    assert generate_unique_slug(db, "Will it rain?", existing_slug="will-it-rain-1") == "will-it-rain-1"
+
+
+def test_assign_unique_slug_retries_after_conflict(monkeypatch):
+    db = _session()
+    db.add(_market("will-it-rain"))
+    db.commit()
+
+    # First lookup misses the row, as if another request inserted it meanwhile
+    lookups = iter([set(), {"will-it-rain"}])
+    monkeypatch.setattr(markets, "taken_slugs", lambda db, base_slugs: next(lookups))
+
+    market = _market()
+    assign_unique_slug(db, market, market.title)
+    db.commit()
+
+    assert market.slug == "will-it-rain-1"
+
+
+def test_assign_unique_slug_on_update_keeps_other_changes_after_conflict(monkeypatch):
+    db = _session()
+    db.add_all([_market("will-it-rain"), _market("will-it-snow")])
+    db.commit()
+
+    market = db.get(Market, "will-it-snow")
+    market.title = "Will it rain?"
+    market.description = "Updated"
+
+    # First lookup misses the row, as if another request claimed the slug meanwhile
+    lookups = iter([set(), {"will-it-rain"}])
+    monkeypatch.setattr(markets, "taken_slugs", lambda db, base_slugs: next(lookups))
+
+    assign_unique_slug(db, market, market.title)
+    db.commit()
+
+    db.expire_all()
+    market = db.get(Market, "will-it-snow")
+    assert (market.slug, market.title, market.description) == ("will-it-rain-1", "Will it rain?", "Updated")
@@ -0,0 +1,57 @@
+"""
+Test the ASGI security header and rate limit middleware
+"""
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import middleware
+from app.middleware import RateLimitMiddleware, SecurityHeadersMiddleware
+
+
+def _make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/ping")
+    async def api_ping():
+        return {"ok": True}
+
+    @app.get("/page")
+    async def page():
+        return PlainTextResponse("page")
+
+    @app.get("/api/v1/stream")
+    async def stream():
+        async def chunks():
+            for chunk in (b"a", b"b", b"c"):
+                yield chunk
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    return app
+
+
+def test_security_headers_only_on_non_api_responses(monkeypatch):
+    monkeypatch.setattr(middleware, "is_rate_limited", lambda client_ip, path: False)
+    client = TestClient(_make_app())
+
+    page = client.get("/page")
+    assert page.headers["X-Frame-Options"] == "DENY"
+    assert "Content-Security-Policy" in page.headers
+
+    api = client.get("/api/v1/ping")
+    assert api.json() == {"ok": True}
+    assert "X-Frame-Options" not in api.headers
+
+    assert client.get("/api/v1/stream").content == b"abc"
+
+
+def test_rate_limited_requests_get_429(monkeypatch):
+    monkeypatch.setattr(middleware, "is_rate_limited", lambda client_ip, path: path == "/api/v1/ping")
+    client = TestClient(_make_app())
+
+    response = client.get("/api/v1/ping")
+    assert response.status_code == 429
+    assert response.json()["success"] is False
+    assert client.get("/page").status_code == 200
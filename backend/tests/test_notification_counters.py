@@ -0,0 +1,43 @@
+"""
+Test Redis unread counter seeding
+"""
+import pytest
+
+from app.services import notification_service
+from app.services.notification_service import apply_unread_counter_updates, get_unread_count, unread_counter_key
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def _use_fake_redis(monkeypatch):
+    fake = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(notification_service, "redis_client", fake)
+    for name in ("_incr_if_exists", "_decr_floor_zero", "_seed_counter"):
+        script = getattr(notification_service, name)
+        monkeypatch.setattr(notification_service, name, fake.register_script(script.script))
+    return fake
+
+
+def test_increment_during_seeding_is_not_lost(monkeypatch):
+    """A notification committed after the seeding count must not leave the counter low"""
+    fake = _use_fake_redis(monkeypatch)
+    unread = [3]
+
+    def count_unread(db, user_id):
+        count = unread[0]
+        # A notification commits after the count; its increment finds no counter
+        unread[0] += 1
+        apply_unread_counter_updates([["u1"]], {}, [])
+        return count
+
+    monkeypatch.setattr(notification_service, "count_unread", count_unread)
+
+    assert get_unread_count(None, "u1") == 3
+    assert fake.get(unread_counter_key("u1")) is None
+    # The next read recounts and seeds the current value
+    monkeypatch.setattr(notification_service, "count_unread", lambda db, user_id: unread[0])
+    assert get_unread_count(None, "u1") == 4
+    assert fake.get(unread_counter_key("u1")) == "4"
+
+    apply_unread_counter_updates([["u1"]], {"u1": 2}, [])
+    assert get_unread_count(None, "u1") == 3
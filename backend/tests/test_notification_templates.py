@@ -0,0 +1,35 @@
+"""
+Test templated notification rendering
+"""
+from datetime import datetime, timezone
+
+from app.models.notification import Notification
+from app.services.notification_service import render_notification
+
+PAYLOAD = {"market_id": "m1", "market_title": "Rain in Manila?", "winning_outcome": "Yes"}
+
+
+def test_render_won_notification():
+    """Test a templated win is rendered from payload and per-user numbers"""
+    notification = Notification(
+        id="n1", user_id="u1", type="forecast_won", read=False,
+        created_at=datetime.now(timezone.utc), payload_id="p1",
+        forecast_points=100, chips_amount=1500, reward_amount=1600,
+    )
+    rendered = render_notification(notification, PAYLOAD)
+    assert "Rain in Manila?" in rendered["message"]
+    assert "₱1,500" in rendered["message"]
+    assert rendered["meta_data"]["reward_amount"] == 1600
+    assert rendered["meta_data"]["winning_outcome"] == "Yes"
+
+
+def test_render_plain_notification_unchanged():
+    """Test non-templated notifications keep their stored message"""
+    notification = Notification(
+        id="n2", user_id="u1", type="badge_earned", read=True,
+        created_at=datetime.now(timezone.utc), message="You earned a badge!",
+        meta_data={"badge_id": "newbie"},
+    )
+    rendered = render_notification(notification)
+    assert rendered["message"] == "You earned a badge!"
+    assert rendered["meta_data"] == {"badge_id": "newbie"}
@@ -0,0 +1,56 @@
+"""
+Test monthly partition helpers
+"""
+from datetime import date
+from types import SimpleNamespace
+
+from app.services.partition_service import add_months, create_partition, partition_name, parse_partition_month
+
+
+def test_add_months_crosses_year_boundary():
+    """Test month arithmetic across years"""
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_partition_name_round_trip():
+    """Test partition names encode and decode their month"""
+    name = partition_name("notifications", date(2026, 3, 1))
+    assert name == "notifications_y2026m03"
+    assert parse_partition_month(name) == date(2026, 3, 1)
+    assert parse_partition_month("notifications_default") is None
+
+
+class _RecordingSession:
+    """Records SQL; to_regclass finds only the listed tables"""
+
+    def __init__(self, existing, default_rows=False):
+        self.existing = existing
+        self.default_rows = default_rows
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "to_regclass" in sql:
+            value = params["name"] if params["name"] in self.existing else None
+        else:
+            value = self.default_rows
+        return SimpleNamespace(scalar=lambda: value)
+
+
+def test_create_partition_moves_rows_out_of_default_partition():
+    """Test a month that already has rows in the DEFAULT partition"""
+    db = _RecordingSession(existing={"activities_default"}, default_rows=True)
+
+    assert create_partition(db, "activities", date(2026, 3, 1)) == "activities_y2026m03"
+    assert any(sql.startswith("WITH moved AS (DELETE FROM activities_default") for sql in db.statements)
+    assert db.statements[-1].startswith("ALTER TABLE activities ATTACH PARTITION activities_y2026m03")
+
+
+def test_create_partition_skips_existing_partition():
+    """Test an existing partition is left alone"""
+    db = _RecordingSession(existing={"activities_y2026m03"})
+
+    create_partition(db, "activities", date(2026, 3, 1))
+    assert len(db.statements) == 1
@@ -0,0 +1,57 @@
+"""
+Test quota windows and the database fallback
+"""
+from app.services import quota_service
+from app.services.quota_service import Quota, QuotaExceeded
+
+
+class _ScriptStub:
+    """Stands in for the Lua script, recording the keys and arguments it gets"""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    def __call__(self, keys, args):
+        self.calls.append((keys, args))
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_consume_reports_exceeded_quota(monkeypatch):
+    minute = Quota("test_minute", 10, 60, sliding=True)
+    day = Quota("test_day", 50, 86400)
+    script = _ScriptStub(result=[2, 50])
+    monkeypatch.setattr(quota_service, "_consume_script", script)
+
+    exceeded = quota_service.consume_quotas("user-1", (minute, day))
+
+    assert exceeded == QuotaExceeded(day, 50)
+    assert exceeded.remaining == 0
+    keys, args = script.calls[0]
+    # Current and previous window per quota
+    assert len(keys) == 4
+    assert keys[0].startswith("quota:test_minute:user-1:")
+    # Sliding windows keep two windows alive and weight the previous one
+    assert args[1:3] == [10, 120] and 0 < args[3] <= 1
+    assert args[4:] == [50, 86400, 0]
+
+
+def test_fallback_only_when_redis_is_unavailable(monkeypatch):
+    quota = Quota("test_day", 100, 86400)
+    fallback_calls = []
+
+    def fallback():
+        fallback_calls.append(True)
+        return QuotaExceeded(quota, 90)
+
+    monkeypatch.setattr(quota_service, "_consume_script", _ScriptStub(result=[0, 0]))
+    assert quota_service.consume_quotas("user-1", (quota,), amount=20, fallback=fallback) is None
+    assert fallback_calls == []
+
+    monkeypatch.setattr(quota_service, "_consume_script", _ScriptStub(error=ConnectionError()))
+    exceeded = quota_service.consume_quotas("user-1", (quota,), amount=20, fallback=fallback)
+    assert exceeded.remaining == 10
+    assert fallback_calls == [True]
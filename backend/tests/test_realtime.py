@@ -0,0 +1,81 @@
+"""
+Test server-push helpers
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import SelectiveGZipMiddleware
+from app.services.market_odds_service import compute_consensus
+from app.services.realtime_service import format_sse
+
+
+def test_format_sse_with_event():
+    """Named events carry an event line followed by one JSON data line"""
+    message = format_sse({"unread_count": 3}, event="unread_count")
+    assert message == 'event: unread_count\ndata: {"unread_count": 3}\n\n'
+
+
+def test_format_sse_without_event():
+    message = format_sse({"a": 1})
+    assert message.startswith("data: ")
+    assert json.loads(message[len("data: "):]) == {"a": 1}
+
+
+def test_gzip_skips_event_streams():
+    """Event stream requests are passed through uncompressed"""
+    app = FastAPI()
+    app.add_middleware(SelectiveGZipMiddleware, minimum_size=10)
+
+    @app.get("/text")
+    def text():
+        return PlainTextResponse("x" * 1000)
+
+    client = TestClient(app)
+    compressed = client.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers.get("content-encoding") == "gzip"
+
+    streamed = client.get("/text", headers={"Accept-Encoding": "gzip", "Accept": "text/event-stream"})
+    assert "content-encoding" not in streamed.headers
+    assert streamed.text == "x" * 1000
+
+
+def test_compute_consensus():
+    """Consensus is each outcome's share of allocated points"""
+    outcomes = [SimpleNamespace(name="Yes", total_points=300), SimpleNamespace(name="No", total_points=100)]
+    assert compute_consensus(outcomes) == ({"Yes": 75.0, "No": 25.0}, 400)
+    assert compute_consensus([SimpleNamespace(name="Yes", total_points=0)]) == ({}, 0)
+
+
+def test_odds_stream_joins_only_once_streaming(monkeypatch):
+    """A stream response that is never iterated leaves no viewer behind"""
+    from app.api.v1.markets import stream_market_odds
+    from app.services import market_odds_service
+
+    hub = market_odds_service.MarketOddsHub(pubsub=None)
+    monkeypatch.setattr(market_odds_service, "hub", hub)
+
+    async def snapshot(market_id):
+        return "event: odds\ndata: {}\n\n"
+
+    async def run_feed(market_id):
+        pass
+
+    monkeypatch.setattr(hub, "snapshot", snapshot)
+    monkeypatch.setattr(hub, "_run_feed", run_feed)
+
+    async def scenario():
+        response = await stream_market_odds("m1", SimpleNamespace())
+        assert hub._viewers == {}
+
+        stream = response.body_iterator
+        assert await stream.__anext__() == "event: odds\ndata: {}\n\n"
+        assert len(hub._viewers["m1"]) == 1
+        await stream.aclose()
+        assert hub._viewers == {}
+
+    asyncio.run(scenario())
@@ -0,0 +1,32 @@
+"""
+Test the orjson response class against jsonable_encoder output
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from app.utils.responses import FastJSONResponse
+
+
+class _Item(BaseModel):
+    name: str
+    created_at: datetime
+
+
+def test_renders_like_jsonable_encoder():
+    content = {
+        "created_at": datetime(2024, 5, 1, 12, 30, 15, 123456),
+        "total": Decimal("1200"),
+        "ratio": Decimal("0.25"),
+        "item": _Item(name="Yes", created_at=datetime(2024, 5, 1)),
+        "consensus": {"Yes": 65.5, "No": 34.5},
+        "missing": None,
+    }
+
+    rendered = json.loads(FastJSONResponse(content).body)
+
+    assert rendered == jsonable_encoder(content)
+    assert rendered["total"] == 1200 and isinstance(rendered["total"], int)
@@ -0,0 +1,43 @@
+"""
+Test password hashing off the event loop
+"""
+import asyncio
+
+from passlib.context import CryptContext
+
+from app.utils.security import pwd_context, verify_password_async
+
+
+def test_outdated_hash_is_upgraded_on_verify():
+    old_context = CryptContext(schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=1024, argon2__parallelism=1)
+    old_hash = old_context.hash("secret")
+
+    valid, new_hash = asyncio.run(verify_password_async("secret", old_hash))
+    assert valid
+    assert new_hash and not pwd_context.needs_update(new_hash)
+
+    valid, new_hash = asyncio.run(verify_password_async("wrong", old_hash))
+    assert not valid and new_hash is None
+
+
+def test_tokens_verify_across_key_rotation(monkeypatch):
+    from jose import jwt
+
+    from app.utils import security
+
+    monkeypatch.setattr(security.settings, "JWT_SIGNING_KEYS", {"k1": "first-secret"})
+    monkeypatch.setattr(security.settings, "JWT_ACTIVE_KID", "k1")
+    old_token = security.create_access_token({"sub": "user-1"})
+
+    monkeypatch.setattr(security.settings, "JWT_SIGNING_KEYS", {"k1": "first-secret", "k2": "second-secret"})
+    monkeypatch.setattr(security.settings, "JWT_ACTIVE_KID", "k2")
+    new_token = security.create_access_token({"sub": "user-2"})
+
+    assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+    assert security.decode_token(old_token)["sub"] == "user-1"
+    assert security.decode_token(new_token)["sub"] == "user-2"
+
+    # Retired key: tokens signed with it no longer verify (bypass the verified-token cache)
+    monkeypatch.setattr(security.settings, "JWT_SIGNING_KEYS", {"k2": "second-secret"})
+    security._verified_tokens.delete(security._token_digest(old_token))
+    assert security.decode_token(old_token) == {}
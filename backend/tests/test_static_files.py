@@ -0,0 +1,62 @@
+"""
+Test serving uploads: caching headers, conditional requests, ranges and gzip
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import SelectiveGZipMiddleware
+from app.static_files import UPLOAD_CACHE_CONTROL, UploadStaticFiles
+
+IMAGE = bytes(range(256)) * 40
+
+
+def _make_client(tmp_path) -> TestClient:
+    (tmp_path / "image.png").write_bytes(IMAGE)
+    app = FastAPI()
+    app.mount("/uploads", UploadStaticFiles(directory=tmp_path), name="uploads")
+    app.add_middleware(SelectiveGZipMiddleware, minimum_size=10)
+    return TestClient(app)
+
+
+def test_cacheable_and_not_gzipped(tmp_path):
+    client = _make_client(tmp_path)
+
+    response = client.get("/uploads/image.png", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.content == IMAGE
+    assert response.headers["Cache-Control"] == UPLOAD_CACHE_CONTROL
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert "content-encoding" not in response.headers
+
+    etag = response.headers["ETag"]
+    assert client.get("/uploads/image.png", headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+    assert client.get("/uploads/image.png", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    # If-None-Match takes precedence over If-Modified-Since
+    revalidated = client.get(
+        "/uploads/image.png",
+        headers={"If-None-Match": '"other"', "If-Modified-Since": response.headers["Last-Modified"]},
+    )
+    assert revalidated.status_code == 200
+
+
+def test_range_requests(tmp_path):
+    client = _make_client(tmp_path)
+    size = len(IMAGE)
+
+    partial = client.get("/uploads/image.png", headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.content == IMAGE[100:200]
+    assert partial.headers["Content-Range"] == f"bytes 100-199/{size}"
+
+    suffix = client.get("/uploads/image.png", headers={"Range": "bytes=-10"})
+    assert suffix.content == IMAGE[-10:]
+
+    unsatisfiable = client.get("/uploads/image.png", headers={"Range": f"bytes={size}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["Content-Range"] == f"bytes */{size}"
+
+    # Multiple ranges and stale If-Range get the whole file
+    assert client.get("/uploads/image.png", headers={"Range": "bytes=0-1,5-6"}).status_code == 200
+    stale = client.get("/uploads/image.png", headers={"Range": "bytes=0-1", "If-Range": '"stale"'})
+    assert stale.status_code == 200 and stale.content == IMAGE
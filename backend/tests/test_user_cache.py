@@ -0,0 +1,66 @@
+"""
+Test the authenticated-user cache
+"""
+import time
+
+import pytest
+
+from sqlalchemy.orm import Session
+
+from app.services.user_cache_service import attach_user, invalidate_cached_user
+from app.utils.cache import LocalTTLCache
+
+
+def test_local_cache_evicts_least_recently_used_and_expired():
+    cache = LocalTTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    expiring = LocalTTLCache(max_size=2, ttl_seconds=0)
+    expiring.set("a", 1)
+    time.sleep(0.001)
+    assert expiring.get("a") is None
+
+
+def test_attached_user_is_clean_and_persistent():
+    """A cached user joins the session without pending changes"""
+    db = Session()
+    user = attach_user(db, "user-1", {
+        "is_active": True,
+        "is_banned": False,
+        "is_admin": False,
+        "is_market_moderator": True,
+        "chips_frozen": False,
+    })
+    assert user in db
+    assert not db.dirty and not db.new
+    assert user.is_market_moderator is True
+
+    invalidate_cached_user(db, "user-1")
+    db.rollback()
+    assert "auth_user_invalidations" not in db.info
+
+
+def test_stream_token_of_banned_user_is_rejected(monkeypatch):
+    from fastapi import HTTPException
+
+    from app import dependencies
+    from app.utils.security import create_access_token
+
+    fields = {"is_active": True, "is_banned": True}
+    monkeypatch.setattr(dependencies, "SessionLocal", lambda: Session())
+    monkeypatch.setattr(dependencies, "get_auth_fields", lambda db, user_id: fields)
+    token = create_access_token({"sub": "u1"})
+
+    with pytest.raises(HTTPException) as error:
+        dependencies.get_stream_user_id(token)
+    assert error.value.status_code == 403
+    assert not dependencies.is_user_allowed("u1")
+
+    fields["is_banned"] = False
+    assert dependencies.get_stream_user_id(token) == "u1"
+    assert dependencies.is_user_allowed("u1")
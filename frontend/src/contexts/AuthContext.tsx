@@ -131,6 +131,17 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
   };
 
   const logout = () => {
+    // Revoke the session server-side (best effort; local sign-out does not wait)
+    const storedRefreshToken = localStorage.getItem('refresh_token');
+    const storedAccessToken = localStorage.getItem('access_token');
+    if (storedRefreshToken) {
+      api.post(
+        '/api/v1/auth/logout',
+        { refresh_token: storedRefreshToken },
+        storedAccessToken ? { headers: { Authorization: `Bearer ${storedAccessToken}` } } : undefined,
+      ).catch(() => undefined);
+    }
+
     // Clear all auth data
     localStorage.removeItem('access_token');
     localStorage.removeItem('refresh_token');
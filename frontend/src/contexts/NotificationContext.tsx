@@ -1,6 +1,6 @@
 import React, { createContext, useContext, useState, useEffect, useCallback } from 'react';
 import { notificationService } from '../services/notifications';
-import { Notification } from '../types/notification';
+import { Notification, NotificationStreamEvent } from '../types/notification';
 import { useAuth } from './AuthContext';
 
 interface NotificationContextType {
@@ -22,7 +22,6 @@ export const NotificationProvider: React.FC<{ children: React.ReactNode }> = ({
   const [notifications, setNotifications] = useState<Notification[]>([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
-  const [pollingInterval, setPollingInterval] = useState<NodeJS.Timeout | null>(null);
 
   /**
    * Refresh unread count (lightweight)
@@ -102,8 +101,9 @@ export const NotificationProvider: React.FC<{ children: React.ReactNode }> = ({
   }, [refreshNotifications]);
 
   /**
-   * Set up polling for unread count
-   * Polls every 30 seconds when tab is visible
+   * Subscribe to server-push updates
+   * Falls back to polling every 30 seconds (when tab is visible) while the
+   * stream is unavailable, and retries the stream after it closes.
    */
   useEffect(() => {
     if (!user) {
@@ -112,41 +112,67 @@ export const NotificationProvider: React.FC<{ children: React.ReactNode }> = ({
       return;
     }
 
-    // Initial load
-    refreshUnreadCount();
+    let stream: EventSource | null = null;
+    let pollTimer: ReturnType<typeof setInterval> | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
 
-    // Set up polling (only when tab is visible)
-    const handleVisibilityChange = () => {
-      if (document.hidden) {
-        // Pause polling when tab is hidden
-        if (pollingInterval) {
-          clearInterval(pollingInterval);
-          setPollingInterval(null);
-        }
-      } else {
-        // Resume polling when tab is visible
-        refreshUnreadCount();
-        const interval = setInterval(() => {
+    const startPolling = () => {
+      if (pollTimer) return;
+      pollTimer = setInterval(() => {
+        if (!document.hidden) {
           refreshUnreadCount();
-        }, 30000); // 30 seconds
-        setPollingInterval(interval);
+        }
+      }, 30000); // 30 seconds
+    };
+
+    const stopPolling = () => {
+      if (pollTimer) {
+        clearInterval(pollTimer);
+        pollTimer = null;
+      }
+    };
+
+    const handleEvent = (event: Event) => {
+      const data: NotificationStreamEvent = JSON.parse((event as MessageEvent).data);
+      if (data.unread_count !== undefined) {
+        setUnreadCount(data.unread_count);
+      }
+      const notification = data.notification;
+      if (notification) {
+        setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)].slice(0, 20));
       }
     };
 
-    // Start polling
-    const interval = setInterval(() => {
-      refreshUnreadCount();
-    }, 30000); // 30 seconds
-    setPollingInterval(interval);
+    const connect = () => {
+      stream = notificationService.openStream();
+      if (!stream) {
+        refreshUnreadCount();
+        startPolling();
+        return;
+      }
+      stream.addEventListener('open', stopPolling);
+      stream.addEventListener('unread_count', handleEvent);
+      stream.addEventListener('notification', handleEvent);
+      stream.addEventListener('error', () => {
+        startPolling();
+        // The browser retries on its own unless the stream was rejected (e.g. expired token)
+        if (stream && stream.readyState === EventSource.CLOSED) {
+          stream = null;
+          // Polling refreshes the access token through the API client before reconnecting
+          refreshUnreadCount();
+          reconnectTimer = setTimeout(connect, 30000);
+        }
+      });
+    };
 
-    // Listen for visibility changes
-    document.addEventListener('visibilitychange', handleVisibilityChange);
+    connect();
 
     return () => {
-      if (pollingInterval) {
-        clearInterval(pollingInterval);
+      stream?.close();
+      stopPolling();
+      if (reconnectTimer) {
+        clearTimeout(reconnectTimer);
       }
-      document.removeEventListener('visibilitychange', handleVisibilityChange);
     };
   }, [user, refreshUnreadCount]);
 
@@ -7,7 +7,7 @@ import ForecastSlip from '../components/ForecastSlip';
 import MarketGraph from '../components/MarketGraph';
 import CommentSection from '../components/CommentSection';
 import api from '../services/api';
-import { Market, MarketDetailResponse } from '../types/market';
+import { Market, MarketDetailResponse, MarketOddsEvent } from '../types/market';
 import { ForecastCreate, Forecast } from '../types/forecast';
 import { useAuth } from '../contexts/AuthContext';
 
@@ -27,7 +27,7 @@ const MarketDetail: React.FC = () => {
   const [resolution, setResolution] = useState<any | null>(null);
   const [showCopiedToast, setShowCopiedToast] = useState(false);
 
-  // Polling for real-time updates (only if market is open)
+  // Polling fallback when the live odds stream is unavailable (only if market is open)
   const POLL_INTERVAL = 5000; // 5 seconds
 
   const fetchMarket = useCallback(async () => {
@@ -199,19 +199,58 @@ const MarketDetail: React.FC = () => {
     }
   };
 
-  // Polling for real-time updates
+  // Live odds over Server-Sent Events; polls only while the stream is unavailable
+  const marketStatus = market?.status;
   useEffect(() => {
-    if (!market || market.status !== 'open') return;
-
-    const interval = setInterval(() => {
-      fetchMarket();
-      if (isAuthenticated) {
-        fetchUserForecast();
+    if (!id || marketStatus !== 'open') return;
+
+    let interval: ReturnType<typeof setInterval> | null = null;
+    const startPolling = () => {
+      if (interval) return;
+      interval = setInterval(() => {
+        fetchMarket();
+        if (isAuthenticated) {
+          fetchUserForecast();
+        }
+      }, POLL_INTERVAL);
+    };
+    const stopPolling = () => {
+      if (interval) {
+        clearInterval(interval);
+        interval = null;
       }
-    }, POLL_INTERVAL);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return stopPolling;
+    }
+
+    const stream = new EventSource(`${api.defaults.baseURL}/api/v1/markets/${id}/stream`);
+    stream.addEventListener('open', stopPolling);
+    stream.addEventListener('error', startPolling);
+    stream.addEventListener('odds', (event) => {
+      const odds: MarketOddsEvent = JSON.parse((event as MessageEvent).data);
+      const consensus = Object.keys(odds.consensus).length > 0
+        ? odds.consensus
+        : odds.outcomes.reduce<Record<string, number>>((acc, outcome) => ({ ...acc, [outcome.name]: 0 }), {});
+      setMarket(prev => prev && {
+        ...prev,
+        status: odds.status,
+        total_volume: odds.total_volume,
+        consensus,
+        outcomes: prev.outcomes.map(outcome => {
+          const live = odds.outcomes.find(o => o.id === outcome.id);
+          return live ? { ...outcome, total_points: live.total_points } : outcome;
+        }),
+      });
+    });
 
-    return () => clearInterval(interval);
-  }, [market, isAuthenticated, fetchMarket, fetchUserForecast]);
+    return () => {
+      stream.close();
+      stopPolling();
+    };
+  }, [id, marketStatus, isAuthenticated, fetchMarket, fetchUserForecast]);
 
   const handlePlaceForecast = async (forecastData: ForecastCreate) => {
     if (!id) return;
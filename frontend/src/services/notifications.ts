@@ -31,6 +31,19 @@ export const notificationService = {
     return response.data.data.unread_count;
   },
 
+  /**
+   * Open the server-push stream (Server-Sent Events)
+   * Returns null when not signed in or EventSource is unavailable.
+   */
+  openStream: (): EventSource | null => {
+    const token = localStorage.getItem('access_token');
+    if (!token || typeof EventSource === 'undefined') {
+      return null;
+    }
+    const params = new URLSearchParams({ token });
+    return new EventSource(`${api.defaults.baseURL}/api/v1/notifications/stream?${params.toString()}`);
+  },
+
   /**
    * Mark notification as read
    */
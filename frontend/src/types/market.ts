@@ -29,6 +29,14 @@ export interface Outcome {
   created_at?: string;
 }
 
+export interface MarketOddsEvent {
+  market_id: string;
+  status: Market['status'];
+  outcomes: Pick<Outcome, 'id' | 'name' | 'total_points'>[];
+  consensus: Record<string, number>;
+  total_volume: number;
+}
+
 export interface MarketListResponse {
   success: boolean;
   data: {
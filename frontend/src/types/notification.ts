@@ -29,3 +29,7 @@ export interface UnreadCountResponse {
   };
 }
 
+export interface NotificationStreamEvent {
+  unread_count?: number;
+  notification?: Notification;
+}